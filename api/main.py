@@ -1,12 +1,19 @@
 """FastAPI server for price scraper web app."""
 
-from fastapi import FastAPI, HTTPException, Query
+import time
+
+# Startup is timed from here ("startup" in /api/stats)
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
 from typing import Dict, List
 import sys
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -17,10 +24,14 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, BASE_DIR)
 
 from scraper import (
-    AmazonScraper,
-    FlipkartScraper,
-    MyntraScraper,
-    AjioScraper,
+    MetricsRegistry,
+    ScrapeService,
+    ScraperMetrics,
+    ScraperRegistry,
+    SessionPool,
+    error_status,
+    rate_limiter_from_env,
+    retry_policy_from_env,
 )
 
 # Environment configuration
@@ -54,21 +65,54 @@ app.add_middleware(
 web_dir = os.path.join(BASE_DIR, "web")
 app.mount("/static", StaticFiles(directory=web_dir), name="static")
 
-# Scraper registry
-SCRAPERS = {
-    'amazon': AmazonScraper(),
-    'flipkart': FlipkartScraper(),
-    'myntra': MyntraScraper(),
-    'ajio': AjioScraper(),
-}
+# Worker threads for blocking scrapers
+MAX_WORKERS = int(os.getenv("SCRAPER_MAX_WORKERS", 6))
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+# HTTP sessions shared by all scrapers, sized to the worker pool
+session_pool = SessionPool(max_sessions=MAX_WORKERS)
+
+# Per-host rate limits (RATE_LIMIT_*, HOST_*_CONCURRENCY, BLOCK_PAUSE) and
+# download retries and hedging (FETCH_*, HEDGE_AFTER), configured as for
+# the root server
+rate_limiter = rate_limiter_from_env()
+retry_policy = retry_policy_from_env(fetch_threads=MAX_WORKERS)
+
+# Prometheus metrics served at /metrics
+metrics_registry = MetricsRegistry()
+scraper_metrics = ScraperMetrics(metrics_registry)
+scrape_seconds = metrics_registry.histogram(
+    "api_scrape_seconds", "Time to answer a scrape", ("platform",),
+)
+executor_wait_seconds = metrics_registry.histogram(
+    "api_executor_wait_seconds", "Time scrapes wait for a free worker thread", ("platform",),
+)
+scrapes_in_flight = metrics_registry.gauge("api_scrapes_in_flight", "Scrapes currently running", ("platform",))
+cache_lookups = metrics_registry.counter(
+    "api_cache_lookups_total", "Scrape lookups by cache status (HIT, MISS, COALESCED, SHARED)", ("platform", "status"),
+)
+
+# Scraper registry: scrapers are imported and constructed on first use, and
+# the SCRAPER_WARMUP platforms (default: the implemented ones) in the
+# background at startup
+SCRAPERS = ScraperRegistry({
+    'session_pool': session_pool,
+    'rate_limiter': rate_limiter,
+    'retry_policy': retry_policy,
+    'metrics': scraper_metrics,
+})
+SCRAPER_WARMUP = os.getenv("SCRAPER_WARMUP")
+startup_timings = {}
 
-# Platform implementation status
-PLATFORM_STATUS = {
-    'amazon': 'implemented',
-    'flipkart': 'coming_soon',
-    'myntra': 'coming_soon',
-    'ajio': 'coming_soon',
-}
+
+@app.on_event("startup")
+async def startup():
+    """Load the scrapers expected to be used without delaying startup."""
+    if SCRAPER_WARMUP is None:
+        SCRAPERS.warm(status='implemented')
+    else:
+        SCRAPERS.warm([name.strip().lower() for name in SCRAPER_WARMUP.split(",") if name.strip().lower() != "none"])
+    startup_timings["ready_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -93,7 +137,9 @@ async def api_root():
         "version": "1.0.0",
         "endpoints": {
             "platforms": "/api/platforms",
-            "scrape": "/api/scrape?platform=<platform>&url=<url>"
+            "scrape": "/api/scrape?platform=<platform>&url=<url>",
+            "stats": "/api/stats",
+            "metrics": "/metrics"
         }
     }
 
@@ -101,20 +147,66 @@ async def api_root():
 @app.get("/api/platforms")
 async def get_platforms():
     """List all supported platforms and their implementation status."""
-    return {
-        "platforms": [
-            {
-                "name": platform,
-                "status": status,
-                "available": status == "implemented"
-            }
-            for platform, status in PLATFORM_STATUS.items()
-        ]
+    platforms = []
+    for platform in SCRAPERS:
+        # Read from the registry without importing, installed plugins included
+        status = SCRAPERS.status(platform)
+        platforms.append({
+            "name": platform,
+            "status": status,
+            "available": status == "implemented"
+        })
+    return {"platforms": platforms}
+
+
+@app.get("/api/stats")
+async def get_stats():
+    """Report worker, HTTP connection pool, cache and rate limit usage and startup timings."""
+    stats = {
+        "workers": MAX_WORKERS,
+        "sessions": session_pool.stats(),
+        "cache": scrape_service.stats(),
     }
+    if scrape_service.shared_cache is not None:
+        loop = asyncio.get_running_loop()
+        stats["shared_cache"] = await loop.run_in_executor(None, scrape_service.shared_cache.stats)
+    if rate_limiter is not None:
+        stats["rate_limits"] = rate_limiter.stats()
+    stats["fetch"] = retry_policy.stats()
+    stats["startup"] = {**startup_timings, "scrapers": SCRAPERS.stats()}
+    return stats
+
+
+@app.get("/metrics")
+async def metrics():
+    """Metrics in the Prometheus text format."""
+    return Response(metrics_registry.render(), media_type=metrics_registry.CONTENT_TYPE)
+
+
+def scrape_in_worker(submitted: float, platform: str, url: str, profile=None, fields=None):
+    executor_wait_seconds.labels(platform).observe(time.perf_counter() - submitted)
+    return SCRAPERS[platform].scrape(url, profile, fields)
+
+
+async def run_scrape(platform: str, url: str, profile=None, fields=None):
+    """Scrape in the worker pool so the event loop stays free."""
+    scrapes_in_flight.labels(platform).inc()
+    try:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(executor, scrape_in_worker, time.perf_counter(), platform, url, profile, fields)
+    finally:
+        scrapes_in_flight.labels(platform).dec()
+
+
+# Results are cached (RESULT_CACHE_TTL, RESULT_CACHE_SIZE) and concurrent
+# requests for one product share a scrape; with several worker processes,
+# SHARED_CACHE_PATH lets them share results and in-flight scrapes too
+scrape_service = ScrapeService.from_env(run_scrape)
 
 
 @app.get("/api/scrape")
 async def scrape_product(
+    response: Response,
     platform: str = Query(..., description="Platform name (amazon, flipkart, myntra, ajio)"),
     url: str = Query(..., description="Product URL to scrape")
 ):
@@ -137,7 +229,7 @@ async def scrape_product(
         )
     
     # Check if platform is implemented
-    if PLATFORM_STATUS.get(platform) != 'implemented':
+    if SCRAPERS.status(platform) != 'implemented':
         raise HTTPException(
             status_code=501,
             detail=f"{platform.capitalize()} scraper is coming soon! This feature is not yet implemented."
@@ -150,20 +242,32 @@ async def scrape_product(
             detail="Invalid URL. Please provide a valid HTTP/HTTPS URL."
         )
     
-    # Scrape the product
+    # Different links to the same product share scrapes and cache entries
+    url = SCRAPERS[platform].canonical_url(url)
+    started = time.perf_counter()
     try:
-        scraper = SCRAPERS[platform]
-        result = scraper.scrape(url)
-        return {
-            "success": True,
-            "platform": platform,
-            "data": result
-        }
+        result, cache_status = await scrape_service.scrape(platform, url)
     except Exception as e:
+        # 503/429 with Retry-After when the site blocked or throttled us (or
+        # the host is paused), 502 when the page could not be downloaded
+        paused_for = rate_limiter.paused_for(SCRAPERS[platform].host(url)) if rate_limiter is not None else 0.0
+        status_code, retry_after = error_status(e, paused_for)
         raise HTTPException(
-            status_code=500,
-            detail=f"Scraping failed: {str(e)}"
+            status_code=status_code,
+            detail=f"Scraping failed: {str(e)}",
+            headers={"Retry-After": retry_after} if retry_after else None
         )
+    cache_lookups.labels(platform, cache_status).inc()
+    scrape_seconds.labels(platform).observe(time.perf_counter() - started)
+    response.headers["X-Cache"] = cache_status
+    return {
+        "success": True,
+        "platform": platform,
+        "data": result
+    }
+
+
+startup_timings["import_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
 
 
 if __name__ == "__main__":
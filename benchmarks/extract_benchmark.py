@@ -0,0 +1,96 @@
+"""Time field extraction with the compiled selector plan.
+
+For every fixture and parser backend this compares ``PRODUCT_PLAN`` (one
+pass over the document) against running each field's selectors one by one
+with ``select_one``, the way extraction used to work, and checks that both
+produce the same values. It also reports the time of a full
+``AmazonScraper.extract`` on an already parsed page.
+
+Usage:
+    python benchmarks/extract_benchmark.py [--repeat N] [fixture.html ...]
+
+Without fixture arguments every ``*.html`` file in ``benchmarks/fixtures``
+is used.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scraper import AmazonScraper, Page
+from scraper.amazon_scraper import PRODUCT_PLAN
+from scraper.page import PARSERS
+
+FIXTURES_DIR = os.path.join(BASE_DIR, 'benchmarks', 'fixtures')
+
+
+def per_selector(plan, root) -> dict:
+    """Evaluate a plan by querying the document once per selector."""
+    values = {}
+    for rule in plan.rules:
+        for selector in rule.selectors:
+            node = root.select_one(selector)
+            if node is None:
+                continue
+            outputs, done = rule.extract(node)
+            values.update(outputs)
+            if done:
+                break
+    return values
+
+
+def best_of(repeat: int, fn, *args):
+    """Return (best seconds, result) over ``repeat`` calls."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('fixtures', nargs='*', help='HTML files to benchmark')
+    parser.add_argument('--repeat', type=int, default=10, help='runs per measurement (best is reported)')
+    args = parser.parse_args()
+
+    fixtures = args.fixtures or sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html')))
+    if not fixtures:
+        sys.exit(f"No fixtures found in {FIXTURES_DIR}")
+
+    mismatches = 0
+    for path in fixtures:
+        with open(path, 'rb') as f:
+            content = f.read()
+        url = 'https://www.amazon.in/dp/' + os.path.splitext(os.path.basename(path))[0]
+        print(f"\n{os.path.basename(path)} ({len(content) / 1024:.0f} KiB)")
+        print(f"  {'backend':<12} {'per-selector ms':>16} {'plan ms':>9} {'speedup':>8} {'extract ms':>11}  output")
+
+        for backend in PARSERS:
+            scraper = AmazonScraper(parser=backend)
+            page = Page(url, content, parser=backend)
+            root = scraper.parse_dom(page)
+            naive_s, naive = best_of(args.repeat, per_selector, PRODUCT_PLAN, root)
+            plan_s, values = best_of(args.repeat, PRODUCT_PLAN.evaluate, root)
+            extract_s, _ = best_of(args.repeat, scraper.extract, page)
+            if values == naive:
+                status = 'identical'
+            else:
+                status = 'DIFFERS: ' + ', '.join(sorted(k for k in naive if naive.get(k) != values.get(k)))
+                mismatches += 1
+            print(f"  {backend:<12} {naive_s * 1000:>16.2f} {plan_s * 1000:>9.2f} "
+                  f"{naive_s / plan_s:>7.1f}x {extract_s * 1000:>11.2f}  {status}")
+
+    if mismatches:
+        sys.exit(f"\n{mismatches} plan result(s) differ from per-selector lookup")
+
+
+if __name__ == '__main__':
+    main()
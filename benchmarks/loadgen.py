@@ -0,0 +1,325 @@
+"""Drive ``/api/scrape`` at a target request rate and report latency and resource use.
+
+By default this starts ``benchmarks/mock_storefront.py`` and the API
+(``uvicorn main:app``) as subprocesses, points scrapes at the storefront and
+sends requests at ``--rps`` for ``--duration`` seconds. Requests are sent on
+schedule whether or not earlier ones have finished (an open loop), and each
+latency is measured from when its request was due, so a stalled server shows
+up as latency instead of as a lower request rate.
+
+The report has p50/p95/p99 latency, throughput, response statuses, the
+server's CPU use and RSS (including its parse worker processes, read from
+``/proc``) and the responses the storefront served. ``--json`` saves it and
+``--baseline`` compares against a saved run.
+
+The spawned API gets ``RATE_LIMIT_RPS=0`` (no per-host rate limiting, since
+every scrape goes to one local host) unless it is set in the environment;
+any other setting such as ``SCRAPER_ENGINE`` or ``PARSE_MODE`` is passed
+through from the environment too.
+
+Usage:
+    python benchmarks/loadgen.py [--rps N] [--duration S] [--warmup S]
+        [--unique N] [--profile P] [--json out.json] [--baseline old.json]
+        [storefront options, see mock_storefront.py]
+    python benchmarks/loadgen.py --target http://127.0.0.1:8000 --pid <api pid>
+        --storefront http://127.0.0.1:8900
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.request import urlopen
+
+import httpx
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'benchmarks'))
+
+from mock_storefront import add_arguments
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{' '.join(process.args)} exited with {process.returncode}")
+        try:
+            with urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"{url} not ready after {timeout:.0f}s")
+
+
+def process_tree(pid: int):
+    """``pid`` and its descendants, from ``/proc``."""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, ()))
+    return tree
+
+
+def resource_usage(pid: int):
+    """(CPU seconds, RSS bytes) of ``pid`` and its descendants, or None without ``/proc``."""
+    if not os.path.isdir(f'/proc/{pid}'):
+        return None
+    cpu = rss = 0
+    for member in process_tree(pid):
+        try:
+            with open(f'/proc/{member}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        # utime and stime are fields 14 and 15, rss (pages) is 24; [0] here is field 3
+        cpu += int(fields[11]) + int(fields[12])
+        rss += int(fields[21]) * PAGE_SIZE
+    return cpu / CLOCK_TICKS, rss
+
+
+class ResourceSampler:
+    """Samples a process tree's CPU time and RSS while the load runs."""
+
+    def __init__(self, pid, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+
+    def sample(self):
+        usage = resource_usage(self.pid) if self.pid else None
+        if usage is not None:
+            self.samples.append((time.perf_counter(), *usage))
+
+    async def run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def report(self, start: float, end: float):
+        window = [s for s in self.samples if start <= s[0] <= end]
+        if len(window) < 2:
+            return {'cpu_percent': None, 'rss_peak_mb': None, 'rss_end_mb': None}
+        (t0, cpu0, _), (t1, cpu1, rss_end) = window[0], window[-1]
+        return {
+            'cpu_percent': round(100 * (cpu1 - cpu0) / (t1 - t0), 1),
+            'rss_peak_mb': round(max(s[2] for s in window) / 2 ** 20, 1),
+            'rss_end_mb': round(rss_end / 2 ** 20, 1),
+        }
+
+
+def percentile(samples, q: float):
+    if not samples:
+        return None
+    return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+async def run_load(args, target: str, storefront: str, sampler: ResourceSampler):
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    results = []
+    dropped = 0
+    in_flight = 0
+
+    async def one(client, due, index):
+        nonlocal in_flight
+        asin = f'B{index % args.unique if args.unique else index:09d}'
+        params = {'platform': args.platform, 'url': f'{storefront}/dp/{asin}'}
+        if args.profile:
+            params['profile'] = args.profile
+        if args.fields:
+            params['fields'] = args.fields
+        try:
+            response = await client.get(f'{target}/api/scrape', params=params)
+            status = str(response.status_code)
+        except httpx.TimeoutException:
+            status = 'timeout'
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            in_flight -= 1
+        finished = time.perf_counter()
+        results.append((due, finished, finished - due, status))
+
+    sampler_task = asyncio.ensure_future(sampler.run())
+    tasks = []
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+        started = time.perf_counter()
+        total = int(args.rps * (args.warmup + args.duration))
+        for index in range(total):
+            due = started + index / args.rps
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if in_flight >= args.max_in_flight:
+                dropped += started + args.warmup <= due
+                continue
+            in_flight += 1
+            tasks.append(asyncio.ensure_future(one(client, due, index)))
+        sent_until = time.perf_counter()
+        await asyncio.gather(*tasks)
+    sampler.sample()
+    sampler_task.cancel()
+    return started + args.warmup, sent_until, results, dropped
+
+
+def summarize(args, measure_start, measure_end, results, dropped, sampler, storefront_stats):
+    measured = [(finished, latency, status) for due, finished, latency, status in results if due >= measure_start]
+    latencies = sorted(latency for _, latency, status in measured if status == '200')
+    statuses = {}
+    for _, _, status in measured:
+        statuses[status] = statuses.get(status, 0) + 1
+    # Until the last measured request finished: an overloaded server drains
+    # its backlog after sending stops, which lowers its throughput
+    elapsed = max([measure_end] + [finished for finished, _, _ in measured]) - measure_start
+    ms = lambda value: None if value is None else round(value * 1000, 1)
+    return {
+        'config': {
+            'rps': args.rps, 'duration': args.duration, 'warmup': args.warmup, 'unique': args.unique,
+            'profile': args.profile, 'fields': args.fields, 'platform': args.platform,
+            'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+            'throttle_rate': args.throttle_rate, 'captcha_rate': args.captcha_rate,
+            'engine': os.getenv('SCRAPER_ENGINE'), 'parse_mode': os.getenv('PARSE_MODE'),
+        },
+        'requests': len(measured),
+        'dropped': dropped,
+        'statuses': statuses,
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 0.50)),
+            'p95': ms(percentile(latencies, 0.95)),
+            'p99': ms(percentile(latencies, 0.99)),
+            'max': ms(latencies[-1] if latencies else None),
+        },
+        **sampler.report(measure_start, time.perf_counter()),
+        'storefront': storefront_stats,
+    }
+
+
+def print_report(report, baseline=None):
+    def line(label, value, key=None, unit='', lower_is_better=True):
+        text = f"{label:<16} {'-' if value is None else value}{unit}"
+        old = baseline
+        for part in (key or '').split('.') if key else ():
+            old = old.get(part) if isinstance(old, dict) else None
+        if isinstance(old, (int, float)) and isinstance(value, (int, float)) and old:
+            change = (value - old) / old * 100
+            better = change < 0 if lower_is_better else change > 0
+            text += f"   (baseline {old}{unit}, {change:+.1f}%{'' if abs(change) < 1 else ' better' if better else ' worse'})"
+        print(text)
+
+    latency = report['latency_ms']
+    print(f"requests         {report['requests']} ({report['dropped']} not sent: max in flight reached)")
+    print(f"statuses         {report['statuses']}")
+    line('throughput', report['throughput'], 'throughput', ' req/s', lower_is_better=False)
+    for q in ('p50', 'p95', 'p99', 'max'):
+        line(f'latency {q}', latency[q], f'latency_ms.{q}', ' ms')
+    line('server CPU', report['cpu_percent'], 'cpu_percent', '%')
+    line('server RSS peak', report['rss_peak_mb'], 'rss_peak_mb', ' MB')
+    line('server RSS end', report['rss_end_mb'], 'rss_end_mb', ' MB')
+    if report['storefront']:
+        print(f"storefront       {report['storefront']['responses']} "
+              f"(peak {report['storefront']['peak_in_flight']} in flight)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rps', type=float, default=20, help='requests per second (default 20)')
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds (default 30)')
+    parser.add_argument('--warmup', type=float, default=5, help='seconds of load before measuring (default 5)')
+    parser.add_argument('--unique', type=int, default=0,
+                        help='number of distinct product URLs, cycled (default 0: every request a new URL, '
+                             'so no cache hits)')
+    parser.add_argument('--platform', default='amazon')
+    parser.add_argument('--profile', help='profile parameter for /api/scrape')
+    parser.add_argument('--fields', help='fields parameter for /api/scrape')
+    parser.add_argument('--max-in-flight', type=int, default=512, help='skip sends beyond this (default 512)')
+    parser.add_argument('--timeout', type=float, default=30, help='request timeout seconds (default 30)')
+    parser.add_argument('--target', help='base URL of a running API instead of starting one')
+    parser.add_argument('--pid', type=int, help='pid of the running API, for CPU and RSS (with --target)')
+    parser.add_argument('--storefront', help='base URL of a running storefront instead of starting one')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--baseline', help='compare against a report written with --json')
+    add_arguments(parser)
+    args = parser.parse_args()
+    args.fixtures = []
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    processes = []
+    try:
+        storefront = args.storefront
+        if not storefront:
+            port = free_port()
+            command = [sys.executable, os.path.join(BASE_DIR, 'benchmarks', 'mock_storefront.py'), '--port', str(port)]
+            for name in ('latency', 'jitter', 'error_rate', 'throttle_rate', 'captcha_rate',
+                         'max_concurrency', 'retry_after', 'transfer'):
+                command += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+            processes.append(subprocess.Popen(command, stdout=subprocess.DEVNULL))
+            storefront = f'http://127.0.0.1:{port}'
+            wait_ready(f'{storefront}/_stats', processes[-1])
+
+        target, pid = args.target, args.pid
+        if not target:
+            port = free_port()
+            env = dict(os.environ)
+            env.setdefault('RATE_LIMIT_RPS', '0')
+            command = [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1',
+                       '--port', str(port), '--log-level', 'warning']
+            processes.append(subprocess.Popen(command, cwd=BASE_DIR, env=env))
+            target, pid = f'http://127.0.0.1:{port}', processes[-1].pid
+            wait_ready(f'{target}/api', processes[-1])
+        target = target.rstrip('/')
+        storefront = storefront.rstrip('/')
+
+        print(f"{args.rps:g} req/s for {args.warmup:g}s warmup + {args.duration:g}s "
+              f"against {target}, pages from {storefront}", flush=True)
+        sampler = ResourceSampler(pid)
+        measure_start, measure_end, results, dropped = asyncio.run(run_load(args, target, storefront, sampler))
+        try:
+            with urlopen(f'{storefront}/_stats', timeout=5) as response:
+                storefront_stats = json.load(response)
+        except OSError:
+            storefront_stats = None
+        report = summarize(args, measure_start, measure_end, results, dropped, sampler, storefront_stats)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
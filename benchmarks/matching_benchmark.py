@@ -0,0 +1,121 @@
+"""Build a ProductIndex over a synthetic multi-platform catalog and time lookups.
+
+Each catalog item (brand, series, model, storage, colour, category) is
+listed on two or three platforms, with titles worded the way each platform
+words them and a model number on some listings. The benchmark reports the
+insert rate, memory growth, lookup latency percentiles for indexed products
+and free-text titles, and how often the item's real listings on the other
+platforms are among the top matches.
+
+Usage:
+    python benchmarks/matching_benchmark.py [--products N] [--queries N] [--seed N]
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scraper import ProductIndex
+
+PLATFORMS = ('amazon', 'flipkart', 'myntra', 'ajio')
+CATEGORIES = ('Smartphone', 'Laptop', 'Headphones', 'Smartwatch', 'Tablet', 'Speaker', 'Camera', 'Monitor')
+COLOURS = ('Black', 'Blue', 'Silver', 'Green', 'Graphite', 'Midnight', 'Red', 'White')
+STORAGE = (32, 64, 128, 256, 512, 1024)
+SYLLABLES = ('ka', 'zo', 'mi', 'ra', 'tek', 'on', 'vi', 'lu', 'nex', 'sa', 'por', 'gal', 'xy', 'bo', 'quin', 'dra')
+
+
+def word(rng: random.Random, parts: int) -> str:
+    return ''.join(rng.choice(SYLLABLES) for _ in range(parts)).capitalize()
+
+
+def make_catalog(products: int, rng: random.Random):
+    """Yield (item, platform, url, result) until ``products`` listings are made."""
+    brands = list(dict.fromkeys(word(rng, 2) for _ in range(400)))
+    series = list(dict.fromkeys(word(rng, 3) for _ in range(4000)))
+    made = 0
+    item = 0
+    while made < products:
+        brand = rng.choice(brands)
+        line = rng.choice(series)
+        # Model codes are close to unique per item, as in real catalogs
+        model = f"{rng.choice('ABCDEFGHKMNPRSTXZ')}{rng.choice('ABCDEFGHKMNPRSTXZ')}{rng.randint(10, 9999)}"
+        storage = rng.choice(STORAGE)
+        colour = rng.choice(COLOURS)
+        category = rng.choice(CATEGORIES)
+        model_number = f"{brand[:2].upper()}-{model}{rng.randint(100, 999)}/{storage}"
+        titles = {
+            'amazon': f"{brand} {line} {model} ({storage} GB) - {colour}",
+            'flipkart': f"{brand.upper()} {line} {model} ({colour}, {storage} GB)",
+            'myntra': f"{brand} {line} {model} {storage}GB {category} {colour}",
+            'ajio': f"{brand} {category} {line} {model} {storage} GB",
+        }
+        for platform in rng.sample(PLATFORMS, rng.choice((2, 2, 3))):
+            details = {'Brand': brand}
+            if platform == 'amazon' or rng.random() < 0.3:
+                details['Item model number'] = model_number
+            result = {'title': titles[platform], 'price': float(rng.randint(500, 150000)), 'details': details}
+            yield item, platform, f"https://{platform}.example/p/{made}", result
+            made += 1
+            if made >= products:
+                return
+        item += 1
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {q: samples[min(int(q / 100 * len(samples)), len(samples) - 1)] * 1e6 for q in (50, 95, 99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=1_000_000, help='listings to index')
+    parser.add_argument('--queries', type=int, default=10_000, help='lookups to time')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = ProductIndex()
+    listings = {}
+    items = {}
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    for item, platform, url, result in make_catalog(args.products, rng):
+        index.add(platform, url, result)
+        listings.setdefault(item, []).append((platform, url))
+        items[(platform, url)] = (item, result['title'])
+    build = time.perf_counter() - started
+    print(f"indexed {len(index):,} listings in {build:.1f}s ({len(index) / build:,.0f}/s), "
+          f"max RSS +{rss_mb() - rss_before:,.0f} MB")
+    print(f"index: {index.stats()}")
+
+    keys = rng.sample(list(items), min(args.queries, len(items)))
+    for name, lookup in (
+        ('matches_for', lambda key: index.matches_for(key[0], key[1], limit=5)),
+        ('title', lambda key: index.candidates(items[key][1], exclude_platform=key[0], limit=5)),
+    ):
+        times = []
+        found = expected = 0
+        for key in keys:
+            t0 = time.perf_counter()
+            matches = lookup(key)
+            times.append(time.perf_counter() - t0)
+            others = {url for platform, url in listings[items[key][0]] if platform != key[0]}
+            found += len(others & {match.url for match in matches})
+            expected += len(others)
+        p = percentiles(times)
+        print(f"{name:<12} p50 {p[50]:7.1f} us  p95 {p[95]:7.1f} us  p99 {p[99]:7.1f} us  "
+              f"recall@5 {found / max(expected, 1):.3f}")
+
+
+if __name__ == '__main__':
+    main()
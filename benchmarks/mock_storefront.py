@@ -0,0 +1,253 @@
+"""Local stand-in for a storefront, serving saved product pages for load tests.
+
+Every ``GET`` answers with one of the fixture pages (picked by a hash of the
+path, so a URL always gets the same page), after a configurable latency and
+jitter. A fraction of requests can instead fail with a 500, be throttled
+with a 429 and ``Retry-After``, or get a captcha page; requests beyond
+``--max-concurrency`` get a 503, the way busy sites shed load. Product URLs
+such as ``http://127.0.0.1:8900/dp/B0TEST0001`` are scraped by
+``AmazonScraper`` like real ones.
+
+``GET /_stats`` returns the counts of responses served by status.
+
+Usage:
+    python benchmarks/mock_storefront.py [--port N] [--latency S] [--jitter S]
+        [--error-rate F] [--throttle-rate F] [--captcha-rate F]
+        [--max-concurrency N] [--transfer S] [fixture.html ...]
+
+Without fixture arguments every ``*.html`` file in ``benchmarks/fixtures``
+is served.
+"""
+
+import argparse
+import glob
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(BASE_DIR, 'benchmarks', 'fixtures')
+
+CAPTCHA_PAGE = (
+    b'<html><body><h4>Type the characters you see in this image:</h4>'
+    b'<form method="get" action="/errors/validateCaptcha"></form></body></html>'
+)
+CHUNK_SIZE = 16 * 1024
+
+
+class Storefront:
+    """
+    Response behaviour shared by the server's request threads.
+
+    Args:
+        pages: Page bodies to serve
+        latency: Seconds before the response starts
+        jitter: Up to this many extra seconds, uniformly random
+        error_rate: Fraction of requests answered with a 500
+        throttle_rate: Fraction of requests answered with a 429
+        captcha_rate: Fraction of requests answered with a captcha page
+        max_concurrency: Requests in flight beyond this get a 503 (0 for no limit)
+        retry_after: ``Retry-After`` seconds sent with 429 and 503 responses
+        transfer: Seconds spent sending a page body, in chunks (0 sends it at once)
+    """
+
+    def __init__(
+        self,
+        pages,
+        latency: float = 0.1,
+        jitter: float = 0.05,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        captcha_rate: float = 0.0,
+        max_concurrency: int = 0,
+        retry_after: float = 1.0,
+        transfer: float = 0.0,
+    ):
+        self.pages = list(pages)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.captcha_rate = captcha_rate
+        self.max_concurrency = max_concurrency
+        self.retry_after = retry_after
+        self.transfer = transfer
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.responses = {}
+        self._lock = threading.Lock()
+
+    def enter(self) -> bool:
+        """Count a request in; False if it is over ``max_concurrency``."""
+        with self._lock:
+            if self.max_concurrency and self.in_flight >= self.max_concurrency:
+                return False
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return True
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def count(self, status: int):
+        with self._lock:
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+    def outcome(self, path: str):
+        """(status, body) for a product page request."""
+        roll = random.random()
+        if roll < self.error_rate:
+            return 500, b'Internal Server Error'
+        roll -= self.error_rate
+        if roll < self.throttle_rate:
+            return 429, b'Too Many Requests'
+        roll -= self.throttle_rate
+        if roll < self.captcha_rate:
+            return 200, CAPTCHA_PAGE
+        return 200, self.pages[zlib.crc32(path.encode()) % len(self.pages)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'responses': {str(status): count for status, count in sorted(self.responses.items())},
+            }
+
+
+class StorefrontHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    storefront: Storefront = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status: int, body: bytes, content_type: str = 'text/html; charset=utf-8', headers=()):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        if status != 200 or not self.storefront.transfer or len(body) <= CHUNK_SIZE:
+            self.wfile.write(body)
+            return
+        chunks = range(0, len(body), CHUNK_SIZE)
+        pause = self.storefront.transfer / len(chunks)
+        for start in chunks:
+            self.wfile.write(body[start:start + CHUNK_SIZE])
+            self.wfile.flush()
+            time.sleep(pause)
+
+    def do_GET(self):
+        storefront = self.storefront
+        if self.path == '/_stats':
+            self.send_body(200, json.dumps(storefront.stats()).encode(), 'application/json')
+            return
+        if not storefront.enter():
+            storefront.count(503)
+            self.send_body(503, b'Service Unavailable', headers=[('Retry-After', f'{storefront.retry_after:g}')])
+            return
+        try:
+            time.sleep(storefront.latency + random.uniform(0, storefront.jitter))
+            status, body = storefront.outcome(self.path)
+            headers = [('Retry-After', f'{storefront.retry_after:g}')] if status == 429 else []
+            try:
+                self.send_body(status, body, headers=headers)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up (timeout, or the other half of a hedged request)
+                self.close_connection = True
+            storefront.count(status)
+        finally:
+            storefront.leave()
+
+
+class StorefrontServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients close connections early all the time (streamed fetches stop
+        # once their fields are in, hedged losers are abandoned); only report
+        # real errors
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def load_pages(paths):
+    paths = paths or sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html')))
+    if not paths:
+        raise SystemExit(f"No fixture pages found in {FIXTURES_DIR}")
+    pages = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    return pages
+
+
+def serve(storefront: Storefront, host: str = '127.0.0.1', port: int = 0) -> StorefrontServer:
+    """
+    Start serving ``storefront`` from a background thread.
+
+    Returns:
+        The server; ``server.server_port`` is the bound port and
+        ``server.shutdown()`` stops it
+    """
+    handler = type('Handler', (StorefrontHandler,), {'storefront': storefront})
+    server = StorefrontServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name='storefront', daemon=True).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Storefront behaviour options, shared with ``loadgen.py``."""
+    parser.add_argument('--latency', type=float, default=0.1, help='seconds before each response (default 0.1)')
+    parser.add_argument('--jitter', type=float, default=0.05, help='up to this many extra seconds (default 0.05)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of 500 responses')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of 429 responses')
+    parser.add_argument('--captcha-rate', type=float, default=0.0, help='fraction of captcha pages')
+    parser.add_argument('--max-concurrency', type=int, default=0, help='503 beyond this many requests in flight')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds on 429/503')
+    parser.add_argument('--transfer', type=float, default=0.0, help='seconds spent sending each page body')
+
+
+def storefront_from_args(args) -> Storefront:
+    return Storefront(
+        load_pages(args.fixtures),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        captcha_rate=args.captcha_rate,
+        max_concurrency=args.max_concurrency,
+        retry_after=args.retry_after,
+        transfer=args.transfer,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('fixtures', nargs='*', help='HTML files to serve')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = serve(storefront_from_args(args), args.host, args.port)
+    print(f"Serving {len(server.RequestHandlerClass.storefront.pages)} page(s) "
+          f"on http://{args.host}:{server.server_port}/dp/<ASIN>", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
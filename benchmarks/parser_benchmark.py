@@ -0,0 +1,100 @@
+"""Compare parser backends on saved Amazon product pages.
+
+For every fixture and parser backend this reports the time to build the
+document (parse) and to run ``AmazonScraper.extract`` over it (extract), and
+checks that every backend produces exactly the same scrape result. With
+``--regions`` each backend is also timed with region parsing; those rows are
+compared against each other and list the fields that differ from a full
+parse.
+
+Usage:
+    python benchmarks/parser_benchmark.py [--repeat N] [--regions] [fixture.html ...]
+
+Without fixture arguments every ``*.html`` file in ``benchmarks/fixtures``
+is used. Save real product pages there to benchmark against live markup.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scraper import AmazonScraper, Page
+from scraper.page import PARSERS
+
+FIXTURES_DIR = os.path.join(BASE_DIR, 'benchmarks', 'fixtures')
+
+
+def time_backend(content: bytes, url: str, parser: str, regions: bool, repeat: int):
+    """Return (best parse seconds, best extract seconds, result) for one backend."""
+    scraper = AmazonScraper(parser=parser, region_parsing=regions)
+    best_parse = best_extract = float('inf')
+    result = None
+    for _ in range(repeat):
+        page = Page(url, content, parser=parser)
+        start = time.perf_counter()
+        scraper.parse_dom(page)
+        parsed = time.perf_counter()
+        # The page caches its parsed views, so extract() reuses the document
+        result = scraper.extract(page)
+        done = time.perf_counter()
+        best_parse = min(best_parse, parsed - start)
+        best_extract = min(best_extract, done - parsed)
+    return best_parse, best_extract, result
+
+
+def compare(result: dict, reference: dict) -> list:
+    """Return the keys whose values differ between two scrape results."""
+    return sorted(k for k in reference if reference.get(k) != result.get(k))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('fixtures', nargs='*', help='HTML files to benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per backend (best is reported)')
+    parser.add_argument('--regions', action='store_true', help='also time region parsing')
+    args = parser.parse_args()
+
+    fixtures = args.fixtures or sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.html')))
+    if not fixtures:
+        sys.exit(f"No fixtures found in {FIXTURES_DIR}")
+
+    mismatches = 0
+    for path in fixtures:
+        with open(path, 'rb') as f:
+            content = f.read()
+        url = 'https://www.amazon.in/dp/' + os.path.splitext(os.path.basename(path))[0]
+        print(f"\n{os.path.basename(path)} ({len(content) / 1024:.0f} KiB)")
+        print(f"  {'backend':<20} {'parse ms':>10} {'extract ms':>11} {'total ms':>10}  output")
+
+        full = None
+        for regions in ((False, True) if args.regions else (False,)):
+            reference = None
+            for backend in PARSERS:
+                parse_s, extract_s, result = time_backend(content, url, backend, regions, args.repeat)
+                if reference is None:
+                    reference = result
+                    status = 'reference'
+                elif result == reference:
+                    status = 'identical'
+                else:
+                    status = 'DIFFERS: ' + ', '.join(compare(result, reference))
+                    mismatches += 1
+                if regions and backend == PARSERS[0]:
+                    changed = compare(result, full)
+                    status += f" (vs full parse: {', '.join(changed) if changed else 'identical'})"
+                label = backend + (' +regions' if regions else '')
+                print(f"  {label:<20} {parse_s * 1000:>10.2f} {extract_s * 1000:>11.2f} "
+                      f"{(parse_s + extract_s) * 1000:>10.2f}  {status}")
+            full = full or reference
+
+    if mismatches:
+        sys.exit(f"\n{mismatches} backend result(s) differ from {PARSERS[0]} in the same mode")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Microbenchmarks for scraper.textnorm against the per-call regex helpers it replaced.
+
+Each case runs over a list of strings shaped like those scraped from
+product pages (detail table labels and values with invisible markers,
+bullets, prices in Indian and western formats, ratings). The old
+implementation is kept here as the reference; outputs are compared and any
+input where they disagree is listed.
+
+Usage:
+    python benchmarks/textnorm_benchmark.py [--number N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from scraper import textnorm
+
+DETAIL_STRINGS = [
+    '\u200e  Product Dimensions \u200f : \n',
+    '  10 x 5 x 3 cm; 200 Grams  ',
+    'Item model number\u200e',
+    '\n\n      Manufacturer    :\u200f\u200e',
+    '\u202aSamsung India Electronics Pvt Ltd, 6th Floor, DLF Centre, New Delhi 110001\u202c',
+    'Date First Available',
+    '\n      1 January 2024\n    ',
+    'Country of Origin\u200f\n:\u200e\nIndia',
+    'Best Sellers Rank: #1,234 in Electronics (See Top 100 in Electronics)',
+    '6.7-inch Dynamic AMOLED 2X display with 120Hz refresh rate for smooth scrolling',
+] * 20
+
+PRICE_STRINGS = [
+    '₹1,29,999.00', '₹1,299', '1,299.', '$29.99', '₹ 45,783', '12,34,567',
+    'M.R.P.: ₹1,499', 'Rs. 799', '₹349.00 - ₹599.00', '', 'Currently unavailable',
+] * 20
+
+RATING_STRINGS = [
+    '4.5 out of 5 stars', '4.1', '3.9 out of 5', '42', '5.0 out of 5 stars', 'No ratings', '',
+] * 20
+
+
+def regex_clean_text(text):
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def regex_normalize(s):
+    if not s:
+        return ''
+    s = s.replace('\u200f', '').replace('\u200e', '').replace('\u202a', '').replace('\u202c', '')
+    s = re.sub(r'\s+', ' ', s)
+    return s.strip()
+
+
+def regex_price(price_text):
+    if not price_text:
+        return None
+    price_clean = re.sub(r'[^\d.]', '', price_text)
+    try:
+        return float(price_clean)
+    except ValueError:
+        return None
+
+
+def regex_rating(rating_text):
+    if not rating_text:
+        return None
+    match = re.search(r'(\d+\.?\d*)', rating_text)
+    if match:
+        rating = float(match.group(1))
+        if rating > 5:
+            rating = rating / 10
+        return rating
+    return None
+
+
+CASES = [
+    ('clean_text', DETAIL_STRINGS, regex_clean_text, textnorm.clean_text),
+    ('normalize', DETAIL_STRINGS, regex_normalize, textnorm.normalize),
+    ('parse_price', PRICE_STRINGS, regex_price, textnorm.parse_price),
+    ('parse_rating', RATING_STRINGS, regex_rating, textnorm.parse_rating),
+]
+
+
+def best_us(fn, number: int) -> float:
+    """Best time of one call of ``fn`` in microseconds."""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=200, help='calls per timing run')
+    args = parser.parse_args()
+
+    print(f"{'case':<16} {'strings':>8} {'regex us':>10} {'textnorm us':>12} {'speedup':>8}")
+    changed = []
+    for name, strings, old, new in CASES:
+        old_us = best_us(lambda: [old(s) for s in strings], args.number)
+        new_us = best_us(lambda: [new(s) for s in strings], args.number)
+        print(f"{name:<16} {len(strings):>8} {old_us:>10.1f} {new_us:>12.1f} {old_us / new_us:>7.1f}x")
+        for s in dict.fromkeys(strings):
+            if old(s) != new(s):
+                changed.append((name, s, old(s), new(s)))
+
+    batch_us = best_us(lambda: textnorm.normalize_many(DETAIL_STRINGS), args.number)
+    print(f"{'normalize_many':<16} {len(DETAIL_STRINGS):>8} {'':>10} {batch_us:>12.1f}")
+
+    if changed:
+        print("\nInputs where the result differs from the regex helper:")
+        for name, s, old_value, new_value in changed:
+            print(f"  {name}({s!r}): {old_value!r} -> {new_value!r}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,19 @@
 """FastAPI server for price scraper web app."""
 
-from fastapi import FastAPI, HTTPException, Query
+import time
+
+# Startup is timed from here ("startup" in /api/stats)
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, Field
+from typing import List, Optional
 import os
 import sys
+import json
 from dotenv import load_dotenv
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
@@ -16,12 +24,21 @@ load_dotenv()
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, BASE_DIR)
 
-# Import scrapers (these are class definitions)
+# The scraper package imports its modules on first use; scrapers themselves
+# are loaded through SCRAPERS below
 from scraper import (
-    AmazonScraper,
-    FlipkartScraper,
-    MyntraScraper,
-    AjioScraper,
+    MetricsRegistry,
+    PageStore,
+    PriceHistory,
+    ProductIndex,
+    ScrapeService,
+    ScraperMetrics,
+    ScraperRegistry,
+    SessionPool,
+    WatchScheduler,
+    error_status,
+    rate_limiter_from_env,
+    retry_policy_from_env,
 )
 
 # Environment config
@@ -50,23 +67,168 @@ web_dir = os.path.join(BASE_DIR, "web")
 if os.path.isdir(web_dir):
     app.mount("/static", StaticFiles(directory=web_dir), name="static")
 
+# Scrape engine:
+#   thread   - blocking scrapes in a single worker pool
+#   async    - fetches on the event loop, parsing in a bounded thread pool
+#   pipeline - fetches in a wide I/O thread pool, parsing in worker processes
+SCRAPER_ENGINE = os.getenv("SCRAPER_ENGINE", "thread").lower()
+ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", 200))
+IO_WORKERS = int(os.getenv("IO_WORKERS", 32))
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", os.cpu_count() or 2))
+PARSE_MODE = os.getenv("PARSE_MODE", "process").lower()
+
 # Thread pool for blocking scrapers
-executor = ThreadPoolExecutor(max_workers=6)
+MAX_WORKERS = int(os.getenv("SCRAPER_MAX_WORKERS", 6))
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+# HTTP sessions shared by all scrapers, one per fetching thread (or a pool of
+# checked-out sessions with SCRAPER_SESSION_MODE=pooled)
+session_pool = SessionPool(max_sessions=IO_WORKERS if SCRAPER_ENGINE == "pipeline" else MAX_WORKERS)
+
+# Optional on-disk store of raw pages: fetches revalidate against it with
+# ETag/Last-Modified, and SCRAPER_OFFLINE=1 serves scrapes only from it
+PAGE_STORE_PATH = os.getenv("PAGE_STORE_PATH")
+PAGE_STORE_MAX_AGE = float(os.getenv("PAGE_STORE_MAX_AGE", 0))
+SCRAPER_OFFLINE = os.getenv("SCRAPER_OFFLINE", "").lower() in ("1", "true", "yes")
+page_store = PageStore(PAGE_STORE_PATH, max_age=PAGE_STORE_MAX_AGE) if PAGE_STORE_PATH else None
+
+# Per-host request rate (token bucket) and adaptive concurrency shared by
+# every worker (RATE_LIMIT_*, HOST_*_CONCURRENCY, BLOCK_PAUSE; RATE_LIMIT_RPS=0
+# turns limiting off), and download timeouts, retries and hedging (FETCH_*,
+# HEDGE_AFTER). Both servers read them through scraper.service.
+rate_limiter = rate_limiter_from_env()
+retry_policy = retry_policy_from_env(fetch_threads=IO_WORKERS if SCRAPER_ENGINE == "pipeline" else MAX_WORKERS)
+
+# Prometheus metrics served at /metrics: scraper stage timings (fetch,
+# parse, per-field extraction, selector fallbacks) and API timings, all
+# labeled by platform
+metrics_registry = MetricsRegistry()
+scraper_metrics = ScraperMetrics(metrics_registry)
+scrape_seconds = metrics_registry.histogram(
+    "api_scrape_seconds", "Time to answer a scrape, including cache hits", ("platform",),
+)
+executor_wait_seconds = metrics_registry.histogram(
+    "api_executor_wait_seconds", "Time scrapes wait for a free worker thread (thread engine)", ("platform",),
+)
+scrapes_in_flight = metrics_registry.gauge("api_scrapes_in_flight", "Scrapes currently running", ("platform",))
+cache_lookups = metrics_registry.counter(
+    "api_cache_lookups_total", "Scrape lookups by cache status (HIT, MISS, COALESCED, SHARED)", ("platform", "status"),
+)
+compare_stragglers = metrics_registry.counter(
+    "api_compare_stragglers_total", "Compare requests that answered without this platform's result", ("platform",),
+)
 
 # instantiate scrapers
-SCRAPERS = {
-    "amazon": AmazonScraper(),
-    "flipkart": FlipkartScraper(),
-    "myntra": MyntraScraper(),
-    "ajio": AjioScraper(),
+scraper_options = {
+    "session_pool": session_pool,
+    "page_store": page_store,
+    "offline": SCRAPER_OFFLINE,
+    "rate_limiter": rate_limiter,
+    "retry_policy": retry_policy,
+    "metrics": scraper_metrics,
 }
+# Scrapers (and their imports) are loaded on first use. SCRAPER_WARMUP lists
+# the platforms loaded in the background at startup instead; it defaults to
+# the implemented ones ("none" to load everything on demand)
+SCRAPERS = ScraperRegistry(scraper_options)
+SCRAPER_WARMUP = os.getenv("SCRAPER_WARMUP")
+startup_timings = {}
 
-PLATFORM_STATUS = {
-    "amazon": "implemented",
-    "flipkart": "coming_soon",
-    "myntra": "coming_soon",
-    "ajio": "coming_soon",
-}
+if SCRAPER_ENGINE == "async":
+    from scraper import AsyncScraper, create_client
+    http_client = create_client(max_connections=ASYNC_MAX_CONNECTIONS)
+    parse_executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS)
+    ASYNC_SCRAPERS = {}
+
+    def async_scraper(platform: str):
+        scraper = ASYNC_SCRAPERS.get(platform)
+        if scraper is None:
+            scraper = ASYNC_SCRAPERS[platform] = AsyncScraper(SCRAPERS[platform], http_client, parse_executor)
+        return scraper
+elif SCRAPER_ENGINE == "pipeline":
+    from scraper import ScrapePipeline
+    pipeline = ScrapePipeline(io_workers=IO_WORKERS, parse_workers=PARSE_WORKERS, parse_mode=PARSE_MODE)
+
+# Batch scraping limits
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 1000))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", MAX_WORKERS))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 64))
+
+# /api/compare waits this long (seconds) for all platforms by default, and
+# answers with whatever finished; callers may ask for up to the maximum
+COMPARE_DEADLINE = float(os.getenv("COMPARE_DEADLINE", 8))
+COMPARE_MAX_DEADLINE = float(os.getenv("COMPARE_MAX_DEADLINE", 30))
+
+# Every scraped product, indexed by title tokens, brand and model number to
+# find the same product on other platforms without fetching anything
+product_index = ProductIndex()
+
+
+def host_stats(key: str):
+    if rate_limiter is None:
+        return {}
+    return {(host,): state[key] for host, state in rate_limiter.stats()["hosts"].items()}
+
+
+metrics_registry.callback(
+    "scraper_host_concurrency_limit", "Adaptive concurrency limit per host",
+    lambda: host_stats("concurrency_limit"), ("host",),
+)
+metrics_registry.callback(
+    "scraper_host_throttled_total", "Requests a host throttled (429/503 or captcha page)",
+    lambda: host_stats("throttled"), ("host",), kind="counter",
+)
+metrics_registry.callback(
+    "scraper_host_blocked_total", "Requests a host answered with a captcha page",
+    lambda: host_stats("blocked"), ("host",), kind="counter",
+)
+metrics_registry.callback(
+    "scraper_fetch_retries_total", "Download attempts retried after a failure",
+    lambda: {(): retry_policy.retries}, kind="counter",
+)
+metrics_registry.callback(
+    "scraper_fetch_hedges_total", "Hedged (duplicate) requests sent for slow downloads",
+    lambda: {(): retry_policy.hedges}, kind="counter",
+)
+metrics_registry.callback(
+    "api_cache_entries", "Entries in the result cache", lambda: {(): scrape_service.result_cache.stats()["size"]},
+)
+
+# Optional price watching: registered products are re-checked on their
+# intervals and every check is kept in WATCH_DB_PATH
+WATCH_DB_PATH = os.getenv("WATCH_DB_PATH")
+WATCH_CONCURRENCY = int(os.getenv("WATCH_CONCURRENCY", 8))
+WATCH_PER_HOST = int(os.getenv("WATCH_PER_HOST", 2))
+WATCH_JITTER = float(os.getenv("WATCH_JITTER", 0.1))
+WATCH_MIN_INTERVAL = float(os.getenv("WATCH_MIN_INTERVAL", 60))
+price_history = PriceHistory(WATCH_DB_PATH) if WATCH_DB_PATH else None
+watch_scheduler = None
+
+
+@app.on_event("startup")
+async def startup():
+    global watch_scheduler
+    if SCRAPER_WARMUP is None:
+        SCRAPERS.warm(status="implemented")
+    else:
+        SCRAPERS.warm([name.strip().lower() for name in SCRAPER_WARMUP.split(",") if name.strip().lower() != "none"])
+    startup_timings["ready_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
+    if price_history is not None:
+        watch_scheduler = WatchScheduler(
+            price_history, watch_scrape,
+            max_concurrency=WATCH_CONCURRENCY, per_host=WATCH_PER_HOST, jitter=WATCH_JITTER,
+        )
+        await watch_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if watch_scheduler is not None:
+        await watch_scheduler.stop()
+    if SCRAPER_ENGINE == "async":
+        await http_client.aclose()
+    elif SCRAPER_ENGINE == "pipeline":
+        pipeline.shutdown()
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -85,37 +247,447 @@ async def api_root():
 
 @app.get("/api/platforms")
 async def get_platforms():
+    statuses = {p: SCRAPERS.status(p) for p in SCRAPERS}
     return {
         "platforms": [
-            {"name": p, "status": PLATFORM_STATUS.get(p, "unknown"), "available": PLATFORM_STATUS.get(p) == "implemented"}
-            for p in SCRAPERS.keys()
+            {"name": p, "status": status, "available": status == "implemented"}
+            for p, status in statuses.items()
         ]
     }
 
 
-@app.get("/api/scrape")
-async def api_scrape(platform: str = Query(...), url: str = Query(...)):
+@app.get("/api/stats")
+async def get_stats():
+    stats = {
+        "engine": SCRAPER_ENGINE,
+        "workers": MAX_WORKERS,
+        "sessions": session_pool.stats(),
+        "cache": scrape_service.stats(),
+    }
+    if scrape_service.shared_cache is not None:
+        stats["shared_cache"] = await asyncio.get_running_loop().run_in_executor(None, scrape_service.shared_cache.stats)
+    if SCRAPER_ENGINE == "pipeline":
+        stats["pipeline"] = pipeline.stats()
+    if page_store is not None:
+        stats["page_store"] = page_store.stats()
+    if rate_limiter is not None:
+        stats["rate_limits"] = rate_limiter.stats()
+    stats["fetch"] = retry_policy.stats()
+    if watch_scheduler is not None:
+        stats["watches"] = {**await run_history(price_history.stats), **watch_scheduler.stats()}
+    stats["field_sources"] = scraper_metrics.field_source_counts()
+    stats["product_index"] = product_index.stats()
+    stats["startup"] = {**startup_timings, "scrapers": SCRAPERS.stats()}
+    return stats
+
+
+@app.get("/metrics")
+async def metrics():
+    """Metrics in the Prometheus text format."""
+    return Response(metrics_registry.render(), media_type=metrics_registry.CONTENT_TYPE)
+
+
+def record_result(platform: str, url: str, result: dict, fresh: bool = True):
+    """
+    Index a scrape result's product so it can be matched on other platforms.
+
+    Results another worker process scraped (``fresh`` False) are indexed
+    too: every worker keeps its own index.
+    """
+    product_index.add(platform, url, result)
+
+
+async def run_scrape(platform: str, url: str, profile: Optional[str] = None, fields: Optional[tuple] = None):
+    if SCRAPER_ENGINE == "async":
+        return await async_scraper(platform).scrape(url, profile, fields)
+    if SCRAPER_ENGINE == "pipeline":
+        return await pipeline.scrape(SCRAPERS[platform], url, profile, fields)
+    # Run blocking scrape in thread pool
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(executor, scrape_in_worker, time.perf_counter(), platform, url, profile, fields)
+
+
+def scrape_in_worker(submitted: float, platform: str, url: str, profile: Optional[str], fields: Optional[tuple]):
+    executor_wait_seconds.labels(platform).observe(time.perf_counter() - submitted)
+    return SCRAPERS[platform].scrape(url, profile, fields)
+
+
+async def counted_scrape(platform: str, url: str, profile: Optional[str] = None, fields: Optional[tuple] = None):
+    scrapes_in_flight.labels(platform).inc()
+    try:
+        return await run_scrape(platform, url, profile, fields)
+    finally:
+        scrapes_in_flight.labels(platform).dec()
+
+
+# Scrape results are cached per (platform, URL) for RESULT_CACHE_TTL seconds
+# and concurrent requests for the same product share one scrape; with
+# several worker processes, SHARED_CACHE_PATH lets them share results too
+# (see ScrapeService.from_env)
+scrape_service = ScrapeService.from_env(counted_scrape, on_result=record_result)
+
+
+async def cached_scrape(platform: str, url: str, profile: Optional[str] = None, fields: Optional[tuple] = None):
+    """Return (result, cache status) where status is HIT, MISS, COALESCED or SHARED."""
+    started = time.perf_counter()
+    result, status = await scrape_service.scrape(platform, url, profile, fields)
+    cache_lookups.labels(platform, status).inc()
+    scrape_seconds.labels(platform).observe(time.perf_counter() - started)
+    return result, status
+
+
+def check_scrape_request(platform: str, profile: Optional[str] = None, fields: Optional[str] = None):
+    """
+    Validate scrape parameters, raising HTTPException for bad ones.
+
+    Returns:
+        (platform, fields) with the platform lowercased and ``fields``
+        parsed from its comma-separated form (None for all fields)
+    """
     platform = platform.lower()
     if platform not in SCRAPERS:
         raise HTTPException(status_code=400, detail=f"Unsupported platform: {platform}")
 
-    if PLATFORM_STATUS.get(platform) != "implemented":
+    if SCRAPERS.status(platform) != "implemented":
         raise HTTPException(status_code=501, detail=f"{platform} scraper not implemented yet")
 
-    # Run blocking scrape in thread pool
     scraper = SCRAPERS[platform]
+    if profile is not None and profile not in scraper.PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown profile: {profile}. Supported: {list(scraper.PROFILES)}",
+        )
 
-    loop = asyncio.get_event_loop()
+    if fields is not None:
+        try:
+            fields = scraper.select_fields(f.strip() for f in fields.split(",") if f.strip())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return platform, fields
+
+
+def scrape_error(platform: str, url: str, error: Exception) -> HTTPException:
+    """HTTP error for a failed scrape (see ``error_status``)."""
+    paused_for = rate_limiter.paused_for(SCRAPERS[platform].host(url)) if rate_limiter is not None else 0.0
+    status_code, retry_after = error_status(error, paused_for)
+    headers = {"Retry-After": retry_after} if retry_after else None
+    return HTTPException(status_code=status_code, detail=f"Scraping failed: {str(error)}", headers=headers)
+
+
+@app.get("/api/scrape")
+async def api_scrape(
+    response: Response,
+    platform: str = Query(...),
+    url: str = Query(...),
+    profile: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+):
+    platform, fields = check_scrape_request(platform, profile, fields)
+
+    # Different links to the same product share fetches, cache entries and history
+    url = SCRAPERS[platform].canonical_url(url)
     try:
-        result = await loop.run_in_executor(executor, scraper.scrape, url)
-        return {"success": True, "platform": platform, "data": result}
+        result, cache_status = await cached_scrape(platform, url, profile, fields)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
+        raise scrape_error(platform, url, e)
+    response.headers["X-Cache"] = cache_status
+    return {"success": True, "platform": platform, "data": result}
 
 
 @app.get("/scrape")
-async def scrape_alias(platform: str = Query(...), url: str = Query(...)):
-    return await api_scrape(platform=platform, url=url)
+async def scrape_alias(
+    response: Response,
+    platform: str = Query(...),
+    url: str = Query(...),
+    profile: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+):
+    return await api_scrape(response, platform=platform, url=url, profile=profile, fields=fields)
+
+
+# Fields returned by /api/price
+PRICE_FIELDS = "price,availability"
+
+
+@app.get("/api/price")
+async def api_price(response: Response, platform: str = Query(...), url: str = Query(...)):
+    """Current price and availability, streaming only the top of the page."""
+    platform, fields = check_scrape_request(platform, fields=PRICE_FIELDS)
+    profile = "lite" if "lite" in SCRAPERS[platform].PROFILES else None
+
+    url = SCRAPERS[platform].canonical_url(url)
+    try:
+        result, cache_status = await cached_scrape(platform, url, profile, fields)
+    except Exception as e:
+        raise scrape_error(platform, url, e)
+    response.headers["X-Cache"] = cache_status
+    return {"success": True, "platform": platform, "data": result}
+
+
+async def compare_platform(platform: str, url: str, profile: Optional[str], fields: Optional[str]) -> dict:
+    """Scrape one platform for /api/compare, reporting failures in the result instead of raising."""
+    started = time.perf_counter()
+    try:
+        platform, fields = check_scrape_request(platform, profile, fields)
+        url = SCRAPERS[platform].canonical_url(url)
+        result, cache_status = await cached_scrape(platform, url, profile, fields)
+    except HTTPException as e:
+        return {"success": False, "status_code": e.status_code, "error": e.detail}
+    except Exception as e:
+        error = scrape_error(platform, url, e)
+        return {"success": False, "status_code": error.status_code, "error": error.detail}
+    return {
+        "success": True,
+        "cache": cache_status,
+        "elapsed": round(time.perf_counter() - started, 3),
+        "data": result,
+    }
+
+
+def consume_result(task: asyncio.Task):
+    # Stragglers keep running so their results reach the cache; nobody
+    # awaits them afterwards
+    if not task.cancelled():
+        task.exception()
+
+
+@app.get("/api/compare")
+async def api_compare(
+    request: Request,
+    deadline: float = Query(COMPARE_DEADLINE, gt=0, le=COMPARE_MAX_DEADLINE),
+    profile: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+):
+    """
+    Scrape the same product on several platforms at once.
+
+    Takes one product URL per platform as a query parameter named after it
+    (``?amazon=<url>&flipkart=<url>``). All platforms are scraped
+    concurrently, so the answer takes as long as the slowest platform, but
+    never longer than ``deadline`` seconds: platforms still running then are
+    reported as timed out, and finish in the background to fill the cache.
+    """
+    urls = {platform: request.query_params[platform] for platform in SCRAPERS if request.query_params.get(platform)}
+    if not urls:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Give a product URL for at least one platform: {list(SCRAPERS)}",
+        )
+
+    started = time.perf_counter()
+    tasks = {
+        platform: asyncio.ensure_future(compare_platform(platform, url, profile, fields))
+        for platform, url in urls.items()
+    }
+    await asyncio.wait(tasks.values(), timeout=deadline)
+
+    results = {}
+    for platform, task in tasks.items():
+        if task.done():
+            results[platform] = task.result()
+            continue
+        task.add_done_callback(consume_result)
+        compare_stragglers.labels(platform).inc()
+        results[platform] = {
+            "success": False,
+            "timed_out": True,
+            "error": f"Did not finish within {deadline:g}s",
+        }
+
+    prices = {
+        platform: result["data"]["price"]
+        for platform, result in results.items()
+        if result["success"] and result["data"].get("price") is not None
+    }
+    return {
+        "success": any(result["success"] for result in results.values()),
+        "complete": not any(result.get("timed_out") for result in results.values()),
+        "elapsed": round(time.perf_counter() - started, 3),
+        "cheapest": min(prices, key=prices.get) if prices else None,
+        "results": results,
+    }
+
+
+@app.get("/api/matches")
+async def api_matches(
+    platform: Optional[str] = Query(None),
+    url: Optional[str] = Query(None),
+    title: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """
+    The same product on other platforms, from products scraped so far.
+
+    Look up by a scraped product (``platform`` and ``url``) or by ``title``.
+    Nothing is fetched; products only become matchable once scraped.
+    """
+    if platform is not None and url is not None:
+        platform = platform.lower()
+        if platform not in SCRAPERS:
+            raise HTTPException(status_code=400, detail=f"Unsupported platform: {platform}")
+        url = SCRAPERS[platform].canonical_url(url)
+        matches = product_index.matches_for(platform, url, limit)
+        if matches is None:
+            raise HTTPException(status_code=404, detail="Product not scraped yet; scrape it first")
+        product = product_index.get(platform, url)
+    elif title:
+        matches = product_index.candidates(title, limit=limit)
+        product = {"title": title}
+    else:
+        raise HTTPException(status_code=400, detail="Give platform and url, or title")
+    return {"product": product, "matches": [match._asdict() for match in matches]}
+
+
+class BatchItem(BaseModel):
+    platform: str
+    url: str
+
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+    concurrency: int = Field(default=BATCH_CONCURRENCY, ge=1, le=BATCH_MAX_CONCURRENCY)
+
+
+async def scrape_batch_item(platform: str, url: str, semaphore: asyncio.Semaphore):
+    """Scrape one batch entry, reporting failures in the result instead of raising."""
+    if platform not in SCRAPERS:
+        return {"success": False, "error": f"Unsupported platform: {platform}"}
+    if SCRAPERS.status(platform) != "implemented":
+        return {"success": False, "error": f"{platform} scraper not implemented yet"}
+    async with semaphore:
+        try:
+            result, cache_status = await cached_scrape(platform, url)
+        except Exception as e:
+            return {"success": False, "error": f"Scraping failed: {str(e)}"}
+    return {"success": True, "cache": cache_status, "data": result}
+
+
+@app.post("/api/scrape/batch")
+async def api_scrape_batch(batch: BatchRequest, request: Request, format: str = Query(None)):
+    """
+    Scrape many products, streaming each result as soon as it finishes.
+
+    Repeated products (after URL canonicalization) are scraped once; their
+    result lists every input position in ``indices``. Results are NDJSON
+    lines by default, or Server-Sent Events with ``format=sse`` or an
+    ``Accept: text/event-stream`` header.
+    """
+    if len(batch.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large: at most {BATCH_MAX_ITEMS} items")
+    if format is None:
+        format = "sse" if "text/event-stream" in request.headers.get("accept", "") else "ndjson"
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
+    # Dedup on (platform, canonical URL), keeping first-seen order
+    unique = {}
+    for index, item in enumerate(batch.items):
+        platform = item.platform.lower()
+        url = SCRAPERS[platform].canonical_url(item.url) if platform in SCRAPERS else item.url
+        unique.setdefault((platform, url), []).append(index)
+
+    semaphore = asyncio.Semaphore(batch.concurrency)
+
+    async def run(platform, url, indices):
+        outcome = await scrape_batch_item(platform, url, semaphore)
+        return {"platform": platform, "url": url, "indices": indices, **outcome}
+
+    async def stream():
+        tasks = [asyncio.ensure_future(run(p, u, i)) for (p, u), i in unique.items()]
+        succeeded = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                succeeded += item["success"]
+                line = json.dumps(item, ensure_ascii=False)
+                yield f"event: result\ndata: {line}\n\n" if format == "sse" else line + "\n"
+            if format == "sse":
+                summary = {"items": len(batch.items), "unique": len(tasks), "succeeded": succeeded, "failed": len(tasks) - succeeded}
+                yield f"event: done\ndata: {json.dumps(summary)}\n\n"
+        finally:
+            # Client went away: stop waiting (shared scrapes still fill the cache)
+            for task in tasks:
+                task.cancel()
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+
+class WatchRequest(BaseModel):
+    platform: str
+    url: str
+    interval: float = Field(default=3600, description="Seconds between checks")
+
+
+async def watch_scrape(platform: str, url: str):
+    """Scheduled check of a watched product: price and availability only."""
+    scraper = SCRAPERS[platform]
+    profile = "lite" if "lite" in scraper.PROFILES else None
+    fields = scraper.select_fields(["price", "availability"]) if scraper.FIELDS else None
+    result = await run_scrape(platform, url, profile, fields)
+    record_result(platform, url, result)
+    return result
+
+
+def require_watches():
+    if watch_scheduler is None:
+        raise HTTPException(status_code=503, detail="Price watching is disabled (set WATCH_DB_PATH)")
+
+
+def watch_info(watch, latest) -> dict:
+    return {**watch._asdict(), "latest": latest}
+
+
+async def run_history(fn, *args):
+    """Run a price history call in the default executor, off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+@app.post("/api/watches")
+async def add_watch(request: WatchRequest):
+    require_watches()
+    platform, _ = check_scrape_request(request.platform)
+    if request.interval < WATCH_MIN_INTERVAL:
+        raise HTTPException(status_code=400, detail=f"Interval must be at least {WATCH_MIN_INTERVAL:g} seconds")
+    url = SCRAPERS[platform].canonical_url(request.url)
+    watch = await run_history(price_history.add_watch, platform, url, request.interval)
+    latest = await run_history(price_history.latest, watch.id)
+    watch_scheduler.add(watch)
+    return {"success": True, "watch": watch_info(watch, latest)}
+
+
+@app.get("/api/watches")
+async def list_watches():
+    require_watches()
+    rows = await run_history(price_history.watches_with_latest)
+    return {"watches": [watch_info(watch, latest) for watch, latest in rows]}
+
+
+@app.delete("/api/watches/{watch_id}")
+async def remove_watch(watch_id: int):
+    require_watches()
+    if not await run_history(price_history.remove_watch, watch_id):
+        raise HTTPException(status_code=404, detail=f"Unknown watch: {watch_id}")
+    watch_scheduler.remove(watch_id)
+    return {"success": True}
+
+
+@app.get("/api/watches/{watch_id}/history")
+async def watch_history(
+    watch_id: int,
+    start: Optional[float] = Query(None, description="From this time (epoch seconds)"),
+    end: Optional[float] = Query(None, description="Until this time (epoch seconds)"),
+    limit: Optional[int] = Query(None, ge=1, description="Only the latest N checks in the range"),
+):
+    require_watches()
+    watch = await run_history(price_history.get_watch, watch_id)
+    if watch is None:
+        raise HTTPException(status_code=404, detail=f"Unknown watch: {watch_id}")
+    history = await run_history(price_history.history, watch_id, start, end, limit)
+    return {"watch": watch._asdict(), "history": history}
+
+
+startup_timings["import_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
 
 
 if __name__ == "__main__":
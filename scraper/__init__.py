@@ -1,16 +1,80 @@
-"""Scraper package for e-commerce price comparison."""
-
-from .base_scraper import BaseScraper
-from .amazon_scraper import AmazonScraper
-from .flipkart_scraper import FlipkartScraper
-from .myntra_scraper import MyntraScraper
-from .ajio_scraper import AjioScraper
-
-__all__ = [
-    'BaseScraper',
-    'AmazonScraper',
-    'FlipkartScraper',
-    'MyntraScraper',
-    'AjioScraper',
-]
+"""Scraper package for e-commerce price comparison.
 
+Names are imported from their modules on first access (PEP 562), so
+``from scraper import RateLimiter`` does not pull in bs4, lxml or httpx and
+a server only pays for the parts it uses.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    'Page': 'page',
+    'PageStore': 'page_store',
+    'SessionPool': 'session_pool',
+    'BaseScraper': 'base_scraper',
+    'AmazonScraper': 'amazon_scraper',
+    'FlipkartScraper': 'flipkart_scraper',
+    'MyntraScraper': 'myntra_scraper',
+    'AjioScraper': 'ajio_scraper',
+    'AsyncScraper': 'async_scraper',
+    'create_client': 'async_scraper',
+    'ScrapePipeline': 'pipeline',
+    'ResultCache': 'cache',
+    'SingleFlight': 'cache',
+    'cache_key': 'cache',
+    'PriceHistory': 'watch',
+    'WatchScheduler': 'watch',
+    'RateLimiter': 'ratelimit',
+    'Throttled': 'ratelimit',
+    'BlockedError': 'ratelimit',
+    'RetryPolicy': 'retry',
+    'FetchError': 'retry',
+    'MetricsRegistry': 'metrics',
+    'ScraperMetrics': 'metrics',
+    'ProductIndex': 'matching',
+    'SharedResultCache': 'shared_cache',
+    'ScraperRegistry': 'registry',
+    'ScrapeService': 'service',
+    'error_status': 'service',
+    'rate_limiter_from_env': 'service',
+    'retry_policy_from_env': 'service',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .page import Page
+    from .page_store import PageStore
+    from .session_pool import SessionPool
+    from .base_scraper import BaseScraper
+    from .amazon_scraper import AmazonScraper
+    from .flipkart_scraper import FlipkartScraper
+    from .myntra_scraper import MyntraScraper
+    from .ajio_scraper import AjioScraper
+    from .async_scraper import AsyncScraper, create_client
+    from .pipeline import ScrapePipeline
+    from .cache import ResultCache, SingleFlight, cache_key
+    from .watch import PriceHistory, WatchScheduler
+    from .ratelimit import BlockedError, RateLimiter, Throttled
+    from .retry import FetchError, RetryPolicy
+    from .metrics import MetricsRegistry, ScraperMetrics
+    from .matching import ProductIndex
+    from .shared_cache import SharedResultCache
+    from .registry import ScraperRegistry
+    from .service import ScrapeService, error_status, rate_limiter_from_env, retry_policy_from_env
@@ -0,0 +1,104 @@
+"""Command line tools for the scraper package.
+
+Usage:
+    python -m scraper reextract [--db pages.db] [--platform amazon] [--filter TEXT]
+    python -m scraper store-stats [--db pages.db] [--prune]
+    python -m scraper importtime [--module main] [--then CODE] [--top N]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+from . import PageStore, ScraperRegistry
+from .page_store import reextract
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+
+def importtime_report(module: str, then: str = '', top: int = 20) -> str:
+    """
+    Import ``module`` in a fresh interpreter under ``-X importtime`` and
+    summarize where the time went.
+
+    Args:
+        module: Module to import (e.g. ``main`` for the API server)
+        then: Python statement run after the import, whose imports are
+            reported too (e.g. ``main.SCRAPERS.warm(background=False)``)
+        top: Rows per table
+
+    Returns:
+        Report text: wall time, time per top-level package, and the slowest
+        modules by cumulative and by self time
+    """
+    code = (
+        f'import time; _t = time.perf_counter(); import {module}; _i = time.perf_counter(); {then}\n'
+        f'print("wall", _i - _t, time.perf_counter() - _i)'
+    )
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True)
+    if process.returncode != 0:
+        raise SystemExit(process.stderr)
+    import_seconds, then_seconds = (float(value) for value in process.stdout.split()[-2:])
+
+    rows = []
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            rows.append((name, int(own), int(cumulative), len(indent) // 2))
+    packages = {}
+    for name, own, _, _ in rows:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + own
+
+    lines = [f"import {module}: {import_seconds * 1000:.1f} ms wall"]
+    if then:
+        lines.append(f"then {then}: {then_seconds * 1000:.1f} ms")
+    lines += ['', f"{'package':<40} {'self total ms':>13}"]
+    for package, own in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"{package:<40} {own / 1000:>13.1f}")
+    lines += ['', f"{'module (slowest cumulative)':<60} {'cumul. ms':>9} {'self ms':>8}"]
+    for name, own, cumulative, depth in sorted(rows, key=lambda row: -row[2])[:top]:
+        lines.append(f"{'  ' * depth + name:<60} {cumulative / 1000:>9.1f} {own / 1000:>8.1f}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m scraper')
+    commands = parser.add_subparsers(dest='command', required=True)
+    platforms = sorted(ScraperRegistry())
+
+    cmd = commands.add_parser('reextract', help='re-run extraction over stored pages without network access')
+    cmd.add_argument('--db', default=os.getenv('PAGE_STORE_PATH', 'pages.db'), help='page store path')
+    cmd.add_argument('--platform', default='amazon', choices=platforms)
+    cmd.add_argument('--filter', help='only URLs containing this text')
+
+    cmd = commands.add_parser('store-stats', help='print page store statistics')
+    cmd.add_argument('--db', default=os.getenv('PAGE_STORE_PATH', 'pages.db'), help='page store path')
+    cmd.add_argument('--prune', action='store_true', help='first delete bodies no URL refers to any more')
+
+    cmd = commands.add_parser('importtime', help='report where startup import time goes (python -X importtime)')
+    cmd.add_argument('--module', default='main', help='module to import (default: main, the API server)')
+    cmd.add_argument('--then', default='', help='statement to run and report after the import')
+    cmd.add_argument('--top', type=int, default=20, help='rows per table')
+
+    args = parser.parse_args()
+    if args.command == 'importtime':
+        print(importtime_report(args.module, args.then, args.top))
+        return
+
+    store = PageStore(args.db)
+    if args.command == 'store-stats':
+        pruned = store.prune() if args.prune else 0
+        print(json.dumps({**store.stats(), 'pruned': pruned} if args.prune else store.stats()))
+    elif args.command == 'reextract':
+        scraper = ScraperRegistry({'page_store': store, 'offline': True})[args.platform]
+        for result in reextract(store, scraper, args.filter):
+            sys.stdout.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,22 @@
 """Ajio scraper implementation (placeholder)."""
 
-from typing import Dict
+from typing import Dict, Iterable, Optional
 from .base_scraper import BaseScraper
 
 
 class AjioScraper(BaseScraper):
     """Scraper for Ajio product pages (coming soon)."""
+
+    PLATFORM = 'ajio'
     
-    def scrape(self, url: str) -> Dict:
+    def scrape(self, url: str, profile: Optional[str] = None, fields: Optional[Iterable[str]] = None) -> Dict:
         """
         Placeholder scraper for Ajio.
         
         Args:
             url: Ajio product URL
+            profile: Fetch profile (unused)
+            fields: Fields to extract (unused)
             
         Returns:
             Error response indicating coming soon
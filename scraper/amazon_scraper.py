@@ -1,161 +1,305 @@
 """Amazon India scraper implementation."""
 
-from typing import Dict
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
 import re
-from .base_scraper import BaseScraper
+import time
+from urllib.parse import parse_qs, urlsplit
+from .base_scraper import WARM_DOCUMENT, BaseScraper
+from .embedded import extract_embedded
+from .page import Page
+from .selector_plan import FieldRule, SelectorPlan
+from .textnorm import normalize
+from .urls import normalize_url
+
+
+# ASIN locations in Amazon product URLs (/dp/, /gp/product/, mobile and legacy paths)
+ASIN_PATH_RE = re.compile(r'/(?:dp|gp/product|gp/aw/d|exec/obidos/ASIN|o/ASIN|product-reviews)/([A-Z0-9]{10})(?=[/?#]|$)', re.I)
+ASIN_RE = re.compile(r'^[A-Z0-9]{10}$', re.I)
+
+
+@lru_cache(maxsize=1024)
+def _key_patterns(key: str):
+    """Compiled patterns stripping a repeated key from the end and start of a value."""
+    key_esc = re.escape(key)
+    # trailing occurrences like ": Key" or ": Key :"
+    trailing = re.compile(r':\s*' + key_esc + r'\s*:??$', re.I)
+    # leading occurrences like "Key :" at start
+    leading = re.compile(r'^' + key_esc + r'\s*:??\s*', re.I)
+    return trailing, leading
+
+
+def _title(elem):
+    return {'title': BaseScraper.clean_text(elem.get_text())}, True
+
+
+def _price(elem):
+    price_text = elem.get_text()
+    price = BaseScraper.extract_price(price_text)
+    return {'price_text': price_text, 'price': price}, bool(price)
+
+
+def _rating(elem):
+    rating_text = elem.get_text() or elem.get('aria-label', '')
+    rating = BaseScraper.extract_rating(rating_text)
+    return {'rating_text': rating_text, 'rating': rating}, bool(rating)
+
+
+def _image(elem):
+    image = elem.get('src') or elem.get('data-src')
+    return {'image': image}, bool(image)
+
+
+def _availability(elem):
+    availability = BaseScraper.clean_text(elem.get_text())
+    return {'availability': availability}, bool(availability)
+
+
+def _description(elem):
+    # Get first few bullet points or paragraphs
+    items = elem.find_all(['li', 'p'], limit=3)
+    if not items:
+        return {}, False
+    return {'description': ' | '.join([BaseScraper.clean_text(item.get_text()) for item in items])}, True
+
+
+def _section(name):
+    def extract(elem):
+        return {name: elem}, True
+    return extract
+
+
+# Product fields: selectors in order of preference and how to read each match
+PRODUCT_PLAN = SelectorPlan([
+    FieldRule('title', (
+        '#productTitle',
+        'h1.a-size-large.product-title-word-break',
+        'span#productTitle',
+    ), _title),
+    FieldRule('price', (
+        'span.a-price-whole',
+        'span.a-price .a-offscreen',
+        '#priceblock_dealprice',
+        '#priceblock_saleprice',
+        '#priceblock_ourprice',
+        'span.a-color-price',
+    ), _price),
+    FieldRule('rating', (
+        'span.a-icon-alt',
+        '#acrPopover',
+        'span.a-icon.a-icon-star',
+    ), _rating),
+    FieldRule('image', (
+        '#landingImage',
+        '#imgBlkFront',
+        '#main-image',
+        'img#productImage',
+    ), _image),
+    FieldRule('availability', (
+        '#availability span',
+        '#availability',
+        '.a-color-success',
+    ), _availability),
+    FieldRule('description', (
+        '#feature-bullets ul',
+        '#productDescription',
+        '.a-unordered-list.a-vertical.a-spacing-mini',
+    ), _description),
+    # Containers of the product details sections, read by extract_product_details
+    FieldRule('tech_spec_section', ('#productDetails_techSpec_section_1',), _section('tech_spec_section')),
+    FieldRule('detail_table_section', ('#productDetails_detailBullets_sections1',), _section('detail_table_section')),
+    FieldRule('feature_bullets_section', ('#feature-bullets',), _section('feature_bullets_section')),
+    FieldRule('detail_bullets_section', (
+        '#detailBullets_feature_div',
+        '#detailBulletsWrapper_feature_div',
+    ), _section('detail_bullets_section')),
+])
+# Result keys belonging to a field other than the one they are named after
+RESULT_FIELDS = {'price_text': 'price', 'rating_text': 'rating'}
+DETAIL_SECTIONS = ('tech_spec_section', 'detail_table_section', 'feature_bullets_section', 'detail_bullets_section')
 
 
 class AmazonScraper(BaseScraper):
     """Scraper for Amazon India product pages."""
+
+    PLATFORM = 'amazon'
+
+    # Last-resort location of the main product image
+    IMAGE_XPATH = '/html/body/div[1]/div[1]/div/div[5]/div[3]/div[1]/div[1]/div/div/div[2]/div[1]/div[1]/ul/li[1]/span/span/div/img'
+
+    REGIONS = {
+        'title': ('titleSection', 'title', 'productTitle'),
+        'price': (
+            'corePriceDisplay_desktop_feature_div', 'corePrice_feature_div', 'corePrice_desktop',
+            'apex_desktop', 'priceblock_dealprice', 'priceblock_saleprice', 'priceblock_ourprice',
+        ),
+        'rating': ('averageCustomerReviews', 'acrPopover'),
+        'image': ('imgTagWrapperId', 'landingImage', 'imgBlkFront', 'main-image', 'productImage'),
+        'availability': ('availability',),
+        'description': ('feature-bullets', 'productDescription'),
+        'details': (
+            'productDetails_techSpec_section_1', 'productDetails_detailBullets_sections1',
+            'detailBulletsWrapper_feature_div', 'detailBullets_feature_div',
+        ),
+    }
+    REQUIRED_REGIONS = ('title', 'price')
+    FIELDS = ('title', 'price', 'rating', 'image', 'availability', 'description', 'details')
+    BLOCK_MARKERS = (
+        b'/errors/validateCaptcha',
+        b'api-services-support@amazon.com',
+        b'Type the characters you see in this image',
+    )
+    PROFILES = {
+        # Price polling: everything above the fold that changes between checks
+        'lite': ('title', 'price', 'availability'),
+        'price': ('price',),
+    }
     
-    def scrape(self, url: str) -> Dict:
+    def canonical_url(self, url: str) -> str:
         """
-        Scrape product information from Amazon India.
+        Rebuild an Amazon product URL as ``https://www.amazon.<tld>/dp/<ASIN>``.
+        
+        Tracking parameters, ``/ref=`` segments, title slugs and mobile or
+        bare hosts are dropped, so every link to a product maps to the same
+        lightweight page. URLs without an ASIN are only normalized; non-Amazon
+        hosts (e.g. a local test storefront) keep their scheme and host.
         
         Args:
             url: Amazon product URL
             
         Returns:
-            Dictionary with product information
+            Canonical product URL
         """
-        soup = self.fetch_page(url)
-        
-        # Extract title
-        title = None
-        title_selectors = [
-            '#productTitle',
-            'h1.a-size-large.product-title-word-break',
-            'span#productTitle',
-        ]
-        for selector in title_selectors:
-            title_elem = soup.select_one(selector)
-            if title_elem:
-                title = self.clean_text(title_elem.get_text())
-                break
+        parts = urlsplit(url.strip())
+        match = ASIN_PATH_RE.search(parts.path)
+        asin = match.group(1) if match else None
+        if not asin:
+            query_asin = parse_qs(parts.query).get('asin', [''])[0]
+            asin = query_asin if ASIN_RE.match(query_asin) else None
+        if not asin:
+            return normalize_url(url)
+
+        host = (parts.hostname or '').lower()
+        labels = host.split('.')
+        if 'amazon' in labels:
+            # amazon.in, m.amazon.in, smile.amazon.in ... -> www.amazon.in
+            host = 'www.' + '.'.join(labels[labels.index('amazon'):])
+            scheme = 'https'
+        else:
+            scheme = parts.scheme.lower() or 'https'
+            if parts.port:
+                host = f"{host}:{parts.port}"
+        return f"{scheme}://{host}/dp/{asin.upper()}"
+
+    def warm(self):
+        """
+        Do a first scrape's one-off work ahead of time.
         
-        # Extract price
-        price = None
-        price_text = None
-        price_selectors = [
-            'span.a-price-whole',
-            'span.a-price .a-offscreen',
-            '#priceblock_dealprice',
-            '#priceblock_saleprice',
-            '#priceblock_ourprice',
-            'span.a-color-price',
-        ]
-        for selector in price_selectors:
-            price_elem = soup.select_one(selector)
-            if price_elem:
-                price_text = price_elem.get_text()
-                price = self.extract_price(price_text)
-                if price:
-                    break
+        Loads the parser backend and compiles the product selectors and the
+        XPath used for the image fallback.
+        """
+        dom = super().warm()
+        PRODUCT_PLAN.evaluate(dom)
+        Page('about:blank', WARM_DOCUMENT).tree.xpath(self.IMAGE_XPATH)
+        return dom
+
+    def scrape(self, url: str, profile: Optional[str] = None, fields: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Scrape product information from Amazon India.
         
-        # Extract rating
-        rating = None
-        rating_text = None
-        rating_selectors = [
-            'span.a-icon-alt',
-            '#acrPopover',
-            'span.a-icon.a-icon-star',
-        ]
-        for selector in rating_selectors:
-            rating_elem = soup.select_one(selector)
-            if rating_elem:
-                rating_text = rating_elem.get_text() or rating_elem.get('aria-label', '')
-                rating = self.extract_rating(rating_text)
-                if rating:
-                    break
+        Args:
+            url: Amazon product URL
+            profile: Fetch profile from ``PROFILES``; fields outside the
+                profile may be missing from the result
+            fields: Only extract these fields (see ``FIELDS``)
+            
+        Returns:
+            Dictionary with product information
+        """
+        # Reject unknown fields before downloading anything
+        self.select_fields(fields)
+        return self.extract(self.fetch_page(url, profile), fields)
+
+    def extract(self, page: Page, fields: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Extract product information from a fetched Amazon page.
         
-        # Extract image
-        image = None
-        image_selectors = [
-            '#landingImage',
-            '#imgBlkFront',
-            '#main-image',
-            'img#productImage',
-        ]
-        for selector in image_selectors:
-            img_elem = soup.select_one(selector)
-            if img_elem:
-                image = img_elem.get('src') or img_elem.get('data-src')
-                if image:
-                    break
-
-        # If not found, try XPath (using lxml)
-        if not image:
+        Args:
+            page: Fetched Amazon product page
+            fields: Only extract these fields (default: all of ``FIELDS``);
+                the work for the others is skipped
+            
+        Returns:
+            Dictionary with product information
+        """
+        started = time.perf_counter()
+        # Per-stage timings and selector positions, only collected for metrics
+        timings = hits = None
+        if self.metrics is not None:
+            timings, hits = {}, {}
+        url = page.url
+        wanted = self.select_fields(fields)
+        # Fields embedded as JSON are read straight from the raw bytes;
+        # only the rest go through the DOM selectors
+        values, sources = extract_embedded(page.content, wanted)
+        if timings is not None:
+            timings['embedded'] = time.perf_counter() - started
+        dom_fields = [f for f in PRODUCT_PLAN.fields if f in wanted and f not in sources]
+        if 'details' in wanted:
+            dom_fields.extend(DETAIL_SECTIONS)
+        soup = None
+        if dom_fields:
+            soup = self.parse_dom(page)
+            dom_values = PRODUCT_PLAN.evaluate(soup, fields=dom_fields, hits=hits, timings=timings)
+            for field in dom_fields:
+                if dom_values.get(field) and field not in DETAIL_SECTIONS:
+                    sources[field] = 'dom'
+            values.update(dom_values)
+        image = values.get('image')
+
+        # If not found, try XPath on the lxml view of the same download
+        if not image and 'image' in wanted:
             try:
-                from lxml import html
-                import requests
-                # Fetch page raw content
-                response = self.session.get(url, timeout=10)
-                response.raise_for_status()
-                tree = html.fromstring(response.content)
-                xpath = '/html/body/div[1]/div[1]/div/div[5]/div[3]/div[1]/div[1]/div/div/div[2]/div[1]/div[1]/ul/li[1]/span/span/div/img'
-                img_node = tree.xpath(xpath)
+                img_node = page.tree.xpath(self.IMAGE_XPATH)
                 if img_node and hasattr(img_node[0], 'attrib'):
                     image = img_node[0].attrib.get('src', '')
+                    if image:
+                        sources['image'] = 'xpath'
             except Exception:
                 image = ''
-        
-        # Extract availability
-        availability = "In Stock"
-        availability_selectors = [
-            '#availability span',
-            '#availability',
-            '.a-color-success',
-        ]
-        for selector in availability_selectors:
-            avail_elem = soup.select_one(selector)
-            if avail_elem:
-                availability = self.clean_text(avail_elem.get_text())
-                if availability:
-                    break
-        
-        # Extract description
-        description = None
-        description_selectors = [
-            '#feature-bullets ul',
-            '#productDescription',
-            '.a-unordered-list.a-vertical.a-spacing-mini',
-        ]
-        for selector in description_selectors:
-            desc_elem = soup.select_one(selector)
-            if desc_elem:
-                # Get first few bullet points or paragraphs
-                items = desc_elem.find_all(['li', 'p'], limit=3)
-                if items:
-                    description = ' | '.join([self.clean_text(item.get_text()) for item in items])
-                    break
-        
-        return {
-            'title': title or 'N/A',
-            'price': price,
-            'price_text': price_text or 'N/A',
-            'rating': rating,
-            'rating_text': rating_text or 'N/A',
+
+        # Use single extractor to avoid duplicate keys
+        details = {}
+        if 'details' in wanted:
+            details_started = time.perf_counter()
+            details = self.extract_product_details(soup, values)
+            if timings is not None:
+                timings['details'] = time.perf_counter() - details_started
+
+        result = {
+            'title': values.get('title') or 'N/A',
+            'price': values.get('price'),
+            'price_text': values.get('price_text') or 'N/A',
+            'rating': values.get('rating'),
+            'rating_text': values.get('rating_text') or 'N/A',
             'image': image or '',
-            'availability': availability or 'N/A',
-            'description': description or 'N/A',
-            # Use single extractor to avoid duplicate keys
-            'details': self.extract_product_details(soup),
+            'availability': values.get('availability', 'In Stock') or 'N/A',
+            'description': values.get('description') or 'N/A',
+            'details': details,
             'url': url,
         }
+        # Which path produced each field (an embedded JSON source, 'dom' or
+        # 'xpath') is reported to metrics, not returned
+        self.record_extract(started, timings, hits, sources)
+        if fields is None:
+            return result
+        return {k: v for k, v in result.items() if RESULT_FIELDS.get(k, k) in wanted or k == 'url'}
 
     def clean_detail_pair(self, raw_key: str, raw_val: str):
         """
         Normalize and clean a raw key/value pair scraped from Amazon detail sections.
         Returns (key, value) where empty strings may be returned if nothing usable.
         """
-        def normalize(s: str) -> str:
-            if not s:
-                return ''
-            # Remove common invisible unicode markers and normalize whitespace
-            s = s.replace('\u200f', '').replace('\u200e', '').replace('\u202a', '').replace('\u202c', '')
-            s = re.sub(r'\s+', ' ', s)
-            return s.strip()
-
         k = normalize(raw_key)
         v = normalize(raw_val)
 
@@ -170,15 +314,10 @@ class AmazonScraper(BaseScraper):
             k = k[:-1].strip()
 
         # Remove repeated key text from value (leading or trailing)
-        try:
-            if k:
-                key_esc = re.escape(k)
-                # trailing occurrences like ": Key" or ": Key :"
-                v = re.sub(r':\s*' + key_esc + r'\s*:??$', '', v, flags=re.I).strip()
-                # leading occurrences like "Key :" at start
-                v = re.sub(r'^' + key_esc + r'\s*:??\s*', '', v, flags=re.I).strip()
-        except Exception:
-            pass
+        if k:
+            trailing, leading = _key_patterns(k)
+            v = trailing.sub('', v).strip()
+            v = leading.sub('', v).strip()
 
         # Final cleanup
         k = k.strip()
@@ -189,11 +328,24 @@ class AmazonScraper(BaseScraper):
 
         return k, v
 
-    def extract_product_details(self, soup):
+    def extract_product_details(self, soup, sections=None):
+        """
+        Collect key/value pairs and bullet points from the product details sections.
+
+        Args:
+            soup: Parsed product page
+            sections: Section containers already located by ``PRODUCT_PLAN``
+                (looked up in one pass over ``soup`` if not given)
+
+        Returns:
+            Dictionary of detail key/value pairs, plus "Key Features" bullets
+        """
+        if sections is None:
+            sections = PRODUCT_PLAN.evaluate(soup, fields=DETAIL_SECTIONS)
         details = {}
 
         # 1. Product Information table (common)
-        product_info = soup.select_one("#productDetails_techSpec_section_1")
+        product_info = sections.get('tech_spec_section')
         if product_info:
             rows = product_info.select("tr")
             for row in rows:
@@ -207,7 +359,7 @@ class AmazonScraper(BaseScraper):
                         details[k] = v
 
         # 2. Alternate product details table
-        alt_info = soup.select_one("#productDetails_detailBullets_sections1")
+        alt_info = sections.get('detail_table_section')
         if alt_info:
             rows = alt_info.select("tr")
             for row in rows:
@@ -228,14 +380,15 @@ class AmazonScraper(BaseScraper):
         bullet_points = []
 
         # feature-bullets (simple bullets)
-        bullets = soup.select("#feature-bullets ul li span")
+        feature_bullets = sections.get('feature_bullets_section')
+        bullets = feature_bullets.select("ul li span") if feature_bullets else []
         for b in bullets:
             t = b.get_text(strip=True)
             if t:
                 bullet_points.append(t)
 
         # detailBullets block (key/value list items)
-        detail_block = soup.select_one("#detailBullets_feature_div") or soup.select_one("#detailBulletsWrapper_feature_div")
+        detail_block = sections.get('detail_bullets_section')
         if detail_block:
             lis = detail_block.select("ul.detail-bullet-list > li") or detail_block.select("ul li")
             for li in lis:
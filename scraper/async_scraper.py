@@ -0,0 +1,144 @@
+"""Asyncio scraping engine for running many fetches on one event loop."""
+
+import asyncio
+from concurrent.futures import Executor
+import time
+from typing import Dict, Iterable, Optional
+import httpx
+from .base_scraper import BaseScraper
+from .page import Page
+from .retry import FetchError
+from .streaming import CHUNK_SIZE, RegionWatcher
+
+
+def create_client(max_connections: int = 200, max_keepalive: int = 50, timeout: float = 10.0) -> httpx.AsyncClient:
+    """
+    Create the HTTP client shared by all async scrapers.
+
+    Args:
+        max_connections: Maximum concurrent connections across all hosts
+        max_keepalive: Idle keep-alive connections to retain
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Configured ``httpx.AsyncClient``
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+        timeout=timeout,
+        follow_redirects=True,
+    )
+
+
+class AsyncScraper:
+    """
+    Async front end for a ``BaseScraper``.
+
+    Pages are downloaded with a shared ``httpx.AsyncClient``, so a single
+    event loop can keep hundreds of fetches in flight. Extraction is CPU
+    bound and runs the wrapped scraper's ``extract`` in ``parse_executor``,
+    which bounds how many pages are parsed at once without blocking the loop.
+    """
+
+    def __init__(self, scraper: BaseScraper, client: httpx.AsyncClient, parse_executor: Optional[Executor] = None):
+        self.scraper = scraper
+        self.client = client
+        self.parse_executor = parse_executor
+
+    async def fetch_page(self, url: str, profile: Optional[str] = None) -> Page:
+        """
+        Fetch a web page without blocking the event loop.
+
+        Args:
+            url: URL to fetch
+            profile: Fetch profile of the wrapped scraper (see
+                ``BaseScraper.PROFILES``); the body is streamed and reading
+                stops once the profile's regions are in
+
+        Returns:
+            Page wrapping the downloaded HTML
+
+        Raises:
+            FetchError: If the download still fails after the wrapped
+                scraper's retry policy's attempts
+            Throttled: If the site throttled the request (``BlockedError``
+                if it answered with a captcha page)
+        """
+        scraper = self.scraper
+        groups = scraper.profile_regions(profile)
+        stored = None
+        if scraper.page_store is not None:
+            # Reading and decompressing the stored copy is blocking work
+            loop = asyncio.get_running_loop()
+            stored = await loop.run_in_executor(None, scraper.stored_page, url)
+        if stored is not None and (scraper.offline or scraper.page_store.is_fresh(stored)):
+            return stored.to_page(scraper.parser)
+        started = time.perf_counter()
+        try:
+            page = await scraper.retry_policy.call_async(
+                scraper.host(url), lambda: self._fetch_once(url, groups, stored), lambda: scraper.permit(url),
+            )
+        except Exception as e:
+            scraper.record_fetch(started, e)
+            raise
+        scraper.record_fetch(started)
+        return page
+
+    async def _fetch_once(self, url: str, groups, stored) -> Page:
+        """One download attempt of ``fetch_page`` (the retry policy holds its rate limiter permit)."""
+        scraper = self.scraper
+        policy = scraper.retry_policy
+        timeout = httpx.Timeout(policy.read_timeout, connect=policy.connect_timeout)
+        watcher = None
+        try:
+            if groups is None:
+                response = await self.client.get(url, headers=scraper.request_headers(stored), timeout=timeout)
+                scraper.check_throttled(url, response)
+                if response.status_code != 304:
+                    response.raise_for_status()
+            else:
+                async with self.client.stream(
+                    'GET', url, headers=scraper.request_headers(stored), timeout=timeout,
+                ) as response:
+                    scraper.check_throttled(url, response)
+                    if response.status_code != 304:
+                        response.raise_for_status()
+                        watcher = RegionWatcher(groups)
+                        # Parsing a chunk takes about a millisecond; keep it off the loop
+                        loop = asyncio.get_running_loop()
+                        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                            if await loop.run_in_executor(None, watcher.feed, chunk):
+                                break
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            raise FetchError(f"Failed to fetch page: {str(e)}", status, retriable=status >= 500)
+        except httpx.TransportError as e:
+            # Connect/read timeouts, refused or dropped connections
+            raise FetchError(f"Failed to fetch page: {str(e) or type(e).__name__}", retriable=True)
+        except httpx.HTTPError as e:
+            raise FetchError(f"Failed to fetch page: {str(e)}")
+        if scraper.page_store is None:
+            return scraper.page_from_response(url, response, stored, watcher)
+        # Compressing and writing the body to the store is blocking work
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.parse_executor, scraper.page_from_response, url, response, stored, watcher,
+        )
+
+    async def scrape(self, url: str, profile: Optional[str] = None, fields: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Scrape product information from the given URL.
+
+        Args:
+            url: Product URL to scrape
+            profile: Fetch profile (see ``fetch_page``)
+            fields: Only extract these fields (see ``BaseScraper.FIELDS``)
+
+        Returns:
+            Dictionary with product information, same as ``scraper.scrape``
+        """
+        # Reject unknown fields before downloading anything
+        self.scraper.select_fields(fields)
+        page = await self.fetch_page(url, profile)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_executor, self.scraper.extract, page, fields)
@@ -1,39 +1,112 @@
 """Base scraper class with common utilities."""
 
 from abc import ABC, abstractmethod
-import re
-from typing import Dict, Optional
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
 import requests
-from bs4 import BeautifulSoup
+from . import textnorm
+from .page import Page, PARSERS
+from .metrics import ScraperMetrics
+from .page_store import PageStore, StoredPage
+from .ratelimit import THROTTLE_STATUSES, BlockedError, Permit, RateLimiter, Throttled, retry_after_seconds
+from .retry import Cancellation, FetchError, RetryPolicy
+from .session_pool import SessionPool
+from .streaming import CHUNK_SIZE, RegionWatcher
+from .urls import normalize_url
+
+# Parsed by ``warm`` to load the parser backend before the first real page
+WARM_DOCUMENT = b'<html><head><title></title></head><body><div id="warm"></div></body></html>'
 
 
 class BaseScraper(ABC):
     """Abstract base class for all scrapers."""
     
+    # Platform name, used as the metrics label
+    PLATFORM = ''
+
     # Common user agents to avoid blocking
     USER_AGENTS = [
         'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
     ]
+
+    # Parser backend used for fetched pages (one of page.PARSERS). Subclasses
+    # may override it; the SCRAPER_PARSER env var overrides it for all scrapers.
+    PARSER = 'html.parser'
+
+    # Element ids holding each extracted field, used by region parsing to
+    # build only those subtrees of the page. If none of the ids for a field
+    # in REQUIRED_REGIONS is present, the full page is parsed instead.
+    REGIONS: Dict[str, Tuple[str, ...]] = {}
+    REQUIRED_REGIONS: Tuple[str, ...] = ()
+
+    # Fields the scraper extracts; callers may ask for a subset to skip the
+    # work for the rest
+    FIELDS: Tuple[str, ...] = ()
+
+    # Fetch profiles: name -> fields (keys of REGIONS) a caller needs. A page
+    # fetched with a profile is streamed and the download stops as soon as
+    # each of those fields' regions has been received.
+    PROFILES: Dict[str, Tuple[str, ...]] = {}
+
+    # Byte strings only found on the site's captcha / robot check pages, and
+    # how far into a body to look for them. Block pages are a few KB, so a
+    # product page is never scanned in full (and text deep in its reviews
+    # cannot trigger a false positive).
+    BLOCK_MARKERS: Tuple[bytes, ...] = ()
+    BLOCK_SCAN_BYTES = 64 * 1024
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    def __init__(
+        self,
+        parser: Optional[str] = None,
+        region_parsing: Optional[bool] = None,
+        session_pool: Optional[SessionPool] = None,
+        page_store: Optional[PageStore] = None,
+        offline: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        metrics: Optional[ScraperMetrics] = None,
+    ):
+        self.parser = parser or os.getenv('SCRAPER_PARSER') or self.PARSER
+        if self.parser not in PARSERS:
+            raise ValueError(f"Unknown parser backend: {self.parser}. Supported: {list(PARSERS)}")
+        if region_parsing is None:
+            region_parsing = os.getenv('SCRAPER_REGION_PARSING', '').lower() in ('1', 'true', 'yes')
+        self.region_parsing = region_parsing and bool(self.REGIONS)
+        # Sessions are borrowed per request so scrapers can be shared by threads
+        self.session_pool = session_pool or SessionPool()
+        # Downloaded pages are written to (and revalidated against) the store;
+        # offline scrapers only ever read from it
+        self.page_store = page_store
+        self.offline = offline
+        if offline and page_store is None:
+            raise ValueError("Offline scraping requires a page store")
+        # Shared per-host rate and concurrency limits (None: unlimited)
+        self.rate_limiter = rate_limiter
+        # Timeouts, retries and hedging of page downloads
+        self.retry_policy = retry_policy or RetryPolicy()
+        # Stage timings and counters (None: not measured)
+        self.metrics = metrics
+        self.headers = {
             'User-Agent': self.USER_AGENTS[0],
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
-        })
+        }
     
     @abstractmethod
-    def scrape(self, url: str) -> Dict:
+    def scrape(self, url: str, profile: Optional[str] = None, fields: Optional[Iterable[str]] = None) -> Dict:
         """
         Scrape product information from the given URL.
         
         Args:
             url: Product URL to scrape
+            profile: Fetch profile from ``PROFILES`` (default: full page)
+            fields: Only extract these fields from ``FIELDS`` (default: all)
             
         Returns:
             Dictionary with product information (title, price, rating, image, availability, description)
@@ -42,26 +115,329 @@ class BaseScraper(ABC):
             Exception: If scraping fails
         """
         pass
+
+    def extract(self, page: Page, fields: Optional[Iterable[str]] = None) -> Dict:
+        """
+        Extract product information from an already fetched page.
+        
+        Args:
+            page: Page returned by ``fetch_page`` (or built from stored HTML)
+            fields: Only extract these fields from ``FIELDS`` (default: all)
+            
+        Returns:
+            Dictionary with product information, same shape as ``scrape``
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support extraction from a fetched page")
     
-    def fetch_page(self, url: str) -> BeautifulSoup:
+    def canonical_url(self, url: str) -> str:
+        """
+        Reduce a product URL to the canonical form used for fetching, caching
+        and history, so different links to the same product share them.
+        
+        Args:
+            url: Product URL as given by the user
+            
+        Returns:
+            Canonical product URL
         """
-        Fetch and parse a web page.
+        return normalize_url(url)
+
+    def fetch_page(self, url: str, profile: Optional[str] = None) -> Page:
+        """
+        Fetch a web page.
         
         Args:
             url: URL to fetch
+            profile: Name of a fetch profile in ``PROFILES``; the body is
+                streamed and reading stops once the profile's regions are in
             
         Returns:
-            BeautifulSoup object of the parsed HTML
+            Page wrapping the downloaded HTML; ``page.soup`` and ``page.tree``
+            are parsed lazily from the same download
             
         Raises:
-            requests.RequestException: If the request fails
+            FetchError: If the download still fails after the retry policy's
+                attempts
+            Throttled: If the site throttled the request (``BlockedError``
+                if it answered with a captcha page)
         """
+        groups = self.profile_regions(profile)
+        stored = self.stored_page(url)
+        if stored is not None and (self.offline or self.page_store.is_fresh(stored)):
+            return stored.to_page(self.parser)
+        started = time.perf_counter()
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
+            page = self.retry_policy.call(
+                self.host(url),
+                lambda cancellation: self._fetch_once(url, groups, stored, cancellation),
+                lambda: self.permit(url),
+            )
+        except Exception as e:
+            self.record_fetch(started, e)
+            raise
+        self.record_fetch(started)
+        return page
+
+    def _fetch_once(self, url: str, groups, stored: Optional[StoredPage], cancellation: Cancellation) -> Page:
+        """
+        One download attempt of ``fetch_page``.
+        
+        The retry policy runs it under its own rate limiter permit. The body is always streamed, so an attempt that loses a hedge race
+        stops reading as soon as ``cancellation`` closes its response.
+        """
+        timeout = self.retry_policy.timeout
+        try:
+            with self.session_pool.session() as session, cancellation:
+                with session.get(url, headers=self.request_headers(stored), timeout=timeout, stream=True) as response:
+                    cancellation.on_cancel(response.close)
+                    self.check_throttled(url, response)
+                    response.raise_for_status()
+                    if groups is None or response.status_code == 304:
+                        return self.page_from_response(url, response, stored)
+                    watcher = RegionWatcher(groups)
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        if watcher.feed(chunk):
+                            break
+                    return self.page_from_response(url, response, stored, watcher)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            raise FetchError(f"Failed to fetch page: {str(e)}", status, retriable=bool(status and status >= 500))
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            raise FetchError(f"Failed to fetch page: {str(e)}", retriable=True)
         except requests.RequestException as e:
-            raise Exception(f"Failed to fetch page: {str(e)}")
+            raise FetchError(f"Failed to fetch page: {str(e)}")
+
+    def record_fetch(self, started: float, error: Optional[BaseException] = None):
+        """Report a download's duration (from ``started``, a perf_counter time) or failure to ``metrics``."""
+        if self.metrics is None:
+            return
+        if error is None:
+            self.metrics.fetch_seconds.labels(self.PLATFORM).observe(time.perf_counter() - started)
+            return
+        if isinstance(error, BlockedError):
+            reason = 'blocked'
+        elif isinstance(error, Throttled):
+            reason = 'throttled'
+        elif isinstance(error, FetchError):
+            reason = 'http' if error.status_code else 'network'
+        else:
+            reason = 'error'
+        self.metrics.fetch_failures.labels(self.PLATFORM, reason).inc()
+
+    def record_extract(
+        self,
+        started: float,
+        timings: Optional[Dict[str, float]] = None,
+        hits: Optional[Dict[str, int]] = None,
+        sources: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Report an extraction to ``metrics``.
+        
+        Args:
+            started: ``time.perf_counter()`` when extraction began
+            timings: Seconds per field or stage
+            hits: Index of the selector that produced each field
+            sources: Source that produced each field
+        """
+        metrics = self.metrics
+        if metrics is None:
+            return
+        platform = self.PLATFORM
+        metrics.extract_seconds.labels(platform).observe(time.perf_counter() - started)
+        for field, seconds in (timings or {}).items():
+            metrics.field_seconds.labels(platform, field).observe(seconds)
+        for field, index in (hits or {}).items():
+            metrics.selector_hits.labels(platform, field, str(index)).inc()
+        for field, source in (sources or {}).items():
+            metrics.field_sources.labels(platform, field, source).inc()
+
+    @staticmethod
+    def host(url: str) -> str:
+        """Lowercased host name of a URL, the key for per-host limits and latencies."""
+        return (urlsplit(url).hostname or '').lower()
+
+    def permit(self, url: str) -> Permit:
+        """Rate limiter permit for one request to the URL's host (a no-op without a limiter)."""
+        return Permit(self.rate_limiter, self.host(url))
+
+    @staticmethod
+    def check_throttled(url: str, response):
+        """
+        Raise ``Throttled`` for a 429/503 response.
+        
+        Raises:
+            Throttled: With the response's Retry-After, if any
+        """
+        if response.status_code in THROTTLE_STATUSES:
+            raise Throttled(
+                f"Throttled by {urlsplit(url).hostname} (HTTP {response.status_code})",
+                retry_after_seconds(response.headers),
+            )
+
+    def is_blocked(self, content: bytes) -> bool:
+        """Whether a page body is a captcha or robot check instead of the product."""
+        end = self.BLOCK_SCAN_BYTES
+        return any(content.find(marker, 0, end) != -1 for marker in self.BLOCK_MARKERS)
+
+    def select_fields(self, fields: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        """
+        Validate a field selection.
+        
+        Args:
+            fields: Requested field names, or None for all
+            
+        Returns:
+            The requested fields without duplicates, or ``FIELDS`` for None
+            
+        Raises:
+            ValueError: If a field is not in ``FIELDS``
+        """
+        if fields is None:
+            return self.FIELDS
+        fields = tuple(dict.fromkeys(fields))
+        unknown = [f for f in fields if f not in self.FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {unknown}. Supported: {list(self.FIELDS)}")
+        return fields
+
+    def profile_regions(self, profile: Optional[str]) -> Optional[List[Tuple[str, ...]]]:
+        """
+        Region id groups a fetch profile waits for.
+        
+        Args:
+            profile: Profile name, or None for a full download
+            
+        Returns:
+            One tuple of element ids per field, or None for a full download
+            
+        Raises:
+            ValueError: If the profile is unknown
+        """
+        if profile is None:
+            return None
+        if profile not in self.PROFILES:
+            raise ValueError(f"Unknown fetch profile: {profile}. Supported: {list(self.PROFILES)}")
+        return [self.REGIONS[field] for field in self.PROFILES[profile]]
+
+    def stored_page(self, url: str) -> Optional[StoredPage]:
+        """
+        Look up the stored copy of a page.
+        
+        Args:
+            url: Page URL
+            
+        Returns:
+            StoredPage, or None without a store or stored copy
+            
+        Raises:
+            Exception: If offline and the page was never stored
+        """
+        if self.page_store is None:
+            return None
+        stored = self.page_store.get(url)
+        if stored is None and self.offline:
+            raise Exception(f"Page not in store (offline mode): {url}")
+        return stored
+
+    def request_headers(self, stored: Optional[StoredPage] = None) -> Dict[str, str]:
+        """Request headers, made conditional on a stored copy's validators."""
+        headers = self.headers
+        if stored is not None and (stored.etag or stored.last_modified):
+            headers = dict(headers)
+            if stored.etag:
+                headers['If-None-Match'] = stored.etag
+            if stored.last_modified:
+                headers['If-Modified-Since'] = stored.last_modified
+        return headers
+
+    def page_from_response(
+        self,
+        url: str,
+        response,
+        stored: Optional[StoredPage] = None,
+        watcher: Optional[RegionWatcher] = None,
+    ) -> Page:
+        """
+        Turn a successful response into a Page, keeping the store up to date.
+        
+        A 304 Not Modified serves the stored copy; any other complete body is
+        written to the store, unless it is a captcha page, which raises
+        ``BlockedError`` before anything parses it. With a ``watcher`` the page holds the streamed
+        bytes it read; a page cut short is marked ``truncated`` and never
+        stored.
+        """
+        if response.status_code == 304 and stored is not None:
+            self.page_store.touch(url)
+            return stored.to_page(self.parser)
+        if watcher is None:
+            page = Page.from_response(response, url=url, parser=self.parser)
+        else:
+            page = Page.from_response(
+                response, url=url, parser=self.parser, content=watcher.content, truncated=watcher.done,
+            )
+        if self.metrics is not None:
+            self.metrics.fetch_bytes.labels(self.PLATFORM).inc(len(page.content))
+        if self.is_blocked(page.content):
+            raise BlockedError(f"Blocked by {urlsplit(url).hostname} (captcha page)")
+        if self.page_store is not None and not page.truncated:
+            self.page_store.put(
+                url,
+                page.content,
+                encoding=page.encoding,
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+            )
+        return page
+
+    def parse_dom(self, page: Page):
+        """
+        Parse a page for extraction.
+        
+        With region parsing enabled only the elements listed in ``REGIONS``
+        are parsed, falling back to the full page when a required region is
+        missing. A streamed page cut short after its profile's regions
+        (``page.truncated``) is always parsed this way, so its fields come
+        from those regions and not from whatever else happened to arrive
+        before the stream stopped.
+        
+        Args:
+            page: Fetched page
+            
+        Returns:
+            Document root for the configured parser backend
+        """
+        if self.metrics is None:
+            return self._parse_dom(page)
+        started = time.perf_counter()
+        dom = self._parse_dom(page)
+        self.metrics.parse_seconds.labels(self.PLATFORM).observe(time.perf_counter() - started)
+        return dom
+
+    def _parse_dom(self, page: Page):
+        if not (self.region_parsing or (page.truncated and self.REGIONS)):
+            return page.dom
+        ids = [i for region_ids in self.REGIONS.values() for i in region_ids]
+        region = page.regions(ids)
+        if region is None:
+            return page.dom
+        for field in self.REQUIRED_REGIONS:
+            if not region.found_regions.intersection(self.REGIONS[field]):
+                return page.dom
+        return region.dom
+
+    def warm(self):
+        """
+        Do the one-off work of a first scrape ahead of time.
+        
+        Parses a tiny document so the parser backend (bs4 or lxml) is
+        imported; nothing is fetched.
+        
+        Returns:
+            Document root of the tiny document, for subclasses to warm
+            their selectors on
+        """
+        return Page('about:blank', WARM_DOCUMENT, parser=self.parser).dom
     
     @staticmethod
     def clean_text(text: Optional[str]) -> str:
@@ -74,11 +450,7 @@ class BaseScraper(ABC):
         Returns:
             Cleaned text string
         """
-        if not text:
-            return ""
-        # Remove extra whitespace and newlines
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        return textnorm.clean_text(text)
     
     @staticmethod
     def extract_price(price_text: Optional[str]) -> Optional[float]:
@@ -86,20 +458,12 @@ class BaseScraper(ABC):
         Extract numeric price from text.
         
         Args:
-            price_text: Price string (e.g., "₹1,299.00" or "$29.99")
+            price_text: Price string (e.g., "₹1,29,999.00" or "$29.99")
             
         Returns:
             Float price value or None if not found
         """
-        if not price_text:
-            return None
-        
-        # Remove currency symbols and commas
-        price_clean = re.sub(r'[^\d.]', '', price_text)
-        try:
-            return float(price_clean)
-        except ValueError:
-            return None
+        return textnorm.parse_price(price_text)
     
     @staticmethod
     def extract_rating(rating_text: Optional[str]) -> Optional[float]:
@@ -112,19 +476,4 @@ class BaseScraper(ABC):
         Returns:
             Float rating value or None if not found
         """
-        if not rating_text:
-            return None
-        
-        # Extract first decimal number
-        match = re.search(r'(\d+\.?\d*)', rating_text)
-        if match:
-            try:
-                rating = float(match.group(1))
-                # Normalize to 0-5 scale if needed
-                if rating > 5:
-                    rating = rating / 10
-                return rating
-            except ValueError:
-                return None
-        return None
-
+        return textnorm.parse_rating(rating_text)
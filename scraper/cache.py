@@ -0,0 +1,131 @@
+"""Scrape result caching and request coalescing."""
+
+import asyncio
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+from .urls import normalize_url
+
+
+def cache_key(
+    platform: str,
+    url: str,
+    profile: Optional[str] = None,
+    fields: Optional[Iterable[str]] = None,
+) -> Tuple:
+    """Cache key for a product: (platform, normalized URL, fetch profile, sorted fields)."""
+    return platform.lower(), normalize_url(url), profile, tuple(sorted(fields)) if fields is not None else None
+
+
+class ResultCache:
+    """
+    Thread-safe in-memory cache with a TTL per entry and LRU eviction once
+    ``maxsize`` entries are stored. A ``ttl`` or ``maxsize`` of 0 disables
+    caching.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Store a value, evicting the least recently used entries if full.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent async calls with the same key.
+
+    The first caller starts the work as a task; callers arriving while it is
+    still running wait for that task instead of starting their own. The task
+    is shielded, so a caller disconnecting does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` once per key at a time.
+
+        Args:
+            key: Identity of the work
+            fn: Coroutine function producing the result
+
+        Returns:
+            (result, shared) where ``shared`` is True if the result came from
+            a call started by another caller
+        """
+        task = self._inflight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None)
+        return await asyncio.shield(task), shared
+
+    def stats(self) -> Dict:
+        return {'in_flight': len(self._inflight), 'coalesced': self.coalesced}
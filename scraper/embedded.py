@@ -0,0 +1,189 @@
+"""Product data embedded in page source as JSON, read without building a DOM."""
+
+import html
+import json
+import re
+from typing import Any, Callable, Dict, Optional, Tuple
+from .textnorm import clean_text, parse_price
+
+
+JSON_LD_RE = re.compile(rb'<script[^>]*application/ld\+json[^>]*>(.*?)</script>', re.S | re.I)
+A_STATE_RE = re.compile(rb'<script[^>]*data-a-state=(["\'])(.*?)\1[^>]*>(.*?)</script>', re.S)
+TWISTER_PRICE_RE = re.compile(rb'<div[^>]*twister-plus-buying-options-price-data[^>]*>(.*?)</div>', re.S)
+HIRES_RE = re.compile(rb'"hiRes"\s*:\s*"(https?://[^"]+)"')
+
+# schema.org ItemAvailability values, as Amazon words them on the page
+AVAILABILITY = {
+    'InStock': 'In Stock',
+    'InStoreOnly': 'In Stock',
+    'OnlineOnly': 'In Stock',
+    'LimitedAvailability': 'In Stock',
+    'OutOfStock': 'Currently unavailable',
+    'SoldOut': 'Currently unavailable',
+    'Discontinued': 'Currently unavailable',
+    'PreOrder': 'Pre-order',
+    'BackOrder': 'Temporarily out of stock',
+}
+
+
+def _loads(data: bytes) -> Any:
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+
+def _first(value: Any) -> Any:
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _find_product(data: Any) -> Optional[Dict]:
+    """Find the schema.org Product object in a JSON-LD document."""
+    if isinstance(data, list):
+        for item in data:
+            product = _find_product(item)
+            if product:
+                return product
+        return None
+    if not isinstance(data, dict):
+        return None
+    types = data.get('@type')
+    if types == 'Product' or (isinstance(types, list) and 'Product' in types):
+        return data
+    return _find_product(data.get('@graph'))
+
+
+def json_ld(content: bytes) -> Dict[str, Any]:
+    """Product fields from a schema.org Product in a JSON-LD script."""
+    if b'application/ld+json' not in content:
+        return {}
+    for match in JSON_LD_RE.finditer(content):
+        product = _find_product(_loads(match.group(1)))
+        if product:
+            break
+    else:
+        return {}
+
+    values: Dict[str, Any] = {}
+    if product.get('name'):
+        values['title'] = clean_text(html.unescape(str(product['name'])))
+    image = _first(product.get('image'))
+    if isinstance(image, dict):
+        image = image.get('url')
+    if image:
+        values['image'] = image
+    offer = _first(product.get('offers'))
+    if isinstance(offer, dict):
+        price = offer.get('price', offer.get('lowPrice'))
+        price_value = parse_price(str(price)) if price is not None else None
+        if price_value:
+            values['price'] = price_value
+            values['price_text'] = str(price)
+        availability = str(offer.get('availability') or '').rstrip('/').rsplit('/', 1)[-1]
+        if availability in AVAILABILITY:
+            values['availability'] = AVAILABILITY[availability]
+    rating = product.get('aggregateRating')
+    if isinstance(rating, dict) and rating.get('ratingValue') is not None:
+        try:
+            values['rating'] = float(rating['ratingValue'])
+            values['rating_text'] = f"{rating['ratingValue']} out of {rating.get('bestRating', 5)} stars"
+        except (TypeError, ValueError):
+            pass
+    return values
+
+
+def a_state(content: bytes) -> Dict[str, Any]:
+    """Product fields from ``data-a-state`` script blobs."""
+    if b'data-a-state' not in content:
+        return {}
+    values: Dict[str, Any] = {}
+    for match in A_STATE_RE.finditer(content):
+        state = _loads(html.unescape(match.group(2).decode('utf-8', 'replace')))
+        if not isinstance(state, dict) or state.get('key') != 'desktop-landing-image-data':
+            continue
+        data = _loads(match.group(3))
+        if isinstance(data, dict) and data.get('landingImageUrl'):
+            values['image'] = data['landingImageUrl']
+            break
+    return values
+
+
+def twister(content: bytes) -> Dict[str, Any]:
+    """Product fields from the twister (variation selector) price and image data."""
+    values: Dict[str, Any] = {}
+    match = TWISTER_PRICE_RE.search(content) if b'twister-plus-buying-options-price-data' in content else None
+    if match:
+        options = _loads(html.unescape(match.group(1).decode('utf-8', 'replace')))
+        if isinstance(options, dict):
+            # Either a plain list or grouped by buying option ({"desktop_buybox_group_1": [...]})
+            options = next(iter(options.values()), None)
+        option = _first(options)
+        if isinstance(option, dict) and option.get('priceAmount'):
+            try:
+                values['price'] = float(option['priceAmount'])
+                values['price_text'] = option.get('displayPrice') or str(option['priceAmount'])
+            except (TypeError, ValueError):
+                pass
+    match = HIRES_RE.search(content) if b'"hiRes"' in content else None
+    if match:
+        values['image'] = match.group(1).decode('utf-8', 'replace')
+    return values
+
+
+# Sources in the order they are tried
+SOURCES: Dict[str, Callable[[bytes], Dict[str, Any]]] = {
+    'twister': twister,
+    'a-state': a_state,
+    'json-ld': json_ld,
+}
+
+# Output keys filled together with each field
+FIELD_KEYS = {
+    'title': ('title',),
+    'price': ('price', 'price_text'),
+    'rating': ('rating', 'rating_text'),
+    'image': ('image',),
+    'availability': ('availability',),
+}
+
+# Source preference per field
+FIELD_SOURCES = {
+    'title': ('json-ld',),
+    'price': ('twister', 'json-ld'),
+    'rating': ('json-ld',),
+    'image': ('a-state', 'twister', 'json-ld'),
+    'availability': ('json-ld',),
+}
+
+
+def extract_embedded(content: bytes, fields=None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Read product fields from JSON embedded in a raw page.
+
+    Each source is scanned at most once, and only if a wanted field can
+    come from it.
+
+    Args:
+        content: Raw page body
+        fields: Fields wanted (default: every field in ``FIELD_SOURCES``)
+
+    Returns:
+        (values, sources): output keys found, and the source that produced
+        each field
+    """
+    fields = FIELD_SOURCES if fields is None else [f for f in fields if f in FIELD_SOURCES]
+    scanned: Dict[str, Dict[str, Any]] = {}
+    values: Dict[str, Any] = {}
+    sources: Dict[str, str] = {}
+    for field in fields:
+        for source in FIELD_SOURCES[field]:
+            if source not in scanned:
+                scanned[source] = SOURCES[source](content)
+            found = scanned[source]
+            if found.get(field):
+                for key in FIELD_KEYS[field]:
+                    if key in found:
+                        values[key] = found[key]
+                sources[field] = source
+                break
+    return values, sources
@@ -1,18 +1,22 @@
 """Flipkart scraper implementation (placeholder)."""
 
-from typing import Dict
+from typing import Dict, Iterable, Optional
 from .base_scraper import BaseScraper
 
 
 class FlipkartScraper(BaseScraper):
     """Scraper for Flipkart product pages (coming soon)."""
+
+    PLATFORM = 'flipkart'
     
-    def scrape(self, url: str) -> Dict:
+    def scrape(self, url: str, profile: Optional[str] = None, fields: Optional[Iterable[str]] = None) -> Dict:
         """
         Placeholder scraper for Flipkart.
         
         Args:
             url: Flipkart product URL
+            profile: Fetch profile (unused)
+            fields: Fields to extract (unused)
             
         Returns:
             Error response indicating coming soon
@@ -0,0 +1,128 @@
+"""BeautifulSoup-compatible wrapper around lxml.html elements."""
+
+from functools import lru_cache
+from typing import Iterator, List, Optional, Sequence, Union
+
+
+# Tags whose text BeautifulSoup leaves out of a parent's get_text()
+NON_TEXT_TAGS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+
+
+@lru_cache(maxsize=256)
+def compile_css(selector: str):
+    """
+    Translate a CSS selector to a compiled XPath expression (cached).
+
+    Args:
+        selector: CSS selector string
+
+    Returns:
+        ``lxml.etree.XPath`` evaluating the selector
+    """
+    try:
+        from lxml.cssselect import CSSSelector
+    except ImportError as e:
+        raise ImportError("The 'lxml-html' parser backend requires the cssselect package") from e
+    return CSSSelector(selector, translator='html')
+
+
+class LxmlNode:
+    """
+    Wrap an lxml element with the subset of the BeautifulSoup ``Tag`` API used
+    by the scrapers (``select_one``, ``select``, ``get_text``, ``get``,
+    ``find``, ``find_all`` and ``find_next_sibling``).
+
+    Results match BeautifulSoup for the same document, so extraction code can
+    run unchanged on either backend.
+    """
+
+    __slots__ = ('element',)
+
+    def __init__(self, element):
+        self.element = element
+
+    def __bool__(self) -> bool:
+        # lxml elements without children are falsy; bs4 tags never are
+        return True
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, LxmlNode) and other.element is self.element
+
+    def __hash__(self) -> int:
+        return hash(self.element)
+
+    def __repr__(self) -> str:
+        return f"<LxmlNode {self.name}>"
+
+    @property
+    def name(self) -> str:
+        return self.element.tag
+
+    @property
+    def attrs(self) -> dict:
+        return dict(self.element.attrib)
+
+    def get(self, key: str, default=None):
+        return self.element.get(key, default)
+
+    def select(self, selector: str) -> List['LxmlNode']:
+        return [LxmlNode(el) for el in compile_css(selector)(self.element)]
+
+    def select_one(self, selector: str) -> Optional['LxmlNode']:
+        matches = compile_css(selector)(self.element)
+        return LxmlNode(matches[0]) if matches else None
+
+    def _strings(self) -> Iterator[str]:
+        """Yield text nodes in document order, skipping comments and script-like tags."""
+        element = self.element
+        stack = [(element, False)]
+        while stack:
+            el, tail_only = stack.pop()
+            if tail_only:
+                if el.tail:
+                    yield el.tail
+                continue
+            if el.text and el.tag not in NON_TEXT_TAGS:
+                yield el.text
+            children = [child for child in el]
+            for child in reversed(children):
+                stack.append((child, True))
+                if isinstance(child.tag, str) and child.tag not in NON_TEXT_TAGS:
+                    stack.append((child, False))
+
+    def get_text(self, separator: str = '', strip: bool = False) -> str:
+        strings = self._strings()
+        if strip:
+            strings = (s.strip() for s in strings)
+            strings = (s for s in strings if s)
+        return separator.join(strings)
+
+    @staticmethod
+    def _names(name: Union[str, Sequence[str], None]):
+        if name is None or name is True:
+            return None
+        return (name,) if isinstance(name, str) else tuple(name)
+
+    def find_all(self, name=None, attrs: Optional[dict] = None, limit: Optional[int] = None) -> List['LxmlNode']:
+        names = self._names(name)
+        found = []
+        for el in self.element.iterdescendants(*(names or ())):
+            if not isinstance(el.tag, str):
+                continue
+            if attrs and any(el.get(k) != v for k, v in attrs.items()):
+                continue
+            found.append(LxmlNode(el))
+            if limit and len(found) >= limit:
+                break
+        return found
+
+    def find(self, name=None, attrs: Optional[dict] = None) -> Optional['LxmlNode']:
+        found = self.find_all(name, attrs, limit=1)
+        return found[0] if found else None
+
+    def find_next_sibling(self, name=None) -> Optional['LxmlNode']:
+        names = self._names(name)
+        for sibling in self.element.itersiblings():
+            if isinstance(sibling.tag, str) and (names is None or sibling.tag in names):
+                return LxmlNode(sibling)
+        return None
@@ -0,0 +1,340 @@
+"""In-memory index of scraped products for finding the same product on other platforms."""
+
+from array import array
+import math
+import re
+import sys
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+
+TOKEN_RE = re.compile(r'[a-z0-9]+(?:\.[0-9]+)?')
+# "128 GB", "6.7 inch": glue the number to its unit so it is one token
+UNIT_RE = re.compile(r'(\d+(?:\.\d+)?)\s+(gb|tb|mb|mah|w|kg|g|ml|l|cm|mm|inch|in|hz|mp|pcs|pack)\b')
+IDENTIFIER_RE = re.compile(r'[^A-Z0-9]')
+
+STOPWORDS = frozenset("""
+a an and the of for with in on to by from at or is new all buy online best
+black white blue red green grey gray silver gold pink purple colour color
+edition version pack set combo free size
+""".split())
+
+# Detail keys (lowercased) holding a manufacturer identifier that is the same
+# on every platform, and the brand
+IDENTIFIER_KEYS = (
+    'item model number', 'model number', 'manufacturer part number', 'part number',
+    'isbn-13', 'isbn-10', 'ean', 'upc', 'gtin',
+)
+BRAND_KEYS = ('brand', 'brand name', 'manufacturer')
+
+
+def title_tokens(title: str) -> Set[str]:
+    """Distinct normalized tokens of a product title, without stopwords."""
+    title = UNIT_RE.sub(r'\1\2', title.lower())
+    return {t for t in TOKEN_RE.findall(title) if len(t) > 1 and t not in STOPWORDS}
+
+
+def normalize_identifier(value: str) -> str:
+    """Model number / ISBN with case, spaces and punctuation removed ("MTP03HN/A" -> "MTP03HNA")."""
+    return IDENTIFIER_RE.sub('', value.upper())
+
+
+def _detail_pairs(details: Dict) -> Iterable[Tuple[str, str]]:
+    for key, value in (details or {}).items():
+        if not isinstance(value, str):
+            continue
+        # Detail bullets can come through as {"ISBN-13 : 978-...": "ISBN-13 :"}
+        if ' : ' in key and value.endswith(':'):
+            key, _, value = key.partition(' : ')
+        yield key.strip().lower(), value.strip()
+
+
+def product_keys(details: Dict) -> Tuple[Optional[str], Set[str]]:
+    """
+    Brand and manufacturer identifiers from a scraped ``details`` dict.
+
+    Returns:
+        (brand, identifiers): the brand's first word, lowercased (None if
+        unknown), and the normalized model numbers / ISBNs
+    """
+    brand = None
+    identifiers = set()
+    for key, value in _detail_pairs(details):
+        if key in IDENTIFIER_KEYS:
+            identifier = normalize_identifier(value)
+            if len(identifier) >= 4:
+                identifiers.add(identifier)
+        elif key in BRAND_KEYS and brand is None and value:
+            # First word only: "Apple", "Apple Inc, One Apple Park Way, ..." -> "apple"
+            words = TOKEN_RE.findall(value.lower())
+            brand = words[0] if words else None
+    return brand, identifiers
+
+
+class Match(NamedTuple):
+    platform: str
+    url: str
+    title: str
+    price: Optional[float]
+    score: float
+    reason: str
+
+
+class ProductIndex:
+    """
+    Products seen in scrape results, indexed for "same product elsewhere".
+
+    Two indexes are kept: manufacturer identifiers (model numbers, ISBNs)
+    map straight to the products carrying them, and an inverted index maps
+    each title token to the products whose title has it. A lookup first
+    takes exact identifier matches, then scores title overlap by IDF weight.
+    Only the rarest query tokens' posting lists are walked (at most
+    ``max_postings`` entries in total), and the candidates they yield are
+    scored on their own token sets, so a lookup costs about the same at any
+    index size. Products of a different known brand are never returned.
+
+    Posting lists are compact integer arrays and tokens are interned.
+    Products re-added with a changed title or details get a new entry; the
+    old one is tombstoned, and once tombstones outnumber live entries (and
+    there are at least ``compact_min`` of them) the index is rebuilt without
+    them, so the cost of compacting is spread over as many updates.
+    """
+
+    def __init__(self, max_postings: int = 5000, min_score: float = 0.5, compact_min: int = 1000):
+        self.max_postings = max_postings
+        self.min_score = min_score
+        self.compact_min = compact_min
+        self.compactions = 0
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._platforms: List[str] = []
+        self._urls: List[str] = []
+        self._titles: List[str] = []
+        self._brands: List[Optional[str]] = []
+        self._prices: List[Optional[float]] = []
+        self._signatures: List[Optional[tuple]] = []
+        self._tokens: List[Tuple[str, ...]] = []
+        self._postings: Dict[str, array] = {}
+        self._identifiers: Dict[str, array] = {}
+        self._live = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._live
+
+    def add(self, platform: str, url: str, result: Dict) -> Optional[int]:
+        """
+        Index (or re-index) a scrape result.
+
+        Args:
+            platform: Platform the product was scraped from
+            url: Canonical product URL
+            result: Scrape result with ``title`` and optionally ``details``
+                and ``price``
+
+        Returns:
+            The product's entry id (ids change when the index is compacted),
+            or None if the result has no title and the product was not
+            indexed before
+        """
+        title = result.get('title')
+        if not title or title == 'N/A':
+            # Price-only scrapes still refresh the price of an indexed product
+            with self._lock:
+                product_id = self._ids.get((platform, url))
+                if product_id is not None and 'price' in result:
+                    self._prices[product_id] = result['price']
+            return product_id
+        brand, identifiers = product_keys(result.get('details'))
+        tokens = title_tokens(title)
+        key = (platform, url)
+        with self._lock:
+            old = self._ids.get(key)
+            if old is not None and 'details' not in result:
+                # Scraped without details (a profile or field subset): keep
+                # the brand and identifiers of the earlier full scrape
+                _, brand, identifiers = self._signatures[old]
+            signature = (title, brand, tuple(sorted(identifiers)))
+            if old is not None and self._signatures[old] == signature:
+                self._prices[old] = result.get('price')
+                return old
+            if old is not None:
+                self._signatures[old] = None
+                self._live -= 1
+                dead = len(self._platforms) - self._live
+                if dead >= self.compact_min and dead > self._live:
+                    self._compact()
+            product_id = len(self._platforms)
+            self._ids[key] = product_id
+            self._platforms.append(platform)
+            self._urls.append(url)
+            self._titles.append(title)
+            self._brands.append(sys.intern(brand) if brand else None)
+            self._prices.append(result.get('price'))
+            self._signatures.append(signature)
+            tokens = tuple(sys.intern(token) for token in tokens)
+            self._tokens.append(tokens)
+            for token in tokens:
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = array('i')
+                postings.append(product_id)
+            for identifier in identifiers:
+                postings = self._identifiers.get(identifier)
+                if postings is None:
+                    postings = self._identifiers[identifier] = array('i')
+                postings.append(product_id)
+            self._live += 1
+        return product_id
+
+    def compact(self):
+        """Drop tombstoned entries now (``add`` does it once they outnumber live ones)."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        live = [product_id for product_id, signature in enumerate(self._signatures) if signature is not None]
+        new_ids = {old: new for new, old in enumerate(live)}
+        for name in ('_platforms', '_urls', '_titles', '_brands', '_prices', '_signatures', '_tokens'):
+            values = getattr(self, name)
+            setattr(self, name, [values[product_id] for product_id in live])
+        self._ids = {key: new_ids[product_id] for key, product_id in self._ids.items() if product_id in new_ids}
+        for index in (self._postings, self._identifiers):
+            for key in list(index):
+                postings = array('i', (new_ids[p] for p in index[key] if p in new_ids))
+                if postings:
+                    index[key] = postings
+                else:
+                    del index[key]
+        self.compactions += 1
+
+    def get(self, platform: str, url: str) -> Optional[Dict]:
+        """The indexed entry for a product URL, or None."""
+        with self._lock:
+            product_id = self._ids.get((platform, url))
+            if product_id is None:
+                return None
+            title, brand, identifiers = self._signatures[product_id]
+            return {'title': title, 'brand': brand, 'identifiers': list(identifiers), 'price': self._prices[product_id]}
+
+    def candidates(
+        self,
+        title: str,
+        details: Optional[Dict] = None,
+        exclude_platform: Optional[str] = None,
+        limit: int = 10,
+    ) -> List[Match]:
+        """
+        Likely equivalents of a product.
+
+        Args:
+            title: Product title
+            details: Scraped details (for brand and model number), if known
+            exclude_platform: Leave out products of this platform (usually
+                the one the query product is from)
+            limit: Maximum matches returned
+
+        Returns:
+            Matches, best first: identifier matches (score 1.0), then title
+            matches scoring at least ``min_score``
+        """
+        brand, identifiers = product_keys(details)
+        with self._lock:
+            return self._candidates(title_tokens(title), brand, identifiers, exclude_platform, limit)
+
+    def matches_for(self, platform: str, url: str, limit: int = 10) -> Optional[List[Match]]:
+        """
+        Likely equivalents on other platforms of an indexed product.
+
+        Returns:
+            Matches as for ``candidates``, or None if the product is not indexed
+        """
+        with self._lock:
+            product_id = self._ids.get((platform, url))
+            if product_id is None:
+                return None
+            title, brand, identifiers = self._signatures[product_id]
+            return self._candidates(title_tokens(title), brand, identifiers, platform, limit)
+
+    def _candidates(
+        self,
+        tokens: Set[str],
+        brand: Optional[str],
+        identifiers: Iterable[str],
+        exclude_platform: Optional[str],
+        limit: int,
+    ) -> List[Match]:
+        total = len(self._platforms)
+        scores: Dict[int, float] = {}
+        reasons: Dict[int, str] = {}
+        for identifier in identifiers:
+            for product_id in self._identifiers.get(identifier, ()):
+                scores[product_id] = 1.0
+                reasons[product_id] = 'identifier'
+
+        # Candidates come from the rarest tokens' posting lists, walked until
+        # the tokens left could not reach min_score on their own (a product
+        # with none of the walked tokens cannot qualify) or the budget is
+        # spent; each candidate is then scored on its full token set.
+        weighted = sorted((len(self._postings[t]), t) for t in tokens if t in self._postings)
+        idf = {token: math.log(1 + total / df) for df, token in weighted}
+        query_weight = sum(idf.values()) or 1.0
+        threshold = self.min_score * query_weight
+        remaining = query_weight
+        budget = self.max_postings
+        candidates: Set[int] = set()
+        for df, token in weighted:
+            if remaining < threshold or (candidates and df > budget):
+                break
+            candidates.update(self._postings[token])
+            budget -= df
+            remaining -= idf[token]
+        brands = self._brands
+        platforms = self._platforms
+        signatures = self._signatures
+        for product_id in candidates:
+            if product_id in scores:
+                continue
+            # Cheap filters first: scoring touches every token of the candidate
+            other_brand = brands[product_id]
+            if brand and other_brand and other_brand != brand:
+                continue
+            if platforms[product_id] == exclude_platform or signatures[product_id] is None:
+                continue
+            product_tokens = self._tokens[product_id]
+            weight = 0.0
+            for token in product_tokens:
+                if token in idf:
+                    weight += idf[token]
+            # Penalize candidates with many extra tokens (bundles, accessories)
+            extra = max(len(product_tokens) - len(tokens), 0)
+            score = weight / query_weight / (1 + 0.05 * extra)
+            if score >= self.min_score:
+                scores[product_id] = score
+                reasons[product_id] = 'title'
+
+        matches = []
+        for product_id, score in sorted(scores.items(), key=lambda item: -item[1]):
+            if self._signatures[product_id] is None:
+                continue
+            platform = self._platforms[product_id]
+            if platform == exclude_platform:
+                continue
+            other_brand = self._brands[product_id]
+            if brand and other_brand and brand != other_brand:
+                continue
+            matches.append(Match(
+                platform, self._urls[product_id], self._titles[product_id],
+                self._prices[product_id], round(score, 4), reasons[product_id],
+            ))
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def stats(self) -> Dict:
+        return {
+            'products': self._live,
+            'entries': len(self._platforms),
+            'tokens': len(self._postings),
+            'identifiers': len(self._identifiers),
+            'compactions': self.compactions,
+        }
@@ -0,0 +1,311 @@
+"""In-process metrics rendered in the Prometheus text exposition format."""
+
+from bisect import bisect_left
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Seconds; Prometheus client defaults, for fetches and whole requests
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds, for work measured in microseconds (single fields, selectors)
+FAST_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """The series for these label values (in ``labelnames`` order)."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}', *self.samples()]
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. requests or bytes."""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def values(self) -> Dict[Tuple, float]:
+        """Current value per label values tuple."""
+        return {values: child.value for values, child in list(self._children.items())}
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}'
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests in flight."""
+
+    kind = 'gauge'
+
+
+class _Buckets:
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (usually seconds) in cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _Buckets(self.buckets)
+
+    def samples(self):
+        names = self.labelnames + ('le',)
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{_format_labels(names, values + (_format_value(bound),))} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.labelnames, values)} {_format_value(total)}'
+            yield f'{self.name}_count{_format_labels(self.labelnames, values)} {cumulative}'
+
+
+class _Callback(_Metric):
+    """Values read from a function at render time, e.g. from a component's stats."""
+
+    def __init__(self, name, documentation, labelnames, kind, fn):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self):
+        for values, value in self.fn().items():
+            if value is not None:
+                yield f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}'
+
+
+class MetricsRegistry:
+    """
+    A set of metrics, rendered together for a ``/metrics`` endpoint.
+
+    Metrics are created through the registry (``counter``, ``gauge``,
+    ``histogram``) and updated from any thread; a series per label
+    combination is created on first use.
+    """
+
+    CONTENT_TYPE = CONTENT_TYPE
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        fn: Callable[[], Dict[Tuple, Optional[float]]],
+        labelnames: Sequence[str] = (),
+        kind: str = 'gauge',
+    ):
+        """
+        Register a metric whose values come from ``fn`` at render time.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            fn: Returns ``{label values tuple: value}``; None values are skipped
+            labelnames: Label names, in the order of the tuples
+            kind: ``'gauge'`` or ``'counter'``
+        """
+        self._register(_Callback(name, documentation, labelnames, kind, fn))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class ScraperMetrics:
+    """
+    Timings and counters reported by scrapers, labeled by platform.
+
+    Passed to scrapers as ``metrics``; scrapers without one skip the timing
+    entirely.
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self.fetch_seconds = registry.histogram(
+            'scraper_fetch_seconds', 'Page download time, including retries', ('platform',),
+        )
+        self.fetch_bytes = registry.counter(
+            'scraper_fetch_bytes_total', 'Page body bytes downloaded', ('platform',),
+        )
+        self.fetch_failures = registry.counter(
+            'scraper_fetch_failures_total', 'Failed page downloads by reason', ('platform', 'reason'),
+        )
+        self.parse_seconds = registry.histogram(
+            'scraper_parse_seconds', 'HTML parse time', ('platform',),
+        )
+        self.extract_seconds = registry.histogram(
+            'scraper_extract_seconds', 'Extraction time per page, including parsing', ('platform',),
+        )
+        self.field_seconds = registry.histogram(
+            'scraper_field_extract_seconds', 'Extraction time per field and stage',
+            ('platform', 'field'), buckets=FAST_BUCKETS,
+        )
+        self.selector_hits = registry.counter(
+            'scraper_selector_hits_total',
+            'Fields completed by each selector position (0 is the primary selector, higher are fallbacks)',
+            ('platform', 'field', 'position'),
+        )
+        self.field_sources = registry.counter(
+            'scraper_field_source_total', 'Fields extracted by source (embedded JSON, dom, xpath)',
+            ('platform', 'field', 'source'),
+        )
+
+    def field_source_counts(self) -> Dict[str, Dict[str, int]]:
+        """Fields extracted by each source (summed over platforms), for ``/api/stats``."""
+        counts: Dict[str, Dict[str, int]] = {}
+        for (_, field, source), value in self.field_sources.values().items():
+            counts.setdefault(field, {})
+            counts[field][source] = counts[field].get(source, 0) + int(value)
+        return counts
+
+
+class _RecordedMetric:
+    def __init__(self, updates: List[tuple], name: str, labels: tuple = ()):
+        self._updates = updates
+        self._name = name
+        self._labels = labels
+
+    def labels(self, *values) -> '_RecordedMetric':
+        return _RecordedMetric(self._updates, self._name, tuple(str(v) for v in values))
+
+    def inc(self, amount: float = 1.0):
+        self._updates.append((self._name, self._labels, 'inc', amount))
+
+    def observe(self, value: float):
+        self._updates.append((self._name, self._labels, 'observe', value))
+
+
+class RecordedMetrics:
+    """
+    Stand-in for ``ScraperMetrics`` that records updates instead of applying them.
+
+    For scrapers running in another process (the pipeline's parse workers),
+    whose metrics would otherwise never reach the server's registry: the
+    worker returns ``take()`` with its result and the server applies the
+    updates with ``replay``.
+    """
+
+    # The ScraperMetrics a scraper in a worker process may update
+    METRICS = (
+        'fetch_seconds', 'fetch_bytes', 'fetch_failures', 'parse_seconds',
+        'extract_seconds', 'field_seconds', 'selector_hits', 'field_sources',
+    )
+
+    def __init__(self):
+        self._updates: List[tuple] = []
+        for name in self.METRICS:
+            setattr(self, name, _RecordedMetric(self._updates, name))
+
+    def take(self) -> List[tuple]:
+        """The updates recorded since the last call, as picklable tuples."""
+        updates = self._updates[:]
+        self._updates.clear()
+        return updates
+
+    @staticmethod
+    def replay(metrics: ScraperMetrics, updates: Iterable[tuple]):
+        """Apply updates from ``take`` to real metrics."""
+        for name, labels, method, value in updates:
+            getattr(getattr(metrics, name).labels(*labels), method)(value)
@@ -1,18 +1,22 @@
 """Myntra scraper implementation (placeholder)."""
 
-from typing import Dict
+from typing import Dict, Iterable, Optional
 from .base_scraper import BaseScraper
 
 
 class MyntraScraper(BaseScraper):
     """Scraper for Myntra product pages (coming soon)."""
+
+    PLATFORM = 'myntra'
     
-    def scrape(self, url: str) -> Dict:
+    def scrape(self, url: str, profile: Optional[str] = None, fields: Optional[Iterable[str]] = None) -> Dict:
         """
         Placeholder scraper for Myntra.
         
         Args:
             url: Myntra product URL
+            profile: Fetch profile (unused)
+            fields: Fields to extract (unused)
             
         Returns:
             Error response indicating coming soon
@@ -0,0 +1,239 @@
+"""Downloaded page wrapper shared by all scrapers."""
+
+from functools import lru_cache
+import re
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, Optional
+from .lxml_node import LxmlNode
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+
+# Supported parser backends:
+#   html.parser - BeautifulSoup with the stdlib parser (slowest, most lenient)
+#   lxml        - BeautifulSoup with the lxml parser
+#   lxml-html   - pure lxml.html tree with CSS selectors via cssselect (fastest)
+PARSERS = ('html.parser', 'lxml', 'lxml-html')
+
+VOID_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr',
+])
+
+TAG_NAME_RE = re.compile(r'<([a-zA-Z][\w-]*)')
+
+
+@lru_cache(maxsize=32)
+def _anchor_pattern(ids: FrozenSet[str]):
+    """Regex matching an ``id`` attribute with any of the given values."""
+    alternatives = '|'.join(re.escape(i) for i in sorted(ids))
+    return re.compile(r'(?<![\w-])id\s*=\s*["\']?(' + alternatives + r')(?=["\'\s/>])')
+
+
+@lru_cache(maxsize=64)
+def _tag_pattern(name: str):
+    """Regex matching open or close tags of one element name."""
+    name = re.escape(name)
+    return re.compile(r'<(/)?' + name + r'\b[^>]*>', re.I)
+
+
+class Page:
+    """
+    A downloaded web page.
+
+    Keeps the raw response bytes from a single request and builds parsed views
+    of them on demand, so a scraper can use both BeautifulSoup selectors and
+    lxml XPath queries without downloading or decoding the page twice.
+    ``dom`` is the view for the configured parser backend (see ``PARSERS``).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        content: bytes,
+        encoding: Optional[str] = None,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        parser: str = 'html.parser',
+        truncated: bool = False,
+    ):
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown parser backend: {parser}. Supported: {list(PARSERS)}")
+        self.url = url
+        self.content = content
+        self.encoding = encoding
+        self.status_code = status_code
+        self.headers = dict(headers or {})
+        self.parser = parser
+        # True if the download stopped early, so ``content`` is only a prefix
+        # of the page
+        self.truncated = truncated
+        self._text = None
+        self._soup = None
+        self._tree = None
+        self._regions = {}
+        # Set on pages built by regions(): the region ids that were located
+        self.found_regions = None
+
+    def __getstate__(self):
+        # Ship only the raw download (e.g. to a parse worker process); the
+        # parsed views are rebuilt on demand
+        state = self.__dict__.copy()
+        state.update(_text=None, _soup=None, _tree=None, _regions={})
+        return state
+
+    @classmethod
+    def from_response(
+        cls,
+        response,
+        url: Optional[str] = None,
+        parser: str = 'html.parser',
+        content: Optional[bytes] = None,
+        truncated: bool = False,
+    ) -> 'Page':
+        """
+        Build a page from a ``requests`` or ``httpx`` response.
+
+        Args:
+            response: Completed response with the body read
+            url: URL that was requested (defaults to the final response URL)
+            parser: Parser backend used for ``dom``
+            content: Body read separately (e.g. streamed) instead of
+                ``response.content``
+            truncated: Whether ``content`` stops before the end of the body
+
+        Returns:
+            Page holding the response body
+        """
+        # Only trust an explicit charset; requests falls back to ISO-8859-1
+        # for text/html without one, which mangles UTF-8 pages.
+        content_type = response.headers.get('Content-Type', '')
+        encoding = response.encoding if 'charset' in content_type.lower() else None
+        return cls(
+            url=url or str(response.url),
+            content=response.content if content is None else content,
+            encoding=encoding,
+            status_code=response.status_code,
+            headers=response.headers,
+            parser=parser,
+            truncated=truncated,
+        )
+
+    @property
+    def text(self) -> str:
+        """Decoded page text (decoded once and shared by every parser)."""
+        if self._text is None:
+            from bs4 import UnicodeDammit
+            known = [self.encoding] if self.encoding else []
+            dammit = UnicodeDammit(self.content, known_definite_encodings=known, is_html=True)
+            self._text = dammit.unicode_markup or self.content.decode('utf-8', errors='replace')
+        return self._text
+
+    @property
+    def soup(self) -> 'BeautifulSoup':
+        """BeautifulSoup view of the page, parsed on first access."""
+        if self._soup is None:
+            from bs4 import BeautifulSoup
+            features = 'lxml' if self.parser == 'lxml' else 'html.parser'
+            self._soup = BeautifulSoup(self.text, features)
+        return self._soup
+
+    @property
+    def tree(self):
+        """lxml element tree of the page, parsed on first access."""
+        if self._tree is None:
+            from lxml import html
+            try:
+                self._tree = html.document_fromstring(self.text)
+            except ValueError:
+                # lxml refuses str input that carries an XML encoding declaration
+                self._tree = html.document_fromstring(self.content)
+        return self._tree
+
+    @property
+    def dom(self):
+        """
+        Document root for the configured parser backend.
+
+        A ``BeautifulSoup`` object for the bs4 backends, or an ``LxmlNode``
+        exposing the same selector API for ``lxml-html``.
+        """
+        if self.parser == 'lxml-html':
+            return LxmlNode(self.tree)
+        return self.soup
+
+    def regions(self, ids: Iterable[str]) -> Optional['Page']:
+        """
+        Build a page containing only the elements with the given ids.
+
+        The decoded text is sliced around each ``id="..."`` anchor, from the
+        element's start tag to its matching end tag, and the slices are
+        joined in document order. Parsing that is far cheaper than parsing
+        the whole page. Anchors nested inside an already sliced element are
+        covered by the outer slice.
+
+        Args:
+            ids: Element ids to keep
+
+        Returns:
+            New Page over the sliced markup with ``found_regions`` set to the
+            ids that were located, or None if no anchor was found or the
+            markup around one could not be delimited
+        """
+        key = frozenset(ids)
+        if key not in self._regions:
+            self._regions[key] = self._slice_regions(key)
+        return self._regions[key]
+
+    def _slice_regions(self, ids: FrozenSet[str]) -> Optional['Page']:
+        text = self.text
+        slices = []
+        found = set()
+        end = 0
+        for match in _anchor_pattern(ids).finditer(text):
+            if match.start() < end:
+                # Inside the previous region; already included
+                found.add(match.group(1))
+                continue
+            start = text.rfind('<', 0, match.start())
+            name = TAG_NAME_RE.match(text, start) if start != -1 else None
+            if not name:
+                return None
+            tag = name.group(1).lower()
+            if tag in VOID_TAGS:
+                end = text.find('>', match.end()) + 1
+            else:
+                end = self._closing_tag_end(text, tag, start)
+            if end <= 0:
+                return None
+            slices.append(text[start:end])
+            found.add(match.group(1))
+
+        if not slices:
+            return None
+        region = Page(
+            self.url,
+            b'',
+            encoding=self.encoding,
+            status_code=self.status_code,
+            headers=self.headers,
+            parser=self.parser,
+            truncated=self.truncated,
+        )
+        region._text = '<html><body>' + '\n'.join(slices) + '</body></html>'
+        region.content = region._text.encode('utf-8')
+        region.found_regions = found
+        return region
+
+    @staticmethod
+    def _closing_tag_end(text: str, tag: str, start: int) -> int:
+        """Return the offset just past the end tag matching the start tag at ``start``, or -1."""
+        depth = 0
+        for match in _tag_pattern(tag).finditer(text, start):
+            if match.group(1):
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+            elif not match.group(0).endswith('/>'):
+                depth += 1
+        return -1
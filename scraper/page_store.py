@@ -0,0 +1,198 @@
+"""Persistent on-disk store of downloaded pages."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, NamedTuple, Optional
+from .page import Page
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL REFERENCES bodies(digest),
+    encoding TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+class StoredPage(NamedTuple):
+    url: str
+    content: bytes
+    digest: str
+    encoding: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def to_page(self, parser: str = 'html.parser') -> Page:
+        """Rebuild a ``Page`` from the stored body."""
+        return Page(self.url, self.content, encoding=self.encoding, parser=parser)
+
+
+class PageStore:
+    """
+    SQLite-backed store of raw page bodies.
+
+    Bodies are zlib-compressed and content-addressed by SHA-256, so a page
+    that has not changed between fetches (or is shared by several URLs) is
+    stored once. Each URL records its latest body together with the ETag and
+    Last-Modified validators used for conditional revalidation.
+
+    A body is deleted as soon as no URL refers to it any more (``prune``
+    cleans up stores written before that).
+
+    Pages younger than ``max_age`` seconds are served without contacting the
+    site at all. Connections are per thread, with WAL journaling so readers
+    never block the writer.
+    """
+
+    def __init__(self, path: str, max_age: float = 0.0, compression_level: int = 6):
+        self.path = path
+        self.max_age = max_age
+        self.compression_level = compression_level
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, url: str) -> Optional[StoredPage]:
+        """
+        Return the latest stored copy of a URL.
+
+        Args:
+            url: Page URL
+
+        Returns:
+            StoredPage, or None if the URL was never stored
+        """
+        row = self._conn().execute(
+            'SELECT p.url, b.data, p.digest, p.encoding, p.etag, p.last_modified, p.fetched_at '
+            'FROM pages p JOIN bodies b ON b.digest = p.digest WHERE p.url = ?',
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        return StoredPage(row[0], zlib.decompress(row[1]), *row[2:])
+
+    def is_fresh(self, stored: StoredPage) -> bool:
+        """Whether a stored page is young enough to serve without revalidating."""
+        return self.max_age > 0 and time.time() - stored.fetched_at < self.max_age
+
+    def put(
+        self,
+        url: str,
+        content: bytes,
+        encoding: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> str:
+        """
+        Store a freshly downloaded page.
+
+        Args:
+            url: Page URL
+            content: Raw response body
+            encoding: Declared charset, if any
+            etag: ETag response header
+            last_modified: Last-Modified response header
+
+        Returns:
+            SHA-256 digest of the body
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        conn = self._conn()
+        with conn:
+            previous = conn.execute('SELECT digest FROM pages WHERE url = ?', (url,)).fetchone()
+            exists = conn.execute('SELECT 1 FROM bodies WHERE digest = ?', (digest,)).fetchone()
+            if not exists:
+                conn.execute(
+                    'INSERT OR IGNORE INTO bodies (digest, size, data) VALUES (?, ?, ?)',
+                    (digest, len(content), zlib.compress(content, self.compression_level)),
+                )
+            conn.execute(
+                'INSERT OR REPLACE INTO pages (url, digest, encoding, etag, last_modified, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (url, digest, encoding, etag, last_modified, time.time()),
+            )
+            if previous is not None and previous[0] != digest:
+                # The page changed; drop its old body unless another URL shares it
+                conn.execute(
+                    'DELETE FROM bodies WHERE digest = ? AND NOT EXISTS (SELECT 1 FROM pages WHERE digest = ?)',
+                    (previous[0], previous[0]),
+                )
+        return digest
+
+    def touch(self, url: str):
+        """Mark a stored page as revalidated now (after a 304 response)."""
+        with self._conn() as conn:
+            conn.execute('UPDATE pages SET fetched_at = ? WHERE url = ?', (time.time(), url))
+
+    def urls(self) -> Iterator[str]:
+        """Iterate over every stored URL."""
+        for (url,) in self._conn().execute('SELECT url FROM pages ORDER BY url').fetchall():
+            yield url
+
+    def iter_pages(self) -> Iterator[StoredPage]:
+        """Iterate over the latest stored copy of every URL."""
+        for url in self.urls():
+            stored = self.get(url)
+            if stored is not None:
+                yield stored
+
+    def prune(self) -> int:
+        """
+        Delete bodies no longer referenced by any URL.
+
+        Returns:
+            Number of bodies deleted
+        """
+        with self._conn() as conn:
+            return conn.execute('DELETE FROM bodies WHERE digest NOT IN (SELECT digest FROM pages)').rowcount
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        pages = conn.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+        bodies, raw, stored = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM bodies'
+        ).fetchone()
+        return {'pages': pages, 'bodies': bodies, 'raw_bytes': raw, 'stored_bytes': stored}
+
+
+def reextract(store: PageStore, scraper, url_filter: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Run a scraper's extraction over stored pages without touching the network.
+
+    Args:
+        store: Page store to read from
+        scraper: Scraper whose ``extract`` is applied
+        url_filter: Only pages whose URL contains this substring
+
+    Yields:
+        Scrape result per stored page, or ``{'url', 'error'}`` if extraction fails
+    """
+    for stored in store.iter_pages():
+        if url_filter and url_filter not in stored.url:
+            continue
+        try:
+            yield scraper.extract(stored.to_page(scraper.parser))
+        except Exception as e:
+            yield {'url': stored.url, 'error': str(e)}
+
@@ -0,0 +1,173 @@
+"""Two-stage scrape pipeline: network fetches and HTML parsing in separate pools."""
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import os
+import threading
+from typing import Dict, List, Optional, Tuple, Type
+from .base_scraper import BaseScraper
+from .metrics import RecordedMetrics
+from .page import Page
+
+
+# Scrapers constructed inside parse worker processes, one per class, and
+# the metrics they record for the server
+_worker_scrapers: Dict[Type[BaseScraper], BaseScraper] = {}
+_worker_metrics = RecordedMetrics()
+
+
+def extract_in_worker(
+    scraper_cls: Type[BaseScraper],
+    parser: str,
+    region_parsing: bool,
+    page: Page,
+    fields: Optional[Tuple[str, ...]] = None,
+    metrics: bool = False,
+) -> Tuple[Dict, List[tuple]]:
+    """
+    Run extraction in a parse worker.
+
+    Module level so it can be pickled into a ``ProcessPoolExecutor``. Each
+    worker keeps one scraper instance per class.
+
+    Returns:
+        (result, metric updates): with ``metrics`` set, the parse, extract
+        and per-field metrics the extraction recorded, to be applied in the
+        server with ``RecordedMetrics.replay``
+    """
+    scraper = _worker_scrapers.get(scraper_cls)
+    if scraper is None:
+        scraper = _worker_scrapers[scraper_cls] = scraper_cls(parser=parser, region_parsing=region_parsing)
+    scraper.metrics = _worker_metrics if metrics else None
+    # Drop anything left over from an extraction that raised
+    _worker_metrics.take()
+    result = scraper.extract(page, fields)
+    return result, _worker_metrics.take()
+
+
+class _StageStats:
+    """Thread-safe counters for one pipeline stage."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.submitted = 0
+        self.completed = 0
+        self.running = 0
+        self._lock = threading.Lock()
+
+    def wrap(self, fn):
+        def run(*args):
+            with self._lock:
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+        return run
+
+    def submit(self):
+        with self._lock:
+            self.submitted += 1
+
+    def complete(self):
+        with self._lock:
+            self.completed += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            in_flight = self.submitted - self.completed
+            return {
+                'workers': self.workers,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'running': self.running,
+                'queued': max(in_flight - self.running, 0),
+            }
+
+
+class ScrapePipeline:
+    """
+    Scrape in two stages with separately sized pools.
+
+    The I/O stage is a wide thread pool that only downloads pages (threads
+    spend nearly all their time waiting on sockets). The parse stage runs
+    ``extract`` on the raw HTML in a process pool, so parsing uses every core
+    instead of contending for the GIL with the I/O threads. Use
+    ``parse_mode='thread'`` where worker processes are unavailable.
+    """
+
+    def __init__(self, io_workers: int = 32, parse_workers: Optional[int] = None, parse_mode: str = 'process'):
+        if parse_mode not in ('process', 'thread'):
+            raise ValueError(f"Unknown parse mode: {parse_mode}. Supported: ['process', 'thread']")
+        parse_workers = parse_workers or os.cpu_count() or 1
+        self.parse_mode = parse_mode
+        self.io_executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix='scrape-io')
+        if parse_mode == 'process':
+            self.parse_executor: Executor = ProcessPoolExecutor(max_workers=parse_workers)
+        else:
+            self.parse_executor = ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix='scrape-parse')
+        self._io = _StageStats(io_workers)
+        self._parse = _StageStats(parse_workers)
+
+    async def scrape(
+        self,
+        scraper: BaseScraper,
+        url: str,
+        profile: Optional[str] = None,
+        fields: Optional[Tuple[str, ...]] = None,
+    ) -> Dict:
+        """
+        Fetch in the I/O stage, then extract in the parse stage.
+
+        Args:
+            scraper: Scraper providing ``fetch_page`` and ``extract``
+            url: Product URL to scrape
+            profile: Fetch profile (see ``BaseScraper.fetch_page``)
+            fields: Only extract these fields (see ``BaseScraper.FIELDS``)
+
+        Returns:
+            Dictionary with product information
+        """
+        scraper.select_fields(fields)
+        loop = asyncio.get_running_loop()
+        self._io.submit()
+        page = await loop.run_in_executor(self.io_executor, self._io.wrap(scraper.fetch_page), url, profile)
+
+        self._parse.submit()
+        if self.parse_mode == 'process':
+            # Process workers cannot report start times back, so only
+            # submissions and completions are tracked for this stage
+            future = loop.run_in_executor(
+                self.parse_executor, extract_in_worker,
+                type(scraper), scraper.parser, scraper.region_parsing, page, fields, scraper.metrics is not None,
+            )
+            try:
+                result, updates = await future
+            finally:
+                self._parse.complete()
+            if updates:
+                RecordedMetrics.replay(scraper.metrics, updates)
+            return result
+        return await loop.run_in_executor(self.parse_executor, self._parse.wrap(scraper.extract), page, fields)
+
+    def stats(self) -> Dict:
+        """
+        Queue depth and throughput counters for both stages.
+
+        Returns:
+            Dictionary with ``io`` and ``parse`` stage counters; ``queued``
+            is the number of tasks waiting for a free worker
+        """
+        parse = self._parse.snapshot()
+        if self.parse_mode == 'process':
+            in_flight = parse['submitted'] - parse['completed']
+            parse['running'] = min(in_flight, parse['workers'])
+            parse['queued'] = max(in_flight - parse['workers'], 0)
+        return {'parse_mode': self.parse_mode, 'io': self._io.snapshot(), 'parse': parse}
+
+    def shutdown(self):
+        """Stop both worker pools."""
+        self.io_executor.shutdown(wait=False)
+        self.parse_executor.shutdown(wait=False)
@@ -0,0 +1,292 @@
+"""Per-host request rate limiting with adaptive (AIMD) concurrency."""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+from .retry import AttemptCancelled
+
+
+# Responses meaning the site wants us to slow down
+THROTTLE_STATUSES = frozenset([429, 503])
+
+
+class Throttled(Exception):
+    """The site throttled or blocked a request (429/503 or a captcha page)."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BlockedError(Throttled):
+    """The site served a captcha or robot-check page instead of the requested one."""
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Seconds from a Retry-After header, or None if absent or an HTTP date."""
+    value = (headers or {}).get('Retry-After')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class _HostState:
+    def __init__(self, burst: float, limit: float):
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.limit = limit
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        # 'blocked' or 'throttled': what started the current pause
+        self.paused_by = 'throttled'
+        self.requests = 0
+        self.throttled = 0
+        self.blocked = 0
+        self.errors = 0
+        self.wait_seconds = 0.0
+
+
+class RateLimiter:
+    """
+    Rate and concurrency limits per host, shared by every worker.
+
+    Each host has a token bucket refilled at ``rate`` requests per second
+    (up to ``burst`` saved tokens) and an adaptive concurrency limit. The
+    limit grows additively while requests succeed (by ``increase`` per
+    ``limit`` successes, i.e. about one per round of requests) and is cut
+    multiplicatively by ``decrease`` whenever the host throttles us. A
+    throttled response's Retry-After also pauses the host until then; a
+    captcha page, which has none, pauses it for ``block_pause`` seconds.
+    Requests to a paused host fail at once with ``Throttled`` (or
+    ``BlockedError`` after a captcha) carrying the rest of the pause,
+    instead of holding a worker until it ends.
+
+    Works from threads (``with limiter.permit(host)``) and from asyncio
+    (``async with limiter.permit(host)``).
+    """
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: float = 10.0,
+        initial_concurrency: int = 4,
+        min_concurrency: int = 1,
+        max_concurrency: int = 16,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        max_retry_after: float = 60.0,
+        block_pause: float = 30.0,
+    ):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retry_after = max_retry_after
+        self.block_pause = block_pause
+        self._hosts: Dict[str, _HostState] = {}
+        self._cond = threading.Condition()
+
+    def permit(self, host: str) -> 'Permit':
+        """Permit for one request to ``host``, used as a (sync or async) context manager."""
+        return Permit(self, host)
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.burst, float(self.initial_concurrency))
+        return state
+
+    def _try_acquire(self, host: str) -> Optional[float]:
+        """
+        Take a request slot and token if both are available.
+
+        Returns:
+            0 when acquired, otherwise seconds until a token is due, or None
+            if the host is at its concurrency limit (wait for a release)
+
+        Raises:
+            Throttled: If the host is paused (``BlockedError`` if a captcha
+                page paused it), with the seconds left as ``retry_after``
+        """
+        now = time.monotonic()
+        state = self._state(host)
+        if now < state.blocked_until:
+            error = BlockedError if state.paused_by == 'blocked' else Throttled
+            raise error(f"Requests to {host} are paused after it {state.paused_by} us", state.blocked_until - now)
+        if state.in_flight >= int(state.limit):
+            return None
+        if self.rate > 0:
+            state.tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+            state.updated = now
+            if state.tokens < 1:
+                return (1 - state.tokens) / self.rate
+            state.tokens -= 1
+        state.in_flight += 1
+        state.requests += 1
+        return 0
+
+    def acquire(self, host: str):
+        """
+        Block until a request to ``host`` may start.
+
+        Raises:
+            Throttled: If the host is paused, or gets paused while waiting
+        """
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                wait = self._try_acquire(host)
+                if wait == 0:
+                    break
+                self._cond.wait(wait)
+            self._state(host).wait_seconds += time.monotonic() - started
+
+    def try_acquire(self, host: str) -> bool:
+        """
+        Start a request to ``host`` only if it can start right away.
+
+        Raises:
+            Throttled: If the host is paused
+        """
+        with self._cond:
+            return self._try_acquire(host) == 0
+
+    async def acquire_async(self, host: str, poll_interval: float = 0.05):
+        """Wait without blocking the event loop until a request to ``host`` may start."""
+        started = time.monotonic()
+        while True:
+            with self._cond:
+                wait = self._try_acquire(host)
+                if wait == 0:
+                    self._state(host).wait_seconds += time.monotonic() - started
+                    return
+            await asyncio.sleep(poll_interval if wait is None else wait)
+
+    def release(self, host: str, outcome: str = 'ok', retry_after: Optional[float] = None):
+        """
+        Finish a request and adapt the host's concurrency limit.
+
+        Args:
+            host: Host the request went to
+            outcome: ``'ok'``, ``'throttled'`` (429/503), ``'blocked'``
+                (captcha page), ``'error'`` (network failure; the limit is
+                left alone) or ``'cancelled'`` (abandoned, e.g. the losing
+                request of a hedge; only frees the slot)
+            retry_after: Seconds the host asked us to wait, if throttled
+        """
+        with self._cond:
+            state = self._state(host)
+            state.in_flight -= 1
+            if outcome == 'ok':
+                state.limit = min(self.max_concurrency, state.limit + self.increase / state.limit)
+            elif outcome in ('throttled', 'blocked'):
+                state.throttled += 1
+                if outcome == 'blocked':
+                    state.blocked += 1
+                    retry_after = retry_after or self.block_pause
+                state.limit = max(self.min_concurrency, state.limit * self.decrease)
+                state.tokens = 0
+                if retry_after:
+                    until = time.monotonic() + min(retry_after, self.max_retry_after)
+                    if until > state.blocked_until:
+                        state.blocked_until = until
+                        state.paused_by = outcome
+            elif outcome != 'cancelled':
+                state.errors += 1
+            self._cond.notify_all()
+
+    def paused_for(self, host: str) -> float:
+        """Seconds until requests to ``host`` resume after a throttle or block (0 if not paused)."""
+        with self._cond:
+            state = self._hosts.get(host)
+            return max(state.blocked_until - time.monotonic(), 0.0) if state else 0.0
+
+    def stats(self) -> Dict:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'hosts': {
+                    host: {
+                        'concurrency_limit': round(state.limit, 2),
+                        'in_flight': state.in_flight,
+                        'requests': state.requests,
+                        'throttled': state.throttled,
+                        'blocked': state.blocked,
+                        'errors': state.errors,
+                        'throttle_rate': round(state.throttled / state.requests, 4) if state.requests else 0.0,
+                        'wait_seconds': round(state.wait_seconds, 3),
+                        'paused_for': round(max(state.blocked_until - now, 0.0), 3),
+                    }
+                    for host, state in self._hosts.items()
+                },
+            }
+
+
+class Permit:
+    """
+    One request's slot from a ``RateLimiter`` (a no-op without a limiter).
+
+    The request counts as successful unless the block raises: ``Throttled``
+    (and ``BlockedError``) backs the host off, a cancelled request (the
+    loser of a hedge) only frees its slot, and any other exception counts as
+    an error.
+
+    ``try_acquire`` takes the slot ahead of time without waiting (for hedged
+    requests, which are only worth sending if the host has room for them);
+    entering the permit then uses that slot.
+    """
+
+    def __init__(self, limiter: Optional[RateLimiter], host: str):
+        self.limiter = limiter
+        self.host = host
+        self.held = False
+
+    def try_acquire(self) -> bool:
+        """Take the slot now if the host has one free, without waiting."""
+        if not self.held:
+            try:
+                self.held = self.limiter is None or self.limiter.try_acquire(self.host)
+            except Throttled:
+                return False
+        return self.held
+
+    def _finish(self, exc: Optional[BaseException]):
+        if self.limiter is None:
+            return
+        if exc is None:
+            self.limiter.release(self.host, 'ok')
+        elif isinstance(exc, BlockedError):
+            self.limiter.release(self.host, 'blocked', exc.retry_after)
+        elif isinstance(exc, Throttled):
+            self.limiter.release(self.host, 'throttled', exc.retry_after)
+        elif isinstance(exc, (AttemptCancelled, asyncio.CancelledError)):
+            self.limiter.release(self.host, 'cancelled')
+        else:
+            self.limiter.release(self.host, 'error')
+
+    def __enter__(self) -> 'Permit':
+        if self.limiter is not None and not self.held:
+            self.limiter.acquire(self.host)
+        self.held = True
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.held = False
+        self._finish(exc)
+
+    async def __aenter__(self) -> 'Permit':
+        if self.limiter is not None and not self.held:
+            await self.limiter.acquire_async(self.host)
+        self.held = True
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.held = False
+        self._finish(exc)
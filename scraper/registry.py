@@ -0,0 +1,215 @@
+"""Scrapers by platform, imported and constructed on first use."""
+
+from collections.abc import Mapping
+import importlib
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+
+# Platform -> "module:Class" of the built-in scrapers
+BUILTIN_SCRAPERS = {
+    'amazon': 'scraper.amazon_scraper:AmazonScraper',
+    'flipkart': 'scraper.flipkart_scraper:FlipkartScraper',
+    'myntra': 'scraper.myntra_scraper:MyntraScraper',
+    'ajio': 'scraper.ajio_scraper:AjioScraper',
+}
+
+# Platform -> status of the built-in placeholders, whose scrape() only
+# raises. Kept here rather than on the classes so reading it imports
+# nothing; every other platform (installed plugins included) is
+# 'implemented'.
+BUILTIN_STATUS = {
+    'flipkart': 'coming_soon',
+    'myntra': 'coming_soon',
+    'ajio': 'coming_soon',
+}
+
+# Installed packages can add (or replace) platforms with an entry point in
+# this group, e.g. ``nykaa = nykaa_scraper:NykaaScraper``
+ENTRY_POINT_GROUP = 'price_scraper.scrapers'
+
+
+def load_class(spec: Union[str, type]) -> type:
+    """Import a ``"module:Class"`` spec (classes are returned as is)."""
+    if not isinstance(spec, str):
+        return spec
+    module, _, name = spec.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def entry_point_specs(group: str = ENTRY_POINT_GROUP) -> Dict[str, str]:
+    """Platform -> spec for the scrapers installed packages declare under ``group``."""
+    from importlib.metadata import entry_points
+    try:
+        found = entry_points(group=group)
+    except TypeError:
+        # Python < 3.10: entry_points() returns a dict of groups
+        found = entry_points().get(group, ())
+    return {entry_point.name: entry_point.value for entry_point in found}
+
+
+class ScraperRegistry(Mapping):
+    """
+    Read-only mapping of platform name to scraper instance.
+
+    Platform names are known up front, but a scraper's module (and with it
+    bs4, lxml and the platform's selectors) is only imported, and the
+    scraper constructed with ``options``, the first time it is looked up.
+    ``warm`` does that in a background thread for the platforms expected to
+    be used, so the first request does not pay for it.
+
+    Membership tests, iteration and ``status`` never load a scraper. Installed
+    packages' entry points are only looked up on first use (or by ``warm``),
+    since scanning package metadata takes tens of milliseconds.
+    """
+
+    def __init__(
+        self,
+        options: Optional[Dict] = None,
+        specs: Optional[Dict[str, Union[str, type]]] = None,
+        entry_points: bool = True,
+        statuses: Optional[Dict[str, str]] = None,
+    ):
+        self.options = dict(options or {})
+        self.specs: Dict[str, Union[str, type]] = dict(BUILTIN_SCRAPERS if specs is None else specs)
+        self.statuses: Dict[str, str] = dict(BUILTIN_STATUS if statuses is None else statuses)
+        self._discover = entry_points
+        self._registered = set()
+        self.load_seconds: Dict[str, float] = {}
+        self.warm_seconds: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self._classes: Dict[str, type] = {}
+        self._unavailable = set()
+        self._scrapers: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, spec: Union[str, type], status: str = 'implemented'):
+        """Add or replace a platform (before it is first loaded)."""
+        self.specs[name] = spec
+        self.statuses[name] = status
+        self._registered.add(name)
+
+    def _known(self) -> Dict[str, Union[str, type]]:
+        if self._discover:
+            with self._lock:
+                if self._discover:
+                    for name, spec in entry_point_specs().items():
+                        if name not in self._registered:
+                            self.specs[name] = spec
+                            # A plugin replacing a placeholder implements it
+                            self.statuses.pop(name, None)
+                    self._discover = False
+        return self.specs
+
+    def scraper_class(self, name: str) -> type:
+        """Import a platform's scraper class without constructing it."""
+        cls = self._classes.get(name)
+        if cls is None:
+            if name not in self._known():
+                raise KeyError(name)
+            try:
+                cls = self._classes[name] = load_class(self.specs[name])
+            except Exception as e:
+                self.errors[name] = f"{type(e).__name__}: {e}"
+                self._unavailable.add(name)
+                raise
+            self._unavailable.discard(name)
+        return cls
+
+    def status(self, name: str) -> str:
+        """
+        A platform's status: ``'implemented'`` or ``'coming_soon'``.
+
+        Read from ``statuses`` without importing the scraper; installed
+        plugins count as implemented. Returns ``'unavailable'`` (with the
+        reason in ``errors``) once importing the scraper has failed, and
+        ``'unknown'`` for names that are not registered.
+        """
+        if name not in self._known():
+            return 'unknown'
+        if name in self._unavailable:
+            return 'unavailable'
+        return self.statuses.get(name, 'implemented')
+
+    def __getitem__(self, name: str):
+        scraper = self._scrapers.get(name)
+        if scraper is not None:
+            return scraper
+        if name not in self._known():
+            raise KeyError(name)
+        with self._lock:
+            scraper = self._scrapers.get(name)
+            if scraper is None:
+                started = time.perf_counter()
+                scraper = self.scraper_class(name)(**self.options)
+                self.load_seconds[name] = time.perf_counter() - started
+                self._scrapers[name] = scraper
+        return scraper
+
+    def __contains__(self, name) -> bool:
+        return name in self._known()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._known()))
+
+    def __len__(self) -> int:
+        return len(self._known())
+
+    def loaded(self) -> Dict[str, object]:
+        """The scrapers constructed so far."""
+        return dict(self._scrapers)
+
+    def warm(
+        self,
+        names: Optional[Iterable[str]] = None,
+        background: bool = True,
+        status: Optional[str] = None,
+    ) -> Optional[threading.Thread]:
+        """
+        Load scrapers ahead of their first request.
+
+        Each scraper is constructed and its ``warm()`` run (which imports the
+        parser backend and compiles selectors). Failures are recorded in
+        ``errors`` rather than raised, so a broken plugin cannot stop startup.
+
+        Args:
+            names: Platforms to load (default all); unknown names are ignored
+            background: Load in a daemon thread instead of blocking
+            status: Only load platforms with this ``status`` (e.g.
+                ``'implemented'``)
+
+        Returns:
+            The loading thread, or None if ``background`` is False
+        """
+        def run():
+            known = self._known()
+            for name in (known if names is None else names):
+                if name not in known or (status is not None and self.status(name) != status):
+                    continue
+                started = time.perf_counter()
+                try:
+                    scraper = self[name]
+                    warm = getattr(scraper, 'warm', None)
+                    if warm is not None:
+                        warm()
+                except Exception as e:
+                    self.errors[name] = f"{type(e).__name__}: {e}"
+                    continue
+                self.warm_seconds[name] = time.perf_counter() - started
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name='scraper-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> Dict:
+        return {
+            'platforms': list(self._known()),
+            'loaded': list(self._scrapers),
+            'load_seconds': {name: round(seconds, 4) for name, seconds in self.load_seconds.items()},
+            'warm_seconds': {name: round(seconds, 4) for name, seconds in self.warm_seconds.items()},
+            'errors': dict(self.errors),
+        }
@@ -0,0 +1,396 @@
+"""Retries with backoff and hedged requests for page fetches."""
+
+import asyncio
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class FetchError(Exception):
+    """
+    A page could not be downloaded.
+
+    ``retriable`` is set for failures worth another attempt: connection
+    errors, timeouts and 5xx responses.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retriable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retriable = retriable
+
+
+class AttemptCancelled(Exception):
+    """A hedged attempt was abandoned because the other request finished first."""
+
+
+class Cancellation:
+    """
+    Lets a fetch attempt running in one thread be abandoned from another.
+
+    The attempt registers cleanup with ``on_cancel`` (e.g. closing its
+    response, so its next read fails instead of downloading the rest of a
+    page nobody will use) and wraps its work in ``with cancellation:``,
+    which turns whatever the cleanup makes it fail with into
+    ``AttemptCancelled``.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Run ``callback`` on ``cancel`` (at once if already cancelled)."""
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self):
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def __enter__(self) -> 'Cancellation':
+        if self.cancelled:
+            raise AttemptCancelled('Attempt cancelled')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None and self.cancelled and not isinstance(exc, AttemptCancelled):
+            raise AttemptCancelled('Attempt cancelled') from exc
+
+
+class LatencyTracker:
+    """Recent fetch latencies per host, for picking a hedging delay."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, host: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(host)
+            if samples is None:
+                samples = self._samples[host] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, host: str, q: float, min_samples: int = 20) -> Optional[float]:
+        """The ``q`` quantile (0-1) of recent latencies, or None with too few samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(host, ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+    def stats(self) -> Dict:
+        return {
+            host: {'p50': self.percentile(host, 0.5, 1), 'p95': self.percentile(host, 0.95, 1)}
+            for host in list(self._samples)
+        }
+
+
+class _NoPermit:
+    """Permit used when the caller has no rate limiter: never waits, never refuses."""
+
+    def try_acquire(self) -> bool:
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
+def _abandon(permit):
+    """Give back a permit taken for an attempt that was cancelled before it started."""
+    try:
+        with permit:
+            raise AttemptCancelled('Attempt cancelled')
+    except AttemptCancelled:
+        pass
+
+
+class RetryPolicy:
+    """
+    How page fetches are retried and hedged.
+
+    A failed attempt is retried up to ``attempts - 1`` times if the error is
+    retriable, sleeping a random time between 0 and
+    ``min(max_backoff, backoff * 2 ** retry)`` first ("full jitter", so
+    workers that failed together do not retry together).
+
+    Each attempt runs under a permit (see ``call``), normally the host's
+    rate limiter slot. Latencies are measured from when the permit is
+    granted, so time spent queued behind the limiter is neither recorded
+    nor a reason to hedge.
+
+    With hedging on, an attempt still running after the hedge delay gets a
+    second, identical request and whichever finishes first wins; the other
+    one is cancelled. The hedge only goes out if its permit is available at
+    once: a host with no request to spare is not sent a duplicate. The
+    delay is ``hedge_after`` seconds, or with ``hedge_after='auto'`` the
+    host's recent p95 latency (no hedging until enough samples are
+    collected), so only the slowest ~5% of requests are duplicated.
+
+    Hedged attempts run on a pool of ``hedge_workers`` threads so the
+    calling thread can return whichever answers first. Each hedged fetch
+    uses up to two of them, so size the pool at twice the number of threads
+    calling ``call`` (fetches queued for a pool thread are not hedged
+    early: the delay counts from when the first attempt starts).
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        hedge_after=None,
+        hedge_workers: int = 16,
+    ):
+        self.attempts = max(attempts, 1)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.hedge_after = hedge_after
+        self.hedge_workers = hedge_workers
+        self.latency = LatencyTracker()
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def timeout(self):
+        """(connect, read) timeout for ``requests``."""
+        return self.connect_timeout, self.read_timeout
+
+    def delay(self, retry: int) -> float:
+        """Seconds to sleep before retry number ``retry`` (0-based)."""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** retry))
+
+    def hedge_delay(self, host: str) -> Optional[float]:
+        """Seconds after which to hedge a request to ``host``, or None to not hedge."""
+        if not self.hedge_after:
+            return None
+        if self.hedge_after == 'auto':
+            return self.latency.percentile(host, 0.95)
+        return float(self.hedge_after)
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.hedge_workers, thread_name_prefix='hedge')
+            return self._executor
+
+    def call(
+        self,
+        host: str,
+        attempt: Callable[[Cancellation], T],
+        permit: Optional[Callable[[], object]] = None,
+    ) -> T:
+        """
+        Run a blocking fetch attempt with retries and hedging.
+
+        Args:
+            host: Host the attempt talks to (for latency tracking)
+            attempt: Performs one fetch; raises ``FetchError`` on failure.
+                It is passed the ``Cancellation`` used to abandon it if it
+                loses a hedge race
+            permit: Returns the context manager each attempt runs under,
+                e.g. a rate limiter ``Permit``; if it has a ``try_acquire``
+                method, hedges are only sent when that succeeds
+
+        Returns:
+            The first successful attempt's result
+        """
+        permit = permit or _NoPermit
+        for retry in range(self.attempts):
+            try:
+                return self._hedged(host, attempt, permit)
+            except FetchError as e:
+                if not e.retriable or retry == self.attempts - 1:
+                    raise
+                self._count('retries')
+                time.sleep(self.delay(retry))
+
+    def _attempt(
+        self,
+        host: str,
+        attempt: Callable[[Cancellation], T],
+        permit,
+        cancellation: Cancellation,
+        started: Optional[threading.Event] = None,
+    ) -> T:
+        """One attempt under ``permit``; ``started`` is set once the permit is granted (or the attempt failed)."""
+        try:
+            with permit, cancellation:
+                if started is not None:
+                    started.set()
+                began = time.monotonic()
+                result = attempt(cancellation)
+        finally:
+            if started is not None:
+                started.set()
+        self.latency.record(host, time.monotonic() - began)
+        return result
+
+    def _hedged(self, host: str, attempt: Callable[[Cancellation], T], permit: Callable[[], object]) -> T:
+        delay = self.hedge_delay(host)
+        if delay is None:
+            return self._attempt(host, attempt, permit(), Cancellation())
+        executor = self._hedge_executor()
+        started = threading.Event()
+        first_cancellation, second_cancellation = Cancellation(), Cancellation()
+        first = executor.submit(self._attempt, host, attempt, permit(), first_cancellation, started)
+        # Time the hedge from when the request goes out, not from when it
+        # was queued for a pool thread or for its permit
+        started.wait()
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        hedge_permit = permit()
+        try_acquire = getattr(hedge_permit, 'try_acquire', None)
+        if try_acquire is not None and not try_acquire():
+            # The host has no request to spare: leave it to the first attempt
+            return first.result()
+        self._count('hedges')
+        second = executor.submit(self._attempt, host, attempt, hedge_permit, second_cancellation)
+        cancellations = {first: first_cancellation, second: second_cancellation}
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if future is second:
+                            self._count('hedge_wins')
+                        return future.result()
+                    error = future.exception()
+            raise error
+        finally:
+            # A running loser has its response closed and gives back its
+            # permit; a hedge still queued for a thread never starts, so its
+            # permit is given back here
+            for future in pending:
+                if future.cancel():
+                    _abandon(hedge_permit)
+                cancellations[future].cancel()
+
+    async def call_async(
+        self,
+        host: str,
+        attempt: Callable[[], Awaitable[T]],
+        permit: Optional[Callable[[], object]] = None,
+    ) -> T:
+        """Async version of ``call``; the losing hedged request is cancelled."""
+        permit = permit or _NoPermit
+        for retry in range(self.attempts):
+            try:
+                return await self._hedged_async(host, attempt, permit)
+            except FetchError as e:
+                if not e.retriable or retry == self.attempts - 1:
+                    raise
+                self._count('retries')
+                await asyncio.sleep(self.delay(retry))
+
+    async def _attempt_async(
+        self,
+        host: str,
+        attempt: Callable[[], Awaitable[T]],
+        permit,
+        started: Optional[asyncio.Event] = None,
+    ) -> T:
+        """Async version of ``_attempt``."""
+        try:
+            async with permit:
+                if started is not None:
+                    started.set()
+                began = time.monotonic()
+                result = await attempt()
+        finally:
+            if started is not None:
+                started.set()
+        self.latency.record(host, time.monotonic() - began)
+        return result
+
+    async def _hedged_async(self, host: str, attempt: Callable[[], Awaitable[T]], permit: Callable[[], object]) -> T:
+        delay = self.hedge_delay(host)
+        if delay is None:
+            return await self._attempt_async(host, attempt, permit())
+        started = asyncio.Event()
+        first = asyncio.ensure_future(self._attempt_async(host, attempt, permit(), started))
+        try:
+            await started.wait()
+            done, _ = await asyncio.wait({first}, timeout=delay)
+        except asyncio.CancelledError:
+            first.cancel()
+            raise
+        if done:
+            return first.result()
+        hedge_permit = permit()
+        try_acquire = getattr(hedge_permit, 'try_acquire', None)
+        if try_acquire is not None and not try_acquire():
+            return await first
+        self._count('hedges')
+        second_started = asyncio.Event()
+        second = asyncio.ensure_future(self._attempt_async(host, attempt, hedge_permit, second_started))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._count('hedge_wins')
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+                if task is second and not second_started.is_set():
+                    # Cancelled before it ran, so it never entered its permit
+                    _abandon(hedge_permit)
+
+    def stats(self) -> Dict:
+        return {
+            'attempts': self.attempts,
+            'hedge_after': self.hedge_after,
+            'retries': self.retries,
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'latency': self.latency.stats(),
+        }
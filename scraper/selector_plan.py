@@ -0,0 +1,168 @@
+"""Declarative, precompiled extraction rules evaluated in one pass over the DOM."""
+
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import soupsieve
+from bs4 import Tag
+from .lxml_node import LxmlNode
+
+
+# Rightmost compound selector, e.g. "img#landingImage" in "#imageBlock img#landingImage"
+COMPOUND_RE = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)?((?:[#.][\w-]+)*)$')
+
+
+class FieldRule(NamedTuple):
+    """
+    Extraction rule for one field.
+
+    ``selectors`` are tried in order. ``extract`` receives the first element
+    matching a selector and returns ``(outputs, done)``: ``outputs`` is merged
+    into the result, and ``done`` stops trying the remaining selectors.
+    """
+    name: str
+    selectors: Tuple[str, ...]
+    extract: Callable[[Any], Tuple[Dict[str, Any], bool]]
+
+
+class SelectorPlan:
+    """
+    A set of ``FieldRule`` objects compiled once, at construction.
+
+    On BeautifulSoup documents all selectors are matched in a single walk
+    over the tree: each selector is indexed by the id, class or tag of its
+    rightmost element, so an element is only tested against selectors that
+    could match it, and the walk stops once every selector has been found.
+    On ``LxmlNode`` documents each selector runs on demand as a cached
+    compiled XPath, which lxml evaluates in C.
+    """
+
+    def __init__(self, rules: Iterable[FieldRule]):
+        self.rules = tuple(rules)
+        self.fields = tuple(rule.name for rule in self.rules)
+        self.selectors = tuple(dict.fromkeys(s for rule in self.rules for s in rule.selectors))
+        self._compiled = {s: soupsieve.compile(s) for s in self.selectors}
+        self._by_id: Dict[str, List[str]] = {}
+        self._by_class: Dict[str, List[str]] = {}
+        self._by_tag: Dict[str, List[str]] = {}
+        self._unindexed: List[str] = []
+        for selector in self.selectors:
+            self._index(selector)
+
+    def _index(self, selector: str):
+        match = COMPOUND_RE.search(selector.strip())
+        if not match or not (match.group(1) or match.group(2)):
+            self._unindexed.append(selector)
+            return
+        tag, qualifiers = match.group(1), match.group(2)
+        ids = re.findall(r'#([\w-]+)', qualifiers)
+        classes = re.findall(r'\.([\w-]+)', qualifiers)
+        if ids:
+            self._by_id.setdefault(ids[0], []).append(selector)
+        elif classes:
+            self._by_class.setdefault(classes[0], []).append(selector)
+        else:
+            self._by_tag.setdefault(tag.lower(), []).append(selector)
+
+    def _selectors_for(self, fields: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        if fields is None:
+            return self.selectors
+        wanted = set(fields)
+        return tuple(dict.fromkeys(s for rule in self.rules if rule.name in wanted for s in rule.selectors))
+
+    def first_matches(self, root, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Find the first element (in document order) matching each selector.
+
+        Args:
+            root: BeautifulSoup document/tag or LxmlNode
+            fields: Only the selectors of these fields (default: all)
+
+        Returns:
+            Mapping of selector to its first matching element; selectors
+            without a match are absent
+        """
+        selectors = self._selectors_for(fields)
+        found: Dict[str, Any] = {}
+        if isinstance(root, LxmlNode):
+            for selector in selectors:
+                node = root.select_one(selector)
+                if node is not None:
+                    found[selector] = node
+            return found
+
+        wanted = set(selectors)
+        compiled = self._compiled
+        by_id, by_class, by_tag, unindexed = self._by_id, self._by_class, self._by_tag, self._unindexed
+        for element in root.descendants:
+            if not isinstance(element, Tag):
+                continue
+            attrs = element.attrs
+            candidates = list(unindexed)
+            element_id = attrs.get('id')
+            if element_id in by_id:
+                candidates.extend(by_id[element_id])
+            for cls in attrs.get('class', ()):
+                if cls in by_class:
+                    candidates.extend(by_class[cls])
+            if element.name in by_tag:
+                candidates.extend(by_tag[element.name])
+            for selector in candidates:
+                if selector in wanted and selector not in found and compiled[selector].match(element):
+                    found[selector] = element
+                    if len(found) == len(wanted):
+                        return found
+        return found
+
+    def evaluate(
+        self,
+        root,
+        fields: Optional[Iterable[str]] = None,
+        hits: Optional[Dict[str, int]] = None,
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Evaluate the rules against a document.
+
+        Args:
+            root: BeautifulSoup document/tag or LxmlNode
+            fields: Only evaluate these fields (default: all)
+            hits: If given, filled with the index of the selector that
+                completed each field (0 = primary selector)
+            timings: If given, filled with the seconds spent on each field
+                (on BeautifulSoup, after the shared walk that finds the
+                elements)
+
+        Returns:
+            Merged outputs of every rule; fields with no matching element
+            are absent
+        """
+        if isinstance(root, LxmlNode):
+            # Compiled XPath is cheap per selector; only run the ones needed
+            matches: Dict[str, Any] = {}
+
+            def lookup(selector):
+                if selector not in matches:
+                    matches[selector] = root.select_one(selector)
+                return matches[selector]
+        else:
+            lookup = self.first_matches(root, fields).get
+        values: Dict[str, Any] = {}
+        for rule in self.rules:
+            if fields is not None and rule.name not in fields:
+                continue
+            if timings is not None:
+                started = time.perf_counter()
+            for index, selector in enumerate(rule.selectors):
+                node = lookup(selector)
+                if node is None:
+                    continue
+                outputs, done = rule.extract(node)
+                values.update(outputs)
+                if done:
+                    if hits is not None:
+                        hits[rule.name] = index
+                    break
+            if timings is not None:
+                timings[rule.name] = time.perf_counter() - started
+        return values
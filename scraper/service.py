@@ -0,0 +1,189 @@
+"""The scrape path shared by the API servers."""
+
+import math
+import os
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from .cache import ResultCache, SingleFlight, cache_key
+from .ratelimit import BlockedError, RateLimiter, Throttled
+from .retry import FetchError, RetryPolicy
+from .shared_cache import SharedResultCache
+
+
+def rate_limiter_from_env() -> Optional[RateLimiter]:
+    """
+    Per-host rate limiter configured from the environment.
+
+    Each host gets RATE_LIMIT_RPS requests per second (bursts of up to
+    RATE_LIMIT_BURST) and an adaptive concurrency limit between
+    HOST_MIN_CONCURRENCY and HOST_MAX_CONCURRENCY, starting at
+    HOST_INITIAL_CONCURRENCY; it is halved when a host throttles us and
+    grows back while requests succeed. A captcha page pauses the host for
+    BLOCK_PAUSE seconds.
+
+    Returns:
+        The limiter, or None with RATE_LIMIT_RPS=0 (limiting off)
+    """
+    rate = float(os.getenv('RATE_LIMIT_RPS', 5))
+    if rate <= 0:
+        return None
+    return RateLimiter(
+        rate=rate,
+        burst=float(os.getenv('RATE_LIMIT_BURST', 10)),
+        initial_concurrency=int(os.getenv('HOST_INITIAL_CONCURRENCY', 4)),
+        min_concurrency=int(os.getenv('HOST_MIN_CONCURRENCY', 1)),
+        max_concurrency=int(os.getenv('HOST_MAX_CONCURRENCY', 16)),
+        block_pause=float(os.getenv('BLOCK_PAUSE', 30)),
+    )
+
+
+def retry_policy_from_env(fetch_threads: int) -> RetryPolicy:
+    """
+    Download retry and hedging policy configured from the environment.
+
+    Downloads time out after FETCH_CONNECT_TIMEOUT / FETCH_READ_TIMEOUT, and
+    failed connections, timeouts and 5xx responses are retried FETCH_RETRIES
+    times with jittered exponential backoff (FETCH_BACKOFF, capped at
+    FETCH_MAX_BACKOFF). HEDGE_AFTER (seconds, or "auto" for the host's p95
+    latency) sends a second request when the first is slow and uses
+    whichever answers first.
+
+    Args:
+        fetch_threads: Threads that fetch pages; hedged attempts run on
+            their own pool of two threads per fetching thread
+    """
+    hedge_after = os.getenv('HEDGE_AFTER', '').lower() or None
+    return RetryPolicy(
+        attempts=int(os.getenv('FETCH_RETRIES', 2)) + 1,
+        backoff=float(os.getenv('FETCH_BACKOFF', 0.5)),
+        max_backoff=float(os.getenv('FETCH_MAX_BACKOFF', 8)),
+        connect_timeout=float(os.getenv('FETCH_CONNECT_TIMEOUT', 3.05)),
+        read_timeout=float(os.getenv('FETCH_READ_TIMEOUT', 10)),
+        hedge_after=hedge_after if hedge_after in (None, 'auto') else float(hedge_after),
+        hedge_workers=2 * fetch_threads,
+    )
+
+
+def error_status(error: Exception, paused_for: float = 0.0) -> Tuple[int, Optional[str]]:
+    """
+    HTTP status and Retry-After header value for a failed scrape.
+
+    A captcha page is 503 and a throttled request 429, both with a
+    Retry-After of when the host will be tried again; a failed download is
+    502 and anything else 500.
+
+    Args:
+        error: Exception the scrape raised
+        paused_for: Seconds until the rate limiter resumes requests to the
+            host, if longer than the error's own ``retry_after``
+
+    Returns:
+        (status code, Retry-After value or None)
+    """
+    if isinstance(error, Throttled):
+        retry_after = max(error.retry_after or 0, paused_for)
+        header = str(max(math.ceil(retry_after), 1)) if retry_after else None
+        return (503 if isinstance(error, BlockedError) else 429), header
+    if isinstance(error, FetchError):
+        return 502, None
+    return 500, None
+
+
+class ScrapeService:
+    """
+    Cached and coalesced scrapes, the path every scrape endpoint goes through.
+
+    A result is served from the in-process ``ResultCache`` if present;
+    otherwise concurrent requests for the same product share one scrape
+    (``SingleFlight``) and, with a ``SharedResultCache``, so do the worker
+    processes of the host. ``run`` does the actual scrape with whatever
+    engine the server uses.
+
+    ``on_result(platform, url, result, fresh)`` is called once per scrape
+    that fills the cache; ``fresh`` is False for results another process
+    scraped.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[str, str, Optional[str], Optional[tuple]], Awaitable[Dict]],
+        result_cache: Optional[ResultCache] = None,
+        shared_cache: Optional[SharedResultCache] = None,
+        on_result: Optional[Callable[[str, str, Dict, bool], None]] = None,
+    ):
+        self.run = run
+        self.result_cache = result_cache or ResultCache()
+        self.shared_cache = shared_cache
+        self.on_result = on_result
+        self.inflight = SingleFlight()
+
+    @classmethod
+    def from_env(
+        cls,
+        run: Callable[[str, str, Optional[str], Optional[tuple]], Awaitable[Dict]],
+        on_result: Optional[Callable[[str, str, Dict, bool], None]] = None,
+    ) -> 'ScrapeService':
+        """
+        Service with caches configured from the environment.
+
+        Results are cached for RESULT_CACHE_TTL seconds, up to
+        RESULT_CACHE_SIZE of them. With several worker processes
+        (uvicorn/gunicorn --workers), SHARED_CACHE_PATH names one SQLite
+        file through which the workers share results, and a product is
+        scraped by one worker at a time: the others wait up to
+        SHARED_CACHE_LEASE seconds for its result.
+        """
+        ttl = float(os.getenv('RESULT_CACHE_TTL', 300))
+        result_cache = ResultCache(maxsize=int(os.getenv('RESULT_CACHE_SIZE', 1024)), ttl=ttl)
+        shared_path = os.getenv('SHARED_CACHE_PATH')
+        shared_cache = SharedResultCache(
+            shared_path, ttl=ttl, lease=float(os.getenv('SHARED_CACHE_LEASE', 60)),
+        ) if shared_path else None
+        return cls(run, result_cache, shared_cache, on_result)
+
+    async def scrape(
+        self,
+        platform: str,
+        url: str,
+        profile: Optional[str] = None,
+        fields: Optional[tuple] = None,
+    ) -> Tuple[Dict, str]:
+        """
+        Scrape a product, or reuse a cached or in-flight scrape of it.
+
+        Args:
+            platform: Scraper platform name
+            url: Canonical product URL
+            profile: Fetch profile (see ``BaseScraper.fetch_page``)
+            fields: Only extract these fields
+
+        Returns:
+            (result, cache status) where the status is ``HIT``, ``MISS``,
+            ``COALESCED`` (shared an in-flight scrape) or ``SHARED`` (from
+            another worker process)
+        """
+        key = cache_key(platform, url, profile, fields)
+        result = self.result_cache.get(key)
+        if result is not None:
+            return result, 'HIT'
+
+        async def scrape():
+            return await self.run(platform, url, profile, fields)
+
+        async def scrape_and_store():
+            if self.shared_cache is None:
+                result, status = await scrape(), 'MISS'
+            else:
+                # Another worker process may have the result, or be scraping it
+                result, shared = await self.shared_cache.do(key, scrape)
+                status = 'SHARED' if shared else 'MISS'
+            if self.on_result is not None:
+                self.on_result(platform, url, result, status == 'MISS')
+            self.result_cache.set(key, result)
+            return result, status
+
+        (result, status), coalesced = await self.inflight.do(key, scrape_and_store)
+        return result, 'COALESCED' if coalesced else status
+
+    def stats(self) -> Dict:
+        """In-process cache and coalescing counters (see ``shared_cache.stats`` for the shared cache)."""
+        return {**self.result_cache.stats(), **self.inflight.stats()}
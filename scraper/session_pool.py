@@ -0,0 +1,127 @@
+"""Thread-safe pool of HTTP sessions shared by scraper workers."""
+
+from contextlib import contextmanager
+import os
+import queue
+import threading
+from typing import Dict, Iterator, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+
+SESSION_MODES = ('thread', 'pooled')
+
+
+class SessionPool:
+    """
+    Hands out ``requests.Session`` objects so no session is used by two
+    threads at once.
+
+    In ``thread`` mode every worker thread gets its own session, created on
+    first use. In ``pooled`` mode up to ``max_sessions`` sessions are checked
+    out and returned around each request, blocking when all are busy; size it
+    to the executor's ``max_workers``.
+
+    Every session mounts an ``HTTPAdapter`` keeping ``pool_maxsize``
+    keep-alive connections per host for ``pool_connections`` hosts.
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        max_sessions: int = 6,
+        pool_connections: int = 10,
+        pool_maxsize: Optional[int] = None,
+    ):
+        self.mode = mode or os.getenv('SCRAPER_SESSION_MODE', 'thread')
+        if self.mode not in SESSION_MODES:
+            raise ValueError(f"Unknown session mode: {self.mode}. Supported: {list(SESSION_MODES)}")
+        self.max_sessions = max_sessions
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize or int(os.getenv('SCRAPER_POOL_MAXSIZE', 10))
+        self._sessions: List[requests.Session] = []
+        self._reserved = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._idle: 'queue.LifoQueue[requests.Session]' = queue.LifoQueue()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        with self._lock:
+            self._sessions.append(session)
+        return session
+
+    @contextmanager
+    def session(self) -> Iterator[requests.Session]:
+        """
+        Borrow a session for the current thread.
+
+        Yields:
+            Session that no other thread uses until the block exits
+        """
+        if self.mode == 'thread':
+            session = getattr(self._local, 'session', None)
+            if session is None:
+                session = self._local.session = self._new_session()
+            yield session
+            return
+
+        try:
+            session = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_grow = self._reserved < self.max_sessions
+                if can_grow:
+                    self._reserved += 1
+            session = self._new_session() if can_grow else self._idle.get()
+        try:
+            yield session
+        finally:
+            self._idle.put(session)
+
+    def stats(self) -> Dict:
+        """
+        Connection usage across all sessions.
+
+        Returns:
+            Dictionary with the session count and, per host, the number of
+            requests sent, connections opened and requests served over a
+            reused keep-alive connection
+        """
+        with self._lock:
+            sessions = list(self._sessions)
+        hosts: Dict[str, Dict[str, int]] = {}
+        for session in sessions:
+            for adapter in {id(a): a for a in session.adapters.values()}.values():
+                manager = getattr(adapter, 'poolmanager', None)
+                if manager is None:
+                    continue
+                for key in manager.pools.keys():
+                    pool = manager.pools.get(key)
+                    if pool is None:
+                        continue
+                    host = hosts.setdefault(pool.host, {'requests': 0, 'connections': 0, 'reused': 0})
+                    host['requests'] += pool.num_requests
+                    host['connections'] += pool.num_connections
+        for host in hosts.values():
+            host['reused'] = max(host['requests'] - host['connections'], 0)
+        return {
+            'mode': self.mode,
+            'sessions': len(sessions),
+            'max_sessions': self.max_sessions if self.mode == 'pooled' else None,
+            'pool_maxsize': self.pool_maxsize,
+            'hosts': hosts,
+        }
+
+    def close(self):
+        """Close every session and its connections."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+            self._reserved = 0
+            self._idle = queue.LifoQueue()
+            self._local = threading.local()
+        for session in sessions:
+            session.close()
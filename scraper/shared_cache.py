@@ -0,0 +1,204 @@
+"""Scrape result cache and in-flight locks shared by the processes of one host."""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+-- A row per scrape in progress; other processes wait for its result
+-- instead of scraping the same product
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class SharedResultCache:
+    """
+    SQLite-backed result cache that several worker processes use together.
+
+    With ``uvicorn --workers N`` (or gunicorn) every worker has its own
+    in-memory ``ResultCache`` and ``SingleFlight``, so each one would scrape
+    a product the others already have. Pointing every worker at the same
+    database file lets them share results, and ``do`` takes a lease on a key
+    before scraping it: a worker finding the lease held waits for the
+    owner's result instead of scraping too. A lease expires after ``lease``
+    seconds, so a worker that dies mid-scrape does not block the key.
+
+    Values are stored as JSON and expire ``ttl`` seconds after being set.
+    Connections are per thread, with WAL journaling so readers never block
+    the writer.
+    """
+
+    def __init__(self, path: str, ttl: float = 300.0, lease: float = 60.0, poll_interval: float = 0.05):
+        self.path = path
+        self.ttl = ttl
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self._sets = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conn().executescript(SCHEMA)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return json.dumps(key, separators=(',', ':'))
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key (a JSON-serializable tuple, e.g. from ``cache_key``)
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        row = self._conn().execute(
+            'SELECT value FROM results WHERE key = ? AND expires_at > ?', (self._key(key), time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Store a value for ``ttl`` seconds.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)',
+                (self._key(key), json.dumps(value, separators=(',', ':')), now + self.ttl),
+            )
+            with self._lock:
+                self._sets += 1
+                purge = self._sets % 256 == 0
+            if purge:
+                conn.execute('DELETE FROM results WHERE expires_at <= ?', (now,))
+                conn.execute('DELETE FROM leases WHERE expires_at <= ?', (now,))
+
+    def acquire(self, key: Hashable) -> Optional[str]:
+        """
+        Take the lease on a key unless another live owner holds it.
+
+        Returns:
+            Owner token to pass to ``release``, or None if the lease is held
+        """
+        owner = uuid.uuid4().hex
+        now = time.time()
+        with self._conn() as conn:
+            cursor = conn.execute(
+                'INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+                'WHERE leases.expires_at <= ?',
+                (self._key(key), owner, now + self.lease, now),
+            )
+        return owner if cursor.rowcount == 1 else None
+
+    def release(self, key: Hashable, owner: str):
+        """Give up a lease taken with ``acquire`` (a no-op if it expired and was taken over)."""
+        with self._conn() as conn:
+            conn.execute('DELETE FROM leases WHERE key = ? AND owner = ?', (self._key(key), owner))
+
+    def _pending(self, key: Hashable) -> bool:
+        """Whether a live lease is held on the key and its result is not stored yet."""
+        leased = self._conn().execute(
+            'SELECT 1 FROM leases WHERE key = ? AND expires_at > ?', (self._key(key), time.time()),
+        ).fetchone() is not None
+        return leased and self.get(key) is None
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Return the cached value for ``key``, or compute it with ``fn`` once across processes.
+
+        The database calls run in the event loop's default executor, since
+        they can wait up to the connection timeout for another process's
+        write.
+
+        Args:
+            key: Cache key
+            fn: Coroutine function producing the value; it is cached on success
+
+        Returns:
+            (value, shared) where ``shared`` is True if the value came from
+            the cache or from another process's call
+        """
+        loop = asyncio.get_running_loop()
+        waited = False
+        while True:
+            value = await loop.run_in_executor(None, self.get, key)
+            if value is not None:
+                self._count('waits' if waited else 'hits')
+                return value, True
+            owner = await loop.run_in_executor(None, self.acquire, key)
+            if owner is not None:
+                break
+            # Another process is producing it: wait until its result is
+            # stored or its lease goes away (failed, or the process died)
+            waited = True
+            while await loop.run_in_executor(None, self._pending, key):
+                await asyncio.sleep(self.poll_interval)
+        try:
+            # The previous owner may have stored its result just before we
+            # got the lease
+            value = await loop.run_in_executor(None, self.get, key)
+            if value is not None:
+                self._count('waits' if waited else 'hits')
+                return value, True
+            self._count('misses')
+            value = await fn()
+            await loop.run_in_executor(None, self.set, key, value)
+        finally:
+            await loop.run_in_executor(None, self.release, key, owner)
+        return value, False
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        now = time.time()
+        size = conn.execute('SELECT COUNT(*) FROM results WHERE expires_at > ?', (now,)).fetchone()[0]
+        leases = conn.execute('SELECT COUNT(*) FROM leases WHERE expires_at > ?', (now,)).fetchone()[0]
+        return {
+            'size': size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'waits': self.waits,
+            'leases': leases,
+        }
@@ -0,0 +1,66 @@
+"""Incremental reading of a response body until the needed elements have arrived."""
+
+from typing import Iterable, List, Sequence
+from lxml import etree
+
+
+# Bytes read from the socket per chunk when streaming
+CHUNK_SIZE = 16 * 1024
+
+
+class RegionWatcher:
+    """
+    Feed a page body chunk by chunk and report when it can stop.
+
+    ``groups`` is a list of id groups (e.g. the ids of the title region, the
+    ids of the price region). The watcher runs an incremental lxml HTML
+    parser over the chunks and is done once, for every group, an element
+    with one of its ids has been closed, i.e. received in full.
+
+    The parser is only given data up to the last ``>`` of what has arrived:
+    libxml2's HTML push parser stops reporting elements for the rest of the
+    document once a chunk ends in the middle of a tag, which would make the
+    watcher read every page to the end.
+    """
+
+    def __init__(self, groups: Sequence[Iterable[str]]):
+        self._pending: List[frozenset] = [frozenset(group) for group in groups]
+        self._parser = etree.HTMLPullParser(events=('end',))
+        self._chunks: List[bytes] = []
+        # Bytes after the last '>' fed to the parser, held back for the next chunk
+        self._tail = b''
+        self.size = 0
+
+    @property
+    def done(self) -> bool:
+        return not self._pending
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Add the next chunk of the body.
+
+        Returns:
+            True once every group has a complete element
+        """
+        if not chunk:
+            return self.done
+        self._chunks.append(chunk)
+        self.size += len(chunk)
+        data = self._tail + chunk
+        end = data.rfind(b'>') + 1
+        self._tail = data[end:]
+        if not end:
+            return self.done
+        self._parser.feed(data[:end])
+        for _, element in self._parser.read_events():
+            element_id = element.get('id')
+            if element_id and self._pending:
+                self._pending = [group for group in self._pending if element_id not in group]
+            # Only ids are needed, so drop the subtree as it completes
+            element.clear(keep_tail=False)
+        return self.done
+
+    @property
+    def content(self) -> bytes:
+        """Body bytes read so far."""
+        return b''.join(self._chunks)
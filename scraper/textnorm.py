@@ -0,0 +1,110 @@
+"""Fast normalization of scraped text, prices and ratings."""
+
+import re
+from typing import Iterable, List, Optional
+
+
+# Invisible direction markers Amazon puts around detail labels
+INVISIBLE_MARKERS = ('\u200f', '\u200e', '\u202a', '\u202c')
+
+# First number in a price, with thousands separators in any grouping
+# ("1,299", "1,29,999.00", "12,34,567")
+PRICE_RE = re.compile(r'\d[\d,]*(?:\.\d+)?')
+RATING_RE = re.compile(r'(\d+\.?\d*)')
+
+
+def clean_text(text: Optional[str]) -> str:
+    """
+    Collapse runs of whitespace to single spaces and strip the ends.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Cleaned text, or "" for empty input
+    """
+    if not text:
+        return ''
+    # str.split() splits on exactly the characters matched by \s
+    return ' '.join(text.split())
+
+
+def remove_markers(text: str) -> str:
+    """Remove invisible unicode direction markers."""
+    # The markers are non-ASCII, so plain ASCII text needs no scan at all
+    if text.isascii():
+        return text
+    for marker in INVISIBLE_MARKERS:
+        if marker in text:
+            text = text.replace(marker, '')
+    return text
+
+
+def normalize(text: Optional[str]) -> str:
+    """
+    Remove invisible markers, collapse whitespace and strip.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalized text, or "" for empty input
+    """
+    if not text:
+        return ''
+    return ' '.join(remove_markers(text).split())
+
+
+def normalize_many(texts: Iterable[Optional[str]]) -> List[str]:
+    """
+    Normalize every string extracted from a page in one call.
+
+    Args:
+        texts: Raw strings
+
+    Returns:
+        Normalized strings, in the same order
+    """
+    return [' '.join(remove_markers(text).split()) if text else '' for text in texts]
+
+
+def parse_price(text: Optional[str]) -> Optional[float]:
+    """
+    Parse the first number in a price string.
+
+    Thousands separators are dropped whatever their grouping, so Indian
+    lakh/crore formatting parses like western formatting.
+
+    Args:
+        text: Price string (e.g. "₹1,29,999.00", "$29.99", "1,299.")
+
+    Returns:
+        Price as a float, or None if the text has no number
+    """
+    if not text:
+        return None
+    match = PRICE_RE.search(text)
+    if not match:
+        return None
+    return float(match.group().replace(',', ''))
+
+
+def parse_rating(text: Optional[str]) -> Optional[float]:
+    """
+    Parse the first number in a rating string, on a 0-5 scale.
+
+    Args:
+        text: Rating string (e.g. "4.5 out of 5 stars" or "4.5")
+
+    Returns:
+        Rating as a float (values above 5 are read as out of 50), or None
+    """
+    if not text:
+        return None
+    match = RATING_RE.search(text)
+    if not match:
+        return None
+    rating = float(match.group(1))
+    if rating > 5:
+        rating = rating / 10
+    return rating
@@ -0,0 +1,345 @@
+"""Scheduled price watching with a persistent price history."""
+
+import asyncio
+import heapq
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS watches (
+    id INTEGER PRIMARY KEY,
+    platform TEXT NOT NULL,
+    url TEXT NOT NULL,
+    interval REAL NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (platform, url)
+);
+-- Clustered by (watch_id, ts): a product's history over a time range is
+-- one contiguous range scan
+CREATE TABLE IF NOT EXISTS prices (
+    watch_id INTEGER NOT NULL REFERENCES watches(id) ON DELETE CASCADE,
+    ts INTEGER NOT NULL,
+    price REAL,
+    availability TEXT,
+    error TEXT,
+    PRIMARY KEY (watch_id, ts)
+) WITHOUT ROWID;
+"""
+
+
+class Watch(NamedTuple):
+    id: int
+    platform: str
+    url: str
+    interval: float
+    created_at: float
+
+    @property
+    def host(self) -> str:
+        return (urlsplit(self.url).hostname or '').lower()
+
+
+class PriceHistory:
+    """
+    SQLite store of watched products and their observed prices.
+
+    Each check is one row keyed by (watch, second), in a table without
+    rowids, so the rows of one product are stored together and a time range
+    query reads only those rows. Connections are per thread, with WAL
+    journaling so history queries never block the scheduler's writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+        return conn
+
+    def add_watch(self, platform: str, url: str, interval: float) -> Watch:
+        """
+        Watch a product, or change the interval of an existing watch.
+
+        Args:
+            platform: Scraper platform name
+            url: Canonical product URL
+            interval: Seconds between checks
+
+        Returns:
+            The stored watch
+        """
+        with self._conn() as conn:
+            conn.execute(
+                'INSERT INTO watches (platform, url, interval, created_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (platform, url) DO UPDATE SET interval = excluded.interval',
+                (platform, url, interval, time.time()),
+            )
+            row = conn.execute(
+                'SELECT id, platform, url, interval, created_at FROM watches WHERE platform = ? AND url = ?',
+                (platform, url),
+            ).fetchone()
+        return Watch(*row)
+
+    def remove_watch(self, watch_id: int) -> bool:
+        """Stop watching a product and drop its history. Returns False if unknown."""
+        with self._conn() as conn:
+            return conn.execute('DELETE FROM watches WHERE id = ?', (watch_id,)).rowcount > 0
+
+    def get_watch(self, watch_id: int) -> Optional[Watch]:
+        row = self._conn().execute(
+            'SELECT id, platform, url, interval, created_at FROM watches WHERE id = ?', (watch_id,)
+        ).fetchone()
+        return Watch(*row) if row else None
+
+    def watches(self) -> List[Watch]:
+        rows = self._conn().execute('SELECT id, platform, url, interval, created_at FROM watches ORDER BY id')
+        return [Watch(*row) for row in rows.fetchall()]
+
+    def watches_with_latest(self) -> List[Tuple[Watch, Optional[Dict[str, Any]]]]:
+        """
+        Every watch with its most recent check, in one query.
+
+        Returns:
+            List of ``(watch, latest)``, where ``latest`` is as returned by
+            ``latest`` (None if the product was never checked)
+        """
+        # Each correlated MAX(ts) is a single seek at the end of the
+        # watch's range in the (watch_id, ts) key
+        rows = self._conn().execute(
+            'SELECT w.id, w.platform, w.url, w.interval, w.created_at, p.ts, p.price, p.availability, p.error '
+            'FROM watches w LEFT JOIN prices p '
+            'ON p.watch_id = w.id AND p.ts = (SELECT MAX(ts) FROM prices WHERE watch_id = w.id) '
+            'ORDER BY w.id'
+        ).fetchall()
+        return [
+            (Watch(*row[:5]), None if row[5] is None else
+             {'ts': row[5], 'price': row[6], 'availability': row[7], 'error': row[8]})
+            for row in rows
+        ]
+
+    def record(
+        self,
+        watch_id: int,
+        ts: float,
+        price: Optional[float] = None,
+        availability: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """
+        Record one check of a watched product.
+
+        Args:
+            watch_id: Watch that was checked
+            ts: Check time (seconds since the epoch; stored to the second)
+            price: Observed price, if any
+            availability: Observed availability text, if any
+            error: Failure message if the check failed
+
+        Returns:
+            False if the watch was removed (e.g. while it was being checked),
+            in which case nothing is recorded
+        """
+        with self._conn() as conn:
+            cursor = conn.execute(
+                'INSERT OR REPLACE INTO prices (watch_id, ts, price, availability, error) '
+                'SELECT ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM watches WHERE id = ?)',
+                (watch_id, int(ts), price, availability, error, watch_id),
+            )
+        return cursor.rowcount > 0
+
+    def history(
+        self,
+        watch_id: int,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Observed prices of a product, oldest first.
+
+        Args:
+            watch_id: Watched product
+            start: Only checks at or after this time (epoch seconds)
+            end: Only checks at or before this time (epoch seconds)
+            limit: Return at most the latest ``limit`` checks of the range
+
+        Returns:
+            List of ``{'ts', 'price', 'availability', 'error'}``
+        """
+        query = 'SELECT ts, price, availability, error FROM prices WHERE watch_id = ? AND ts BETWEEN ? AND ?'
+        params: List[Any] = [watch_id, int(start or 0), int(end if end is not None else 2 ** 62)]
+        if limit:
+            query = f'SELECT * FROM ({query} ORDER BY ts DESC LIMIT ?) ORDER BY ts'
+            params.append(limit)
+        else:
+            query += ' ORDER BY ts'
+        rows = self._conn().execute(query, params).fetchall()
+        return [{'ts': ts, 'price': price, 'availability': availability, 'error': error}
+                for ts, price, availability, error in rows]
+
+    def latest(self, watch_id: int) -> Optional[Dict[str, Any]]:
+        """Most recent check of a product, or None."""
+        rows = self.history(watch_id, limit=1)
+        return rows[0] if rows else None
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        watches = conn.execute('SELECT COUNT(*) FROM watches').fetchone()[0]
+        checks = conn.execute('SELECT COUNT(*) FROM prices').fetchone()[0]
+        return {'watches': watches, 'checks': checks}
+
+
+class WatchScheduler:
+    """
+    Run watched products through a scrape function on their intervals.
+
+    Due times live in a heap, so the scheduler sleeps exactly until the next
+    watch is due (or a new watch is added). Each run is rescheduled at its
+    interval plus or minus ``jitter`` (a fraction of the interval), which
+    spreads watches added together instead of firing them in lockstep.
+    At most ``max_concurrency`` checks run at once, and at most ``per_host``
+    against any one host.
+    """
+
+    def __init__(
+        self,
+        history: PriceHistory,
+        scrape: Callable[[str, str], Awaitable[Dict]],
+        max_concurrency: int = 8,
+        per_host: int = 2,
+        jitter: float = 0.1,
+    ):
+        self.history = history
+        self.scrape = scrape
+        self.per_host = per_host
+        self.jitter = jitter
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._watches: Dict[int, Watch] = {}
+        self._heap: List[tuple] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+        # Ids of the watches being checked right now
+        self._checking: set = set()
+        self.runs = 0
+        self.failures = 0
+
+    async def start(self):
+        """Load the stored watches and start scheduling."""
+        # Loading every watch is a blocking query; keep it off the event loop
+        watches = await asyncio.get_running_loop().run_in_executor(None, self.history.watches_with_latest)
+        now = time.time()
+        for watch, latest in watches:
+            due = latest['ts'] + watch.interval if latest else now
+            # Spread watches that are all overdue after a restart
+            self._schedule(watch, max(due, now) + random.uniform(0, watch.interval * self.jitter))
+        self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        """Stop scheduling and wait for running checks to finish."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def add(self, watch: Watch):
+        """
+        Schedule a new (or updated) watch to run now.
+
+        A watch being checked right now is not run a second time: the
+        running check schedules the updated watch when it finishes.
+        """
+        if watch.id in self._checking:
+            self._watches[watch.id] = watch
+            return
+        self._schedule(watch, time.time())
+        self._wakeup.set()
+
+    def remove(self, watch_id: int):
+        # Its heap entry is skipped when it comes due
+        self._watches.pop(watch_id, None)
+
+    def _schedule(self, watch: Watch, due: float):
+        self._watches[watch.id] = watch
+        heapq.heappush(self._heap, (due, watch.id, watch))
+
+    def _next_due(self, watch: Watch) -> float:
+        spread = watch.interval * self.jitter
+        return time.time() + watch.interval + random.uniform(-spread, spread)
+
+    async def _loop(self):
+        while True:
+            self._wakeup.clear()
+            timeout = None
+            while self._heap:
+                due, watch_id, watch = self._heap[0]
+                if self._watches.get(watch_id) is not watch:
+                    # Removed or replaced since it was scheduled
+                    heapq.heappop(self._heap)
+                    continue
+                timeout = due - time.time()
+                if timeout > 0:
+                    break
+                heapq.heappop(self._heap)
+                self._checking.add(watch.id)
+                task = asyncio.ensure_future(self._run(watch))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+                timeout = None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run(self, watch: Watch):
+        host = self._hosts.get(watch.host)
+        if host is None:
+            host = self._hosts[watch.host] = asyncio.Semaphore(self.per_host)
+        loop = asyncio.get_running_loop()
+        try:
+            # Wait for the host before taking a global slot, so watches
+            # queued on one busy host do not hold slots other hosts could use
+            async with host, self._slots:
+                started = time.time()
+                try:
+                    result = await self.scrape(watch.platform, watch.url)
+                    record = (watch.id, started, result.get('price'), result.get('availability'), None)
+                except Exception as e:
+                    self.failures += 1
+                    record = (watch.id, started, None, None, str(e))
+                self.runs += 1
+                await loop.run_in_executor(None, self.history.record, *record)
+        finally:
+            self._checking.discard(watch.id)
+            # The watch may have been updated (new interval) while it ran
+            current = self._watches.get(watch.id)
+            if current is not None:
+                self._schedule(current, self._next_due(current))
+                self._wakeup.set()
+
+    def stats(self) -> Dict:
+        return {
+            'watches': len(self._watches),
+            'running': len(self._running),
+            'runs': self.runs,
+            'failures': self.failures,
+            'next_due_in': round(max(self._heap[0][0] - time.time(), 0.0), 3) if self._heap else None,
+        }
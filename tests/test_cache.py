@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from scraper import cache
+from scraper.cache import ResultCache, SingleFlight, cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, 'monotonic', clock.monotonic)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    results = ResultCache(ttl=60)
+    results.set('a', {'price': 1})
+    clock.now += 59
+    assert results.get('a') == {'price': 1}
+    clock.now += 1
+    assert results.get('a') is None
+    assert results.stats()['size'] == 0
+    assert (results.hits, results.misses) == (1, 1)
+
+
+def test_least_recently_used_is_evicted(clock):
+    results = ResultCache(maxsize=2)
+    results.set('a', 1)
+    results.set('b', 2)
+    results.get('a')
+    results.set('c', 3)
+    assert results.get('b') is None
+    assert (results.get('a'), results.get('c')) == (1, 3)
+    assert results.evictions == 1
+
+
+@pytest.mark.parametrize('maxsize, ttl', [(0, 300), (1024, 0)])
+def test_disabled_cache_stores_nothing(maxsize, ttl):
+    results = ResultCache(maxsize=maxsize, ttl=ttl)
+    results.set('a', 1)
+    assert results.get('a') is None
+
+
+def test_cache_key_ignores_field_order():
+    assert cache_key('Amazon', 'https://www.amazon.in/dp/B000000001', None, ['title', 'price']) == \
+        cache_key('amazon', 'https://www.amazon.in/dp/B000000001', None, ('price', 'title'))
+    assert cache_key('amazon', 'https://www.amazon.in/dp/B000000001', None, None) != \
+        cache_key('amazon', 'https://www.amazon.in/dp/B000000001', None, ())
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    calls = []
+
+    async def scrape():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'price': 1299.0}
+
+    async def main():
+        return await asyncio.gather(*(flight.do('a', scrape) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert calls == [1]
+    assert [result for result, _ in results] == [{'price': 1299.0}] * 5
+    assert sorted(shared for _, shared in results) == [False] + [True] * 4
+    assert flight.stats() == {'in_flight': 0, 'coalesced': 4}
+
+
+def test_error_reaches_every_waiter_and_is_not_kept():
+    flight = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError('blocked')
+
+    async def main():
+        first = await asyncio.gather(*(flight.do('a', fail) for _ in range(3)), return_exceptions=True)
+        # A later call starts a new run instead of reusing the failure
+        second = await asyncio.gather(flight.do('a', fail), return_exceptions=True)
+        return first + second
+
+    errors = asyncio.run(main())
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert calls == [1, 1]
+
+
+def test_cancelled_waiter_does_not_cancel_others():
+    flight = SingleFlight()
+
+    async def scrape():
+        await asyncio.sleep(0.05)
+        return 'page'
+
+    async def main():
+        leaver = asyncio.ensure_future(flight.do('a', scrape))
+        stayer = asyncio.ensure_future(flight.do('a', scrape))
+        await asyncio.sleep(0.01)
+        leaver.cancel()
+        return await stayer
+
+    assert asyncio.run(main()) == ('page', True)
@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+from scraper import amazon_scraper
+from scraper.amazon_scraper import AmazonScraper
+from scraper.embedded import a_state, extract_embedded, json_ld, twister
+from scraper.page import Page
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+JSON_LD = b'''<script type="application/ld+json">
+{"@context": "https://schema.org", "@graph": [{"@type": "BreadcrumbList"}, {
+  "@type": "Product", "name": "Apple &amp; Co  Phone", "image": ["https://img/1.jpg"],
+  "offers": {"@type": "Offer", "price": "1299.00", "availability": "https://schema.org/OutOfStock"},
+  "aggregateRating": {"ratingValue": "4.5", "bestRating": "5"}}]}
+</script>'''
+A_STATE = (
+    b'<script type="a-state" data-a-state="{&quot;key&quot;:&quot;desktop-landing-image-data&quot;}">'
+    b'{"landingImageUrl": "https://img/landing.jpg"}</script>'
+)
+TWISTER = (
+    b'<div class="twister-plus-buying-options-price-data">'
+    b'{&quot;desktop_buybox_group_1&quot;:[{&quot;displayPrice&quot;:&quot;\xe2\x82\xb9999.00&quot;,'
+    b'&quot;priceAmount&quot;:999.0}]}</div>'
+    b'<script>var data = {"hiRes":"https://img/hires.jpg"};</script>'
+)
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def test_json_ld_product_in_graph():
+    assert json_ld(JSON_LD) == {
+        'title': 'Apple & Co Phone',
+        'image': 'https://img/1.jpg',
+        'price': 1299.0,
+        'price_text': '1299.00',
+        'availability': 'Currently unavailable',
+        'rating': 4.5,
+        'rating_text': '4.5 out of 5 stars',
+    }
+
+
+def test_a_state_landing_image():
+    assert a_state(A_STATE) == {'image': 'https://img/landing.jpg'}
+
+
+def test_twister_price_and_image():
+    assert twister(TWISTER) == {'price': 999.0, 'price_text': '₹999.00', 'image': 'https://img/hires.jpg'}
+
+
+def test_sources_in_preference_order():
+    values, sources = extract_embedded(JSON_LD + A_STATE + TWISTER)
+    assert sources == {
+        'title': 'json-ld', 'price': 'twister', 'rating': 'json-ld', 'image': 'a-state', 'availability': 'json-ld',
+    }
+    assert (values['price'], values['price_text'], values['image']) == (999.0, '₹999.00', 'https://img/landing.jpg')
+
+
+def test_only_wanted_fields():
+    values, sources = extract_embedded(JSON_LD + TWISTER, ['price'])
+    assert values == {'price': 999.0, 'price_text': '₹999.00'}
+    assert sources == {'price': 'twister'}
+
+
+@pytest.mark.parametrize('content', [
+    b'<html><body>no embedded data</body></html>',
+    b'<script type="application/ld+json">{"@type": "Product", "name": </script>',
+    b'<script type="application/ld+json">[1, "x", {"@type": "Offer"}]</script>',
+    b'<script data-a-state="{not json}">{"landingImageUrl": "x"}</script>',
+    b'<div class="twister-plus-buying-options-price-data">{&quot;x&quot;: [{&quot;priceAmount&quot;: &quot;n/a&quot;}]}</div>',
+])
+def test_missing_or_malformed_data_is_ignored(content):
+    assert extract_embedded(content) == ({}, {})
+
+
+@pytest.fixture
+def amazon():
+    return AmazonScraper()
+
+
+def test_malformed_embedded_data_falls_back_to_dom(amazon):
+    html = (
+        b'<script type="application/ld+json">{"@type": "Product", "name": </script>'
+        b'<span id="productTitle"> DOM Title </span><span class="a-price-whole">1,299.</span>'
+    )
+    result = amazon.extract(Page('https://www.amazon.in/dp/B000000001', html), ['title', 'price'])
+    assert result == {
+        'title': 'DOM Title', 'price': 1299.0, 'price_text': '1,299.', 'url': 'https://www.amazon.in/dp/B000000001',
+    }
+
+
+def test_techspec_fixture_embedded_and_dom_agree(amazon, monkeypatch):
+    page = fixture('amazon_techspec.html')
+    embedded = amazon.extract(Page('u', page))
+    assert set(extract_embedded(page)[1]) == {'title', 'price', 'rating', 'image', 'availability'}
+    monkeypatch.setattr(amazon_scraper, 'extract_embedded', lambda content, fields: ({}, {}))
+    dom = amazon.extract(Page('u', page))
+    for field in ('title', 'price', 'rating', 'rating_text', 'image', 'description', 'details'):
+        assert embedded[field] == dom[field], field
+    assert embedded['availability'].lower() == dom['availability'].lower()
+
+
+def test_page_without_embedded_data_uses_dom(amazon):
+    result = amazon.extract(Page('u', fixture('amazon_detailbullets.html')))
+    assert result['title'] == 'Sapiens: A Brief History of Humankind'
+    assert result['price'] == 45783.0
+
+
+def test_sources_not_in_result(amazon):
+    page = Page('u', fixture('amazon_techspec.html'))
+    assert 'sources' not in amazon.extract(page)
+    assert set(amazon.extract(page, ['price'])) == {'price', 'price_text', 'url'}
@@ -0,0 +1,108 @@
+from scraper.matching import ProductIndex, normalize_identifier, product_keys, title_tokens
+
+
+IPHONE = {
+    'title': 'Apple iPhone 15 (128 GB) - Black',
+    'price': 69900.0,
+    'details': {'Brand': 'Apple', 'Item model number': 'MTP03HN/A'},
+}
+
+
+def make_index(**kwargs):
+    index = ProductIndex(**kwargs)
+    index.add('amazon', 'https://amazon.in/dp/1', IPHONE)
+    index.add('amazon', 'https://amazon.in/dp/2', {
+        'title': 'Samsung Galaxy S24 5G (256 GB) - Onyx Black',
+        'price': 74999.0,
+        'details': {'Brand': 'Samsung'},
+    })
+    index.add('amazon', 'https://amazon.in/dp/3', {
+        'title': 'Spigen Case for Apple iPhone 15 - Clear',
+        'price': 999.0,
+        'details': {'Brand': 'Spigen'},
+    })
+    return index
+
+
+def test_title_tokens_glue_units_and_drop_stopwords():
+    assert title_tokens('Apple iPhone 15 (128 GB) - Black') == {'apple', 'iphone', '15', '128gb'}
+
+
+def test_product_keys():
+    brand, identifiers = product_keys({
+        'Brand': 'Apple Inc, One Apple Park Way',
+        'ISBN-13 : 978-0-13-468599-1': 'ISBN-13 :',
+    })
+    assert brand == 'apple'
+    assert identifiers == {normalize_identifier('978-0-13-468599-1')}
+
+
+def test_identifier_match_across_platforms():
+    index = make_index()
+    index.add('flipkart', 'https://flipkart.com/p/1', {
+        'title': 'iPhone 15 128GB',
+        'details': {'Model Number': 'MTP03HN A'},
+    })
+    matches = index.matches_for('flipkart', 'https://flipkart.com/p/1')
+    assert matches[0].url == 'https://amazon.in/dp/1'
+    assert matches[0].reason == 'identifier'
+    assert matches[0].score == 1.0
+
+
+def test_title_match_recall():
+    index = make_index()
+    matches = index.candidates('Apple iPhone 15 128GB Black', details={'Brand': 'Apple'})
+    assert [m.url for m in matches][:1] == ['https://amazon.in/dp/1']
+    assert matches[0].reason == 'title'
+    assert all(m.url != 'https://amazon.in/dp/2' for m in matches)
+
+
+def test_other_brand_and_platform_excluded():
+    index = make_index()
+    matches = index.candidates('Apple iPhone 15 Case Clear', details={'Brand': 'Apple'})
+    assert 'https://amazon.in/dp/3' not in [m.url for m in matches]
+    assert index.candidates('Apple iPhone 15 128GB', exclude_platform='amazon') == []
+
+
+def test_price_update_keeps_entry():
+    index = make_index()
+    product_id = index.add('amazon', 'https://amazon.in/dp/1', {'title': 'N/A', 'price': 64900.0})
+    assert index.add('amazon', 'https://amazon.in/dp/1', dict(IPHONE, price=65900.0)) == product_id
+    assert index.get('amazon', 'https://amazon.in/dp/1')['price'] == 65900.0
+    assert index.stats()['entries'] == 3
+
+
+def test_changed_title_tombstones_old_entry():
+    index = make_index()
+    index.add('amazon', 'https://amazon.in/dp/2', {'title': 'Samsung Galaxy S24 Ultra', 'details': {'Brand': 'Samsung'}})
+    assert len(index) == 3
+    assert index.stats()['entries'] == 4
+    titles = [m.title for m in index.candidates('Samsung Galaxy S24 5G (256 GB) - Onyx Black')]
+    assert 'Samsung Galaxy S24 5G (256 GB) - Onyx Black' not in titles
+
+
+def test_churn_is_compacted():
+    index = make_index(compact_min=10)
+    for version in range(50):
+        index.add('amazon', 'https://amazon.in/dp/2', {
+            'title': f'Samsung Galaxy S24 5G (256 GB) - Onyx Black v{version}',
+            'details': {'Brand': 'Samsung'},
+        })
+    stats = index.stats()
+    assert stats['products'] == 3
+    assert stats['compactions'] >= 1
+    assert stats['entries'] <= 2 * stats['products'] + 10
+    assert index.matches_for('flipkart', 'x') is None
+    matches = index.candidates('Samsung Galaxy S24 5G 256GB Onyx Black v49', details={'Brand': 'Samsung'})
+    assert matches[0].url == 'https://amazon.in/dp/2'
+    assert index.get('amazon', 'https://amazon.in/dp/1')['identifiers'] == ['MTP03HNA']
+    assert index.candidates('iPhone', details={'Item model number': 'MTP03HN/A'})[0].url == 'https://amazon.in/dp/1'
+
+
+def test_compact_drops_dead_postings():
+    index = make_index()
+    index.add('amazon', 'https://amazon.in/dp/3', {'title': 'Spigen Ultra Hybrid', 'details': {'Brand': 'Spigen'}})
+    index.compact()
+    stats = index.stats()
+    assert stats['entries'] == stats['products'] == 3
+    assert index.candidates('Spigen Case for Apple iPhone 15 Clear', details={'Brand': 'Spigen'}) == []
@@ -0,0 +1,25 @@
+import pickle
+
+from scraper.metrics import MetricsRegistry, RecordedMetrics, ScraperMetrics
+
+
+def test_recorded_metrics_replay():
+    recorded = RecordedMetrics()
+    recorded.extract_seconds.labels('amazon').observe(0.02)
+    recorded.field_sources.labels('amazon', 'price', 'twister').inc()
+    updates = pickle.loads(pickle.dumps(recorded.take()))
+    assert recorded.take() == []
+
+    registry = MetricsRegistry()
+    RecordedMetrics.replay(ScraperMetrics(registry), updates)
+    text = registry.render()
+    assert 'scraper_extract_seconds_count{platform="amazon"} 1' in text
+    assert 'scraper_field_source_total{platform="amazon",field="price",source="twister"} 1' in text
+
+
+def test_field_source_counts():
+    metrics = ScraperMetrics(MetricsRegistry())
+    metrics.field_sources.labels('amazon', 'price', 'twister').inc()
+    metrics.field_sources.labels('amazon', 'price', 'dom').inc(2)
+    metrics.field_sources.labels('nykaa', 'price', 'dom').inc()
+    assert metrics.field_source_counts() == {'price': {'twister': 1, 'dom': 3}}
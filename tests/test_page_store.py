@@ -0,0 +1,29 @@
+from scraper.page_store import PageStore
+
+
+def test_replaced_body_is_deleted(tmp_path):
+    store = PageStore(str(tmp_path / 'pages.db'))
+    store.put('https://www.amazon.in/dp/B000000001', b'<html>v1</html>')
+    store.put('https://www.amazon.in/dp/B000000001', b'<html>v2</html>')
+    assert store.stats()['bodies'] == 1
+    assert store.get('https://www.amazon.in/dp/B000000001').content == b'<html>v2</html>'
+
+
+def test_shared_body_is_kept(tmp_path):
+    store = PageStore(str(tmp_path / 'pages.db'))
+    store.put('https://www.amazon.in/dp/B000000001', b'<html>same</html>')
+    store.put('https://www.amazon.in/dp/B000000002', b'<html>same</html>')
+    store.put('https://www.amazon.in/dp/B000000001', b'<html>new</html>')
+    assert store.stats()['bodies'] == 2
+    assert store.get('https://www.amazon.in/dp/B000000002').content == b'<html>same</html>'
+
+
+def test_prune_removes_orphaned_bodies(tmp_path):
+    store = PageStore(str(tmp_path / 'pages.db'))
+    store.put('https://www.amazon.in/dp/B000000001', b'<html>kept</html>')
+    with store._conn() as conn:
+        # Left behind by a store written before put deleted replaced bodies
+        conn.execute("INSERT INTO bodies (digest, size, data) VALUES ('old', 3, x'00')")
+    assert store.prune() == 1
+    assert store.prune() == 0
+    assert store.stats()['bodies'] == 1
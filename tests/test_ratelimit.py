@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+from scraper import ratelimit
+from scraper.ratelimit import BlockedError, Permit, RateLimiter, Throttled, retry_after_seconds
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit.time, 'monotonic', clock.monotonic)
+    return clock
+
+
+def test_token_bucket_allows_burst_then_refills(clock):
+    limiter = RateLimiter(rate=2, burst=3, initial_concurrency=10)
+    assert [limiter._try_acquire('shop') for _ in range(3)] == [0, 0, 0]
+    # Empty bucket: the next token is due in 1 / rate seconds
+    assert limiter._try_acquire('shop') == pytest.approx(0.5)
+    clock.now += 0.5
+    assert limiter._try_acquire('shop') == 0
+    # Idle time never saves more than ``burst`` tokens
+    clock.now += 60
+    for _ in range(4):
+        limiter.release('shop')
+    assert [limiter.try_acquire('shop') for _ in range(4)] == [True, True, True, False]
+
+
+def test_concurrency_limit(clock):
+    limiter = RateLimiter(rate=0, initial_concurrency=2)
+    assert limiter.try_acquire('shop') and limiter.try_acquire('shop')
+    assert limiter._try_acquire('shop') is None
+    limiter.release('shop')
+    assert limiter.try_acquire('shop')
+    # Hosts are limited separately
+    assert limiter.try_acquire('other')
+
+
+def test_limit_grows_additively_and_halves_on_throttle(clock):
+    limiter = RateLimiter(rate=0, initial_concurrency=4, min_concurrency=1, max_concurrency=5)
+    state = limiter._state('shop')
+    for _ in range(4):
+        limiter.try_acquire('shop')
+        limiter.release('shop', 'ok')
+    # About one more slot per round of ``limit`` successes
+    assert 4.9 < state.limit < 5
+    limiter.try_acquire('shop')
+    limiter.release('shop', 'throttled')
+    assert 2.4 < state.limit < 2.5
+    for _ in range(3):
+        limiter.try_acquire('shop')
+        limiter.release('shop', 'throttled')
+    assert state.limit == 1
+    for _ in range(100):
+        limiter.try_acquire('shop')
+        limiter.release('shop', 'ok')
+    assert state.limit == 5
+
+
+def test_errors_and_cancellations_leave_limit_alone(clock):
+    limiter = RateLimiter(rate=0, initial_concurrency=4)
+    for outcome in ('error', 'cancelled'):
+        limiter.try_acquire('shop')
+        limiter.release('shop', outcome)
+    host = limiter.stats()['hosts']['shop']
+    assert (host['concurrency_limit'], host['errors'], host['in_flight']) == (4, 1, 0)
+
+
+def test_retry_after_pauses_host(clock):
+    limiter = RateLimiter(rate=0, max_retry_after=60)
+    limiter.try_acquire('shop')
+    limiter.release('shop', 'throttled', retry_after=10)
+    assert limiter.paused_for('shop') == 10
+    with pytest.raises(Throttled) as raised:
+        limiter.try_acquire('shop')
+    assert not isinstance(raised.value, BlockedError)
+    assert raised.value.retry_after == 10
+    clock.now += 10
+    assert limiter.try_acquire('shop')
+
+
+def test_retry_after_is_capped(clock):
+    limiter = RateLimiter(rate=0, max_retry_after=60)
+    limiter.try_acquire('shop')
+    limiter.release('shop', 'throttled', retry_after=3600)
+    assert limiter.paused_for('shop') == 60
+
+
+def test_captcha_pauses_for_block_pause(clock):
+    limiter = RateLimiter(rate=0, block_pause=30)
+    limiter.try_acquire('shop')
+    limiter.release('shop', 'blocked')
+    clock.now += 5
+    with pytest.raises(BlockedError) as raised:
+        limiter.acquire('shop')
+    assert raised.value.retry_after == 25
+    assert limiter.stats()['hosts']['shop']['blocked'] == 1
+
+
+def test_paused_host_fails_fast_async(clock):
+    limiter = RateLimiter(rate=0)
+    limiter.try_acquire('shop')
+    limiter.release('shop', 'throttled', retry_after=5)
+    with pytest.raises(Throttled):
+        asyncio.run(limiter.acquire_async('shop'))
+
+
+def test_permit_reports_outcome(clock):
+    limiter = RateLimiter(rate=0, initial_concurrency=4)
+    with limiter.permit('shop'):
+        pass
+    with pytest.raises(BlockedError):
+        with limiter.permit('shop'):
+            raise BlockedError('captcha')
+    host = limiter.stats()['hosts']['shop']
+    assert (host['requests'], host['blocked'], host['in_flight']) == (2, 1, 0)
+    assert limiter.paused_for('shop') == limiter.block_pause
+
+
+def test_permit_try_acquire_is_used_on_enter(clock):
+    limiter = RateLimiter(rate=0, initial_concurrency=1)
+    permit = limiter.permit('shop')
+    assert permit.try_acquire()
+    assert not limiter.permit('shop').try_acquire()
+    with permit:
+        assert limiter.stats()['hosts']['shop']['requests'] == 1
+    assert limiter.stats()['hosts']['shop']['in_flight'] == 0
+
+
+def test_permit_without_limiter_is_noop():
+    with Permit(None, 'shop'):
+        pass
+    assert Permit(None, 'shop').try_acquire()
+
+
+@pytest.mark.parametrize('headers, seconds', [
+    ({'Retry-After': '120'}, 120.0),
+    ({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}, None),
+    ({}, None),
+    (None, None),
+])
+def test_retry_after_seconds(headers, seconds):
+    assert retry_after_seconds(headers) == seconds
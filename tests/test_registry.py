@@ -0,0 +1,56 @@
+import sys
+
+from scraper.registry import BUILTIN_SCRAPERS, ScraperRegistry
+
+
+class PluginScraper:
+    PLATFORM = 'nykaa'
+
+    def __init__(self, **options):
+        self.options = options
+
+
+class BrokenScraper:
+    def __init__(self, **options):
+        raise RuntimeError('missing dependency')
+
+
+def test_status_does_not_import_scrapers():
+    registry = ScraperRegistry(entry_points=False)
+    registry.register('nykaa', 'no_such_module:NykaaScraper')
+    assert registry.status('amazon') == 'implemented'
+    assert registry.status('flipkart') == 'coming_soon'
+    # Plugins are scrapeable unless registered with another status
+    assert registry.status('nykaa') == 'implemented'
+    assert registry.status('shopify') == 'unknown'
+    assert registry.loaded() == {}
+    assert registry.stats()['errors'] == {}
+
+
+def test_placeholder_modules_stay_unimported():
+    placeholders = [name for name in BUILTIN_SCRAPERS if name != 'amazon']
+    modules = [BUILTIN_SCRAPERS[name].partition(':')[0] for name in placeholders]
+    already = [module for module in modules if module in sys.modules]
+    registry = ScraperRegistry(entry_points=False)
+    assert {name: registry.status(name) for name in placeholders} == dict.fromkeys(placeholders, 'coming_soon')
+    registry.warm(status='implemented', names=placeholders, background=False)
+    assert [module for module in modules if module in sys.modules] == already
+
+
+def test_unimportable_scraper_is_unavailable():
+    registry = ScraperRegistry(specs={'broken': 'no_such_module:Scraper'}, entry_points=False)
+    assert registry.status('broken') == 'implemented'
+    registry.warm(background=False)
+    assert registry.status('broken') == 'unavailable'
+    assert 'ModuleNotFoundError' in registry.errors['broken']
+
+
+def test_warm_only_loads_matching_status():
+    registry = ScraperRegistry(
+        specs={'nykaa': PluginScraper, 'broken': BrokenScraper},
+        statuses={'broken': 'coming_soon'},
+        entry_points=False,
+    )
+    registry.warm(status='implemented', background=False)
+    assert list(registry.loaded()) == ['nykaa']
+    assert registry.errors == {}
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scraper.ratelimit import RateLimiter
+from scraper.retry import AttemptCancelled, FetchError, RetryPolicy
+
+
+def no_backoff(monkeypatch, policy):
+    monkeypatch.setattr(policy, 'delay', lambda retry: 0)
+
+
+def test_retriable_errors_are_retried(monkeypatch):
+    policy = RetryPolicy(attempts=3)
+    no_backoff(monkeypatch, policy)
+    calls = []
+
+    def attempt(cancellation):
+        calls.append(1)
+        if len(calls) < 3:
+            raise FetchError('reset', retriable=True)
+        return 'page'
+
+    assert policy.call('shop', attempt) == 'page'
+    assert len(calls) == 3
+    assert policy.retries == 2
+
+
+def test_non_retriable_error_is_raised_at_once():
+    policy = RetryPolicy(attempts=3)
+    calls = []
+
+    def attempt(cancellation):
+        calls.append(1)
+        raise FetchError('not found', 404)
+
+    with pytest.raises(FetchError):
+        policy.call('shop', attempt)
+    assert len(calls) == 1
+
+
+def test_last_error_is_raised_after_all_attempts(monkeypatch):
+    policy = RetryPolicy(attempts=2)
+    no_backoff(monkeypatch, policy)
+    with pytest.raises(FetchError, match='down'):
+        policy.call('shop', lambda cancellation: (_ for _ in ()).throw(FetchError('down', 502, retriable=True)))
+    assert policy.retries == 1
+
+
+def test_backoff_is_capped_full_jitter():
+    policy = RetryPolicy(backoff=0.5, max_backoff=2)
+    assert all(0 <= policy.delay(0) <= 0.5 for _ in range(100))
+    assert all(0 <= policy.delay(10) <= 2 for _ in range(100))
+
+
+def test_latency_excludes_permit_wait():
+    limiter = RateLimiter(rate=10, burst=1)
+    policy = RetryPolicy()
+    # The first request takes the only token; the second waits ~0.1s for the next
+    for _ in range(2):
+        policy.call('shop', lambda cancellation: 'page', lambda: limiter.permit('shop'))
+    assert max(policy.latency._samples['shop']) < 0.05
+    assert limiter.stats()['hosts']['shop']['wait_seconds'] > 0.05
+
+
+def test_slow_attempt_is_hedged_and_loser_cancelled():
+    limiter = RateLimiter(rate=0)
+    policy = RetryPolicy(hedge_after=0.05, hedge_workers=4)
+    calls = []
+    cancelled = threading.Event()
+
+    def attempt(cancellation):
+        calls.append(1)
+        if len(calls) == 1:
+            cancellation.on_cancel(cancelled.set)
+            with cancellation:
+                cancelled.wait(5)
+                raise OSError('connection closed')
+        return 'hedge'
+
+    assert policy.call('shop', attempt, lambda: limiter.permit('shop')) == 'hedge'
+    assert cancelled.wait(1)
+    assert (policy.hedges, policy.hedge_wins) == (1, 1)
+    time.sleep(0.05)
+    host = limiter.stats()['hosts']['shop']
+    # The loser's slot is given back without counting as an error
+    assert host['in_flight'] == 0
+    assert host['errors'] == 0
+
+
+def test_hedge_delay_starts_after_permit():
+    limiter = RateLimiter(rate=5, burst=1)
+    limiter.try_acquire('shop')
+    policy = RetryPolicy(hedge_after=0.1, hedge_workers=4)
+    # Waiting ~0.2s for a token must not trigger a hedge
+    assert policy.call('shop', lambda cancellation: 'page', lambda: limiter.permit('shop')) == 'page'
+    assert policy.hedges == 0
+
+
+def test_no_hedge_when_host_has_no_room():
+    limiter = RateLimiter(rate=0, initial_concurrency=1, max_concurrency=1)
+    policy = RetryPolicy(hedge_after=0.02, hedge_workers=4)
+
+    def attempt(cancellation):
+        time.sleep(0.1)
+        return 'page'
+
+    assert policy.call('shop', attempt, lambda: limiter.permit('shop')) == 'page'
+    assert policy.hedges == 0
+    assert limiter.stats()['hosts']['shop']['requests'] == 1
+
+
+def test_auto_hedge_waits_for_samples():
+    policy = RetryPolicy(hedge_after='auto')
+    assert policy.hedge_delay('shop') is None
+    for seconds in range(1, 21):
+        policy.latency.record('shop', seconds / 100)
+    assert policy.hedge_delay('shop') == 0.2
+
+
+def test_async_hedge_cancels_loser():
+    limiter = RateLimiter(rate=0)
+    policy = RetryPolicy(hedge_after=0.05)
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(5)
+        return 'hedge'
+
+    async def main():
+        result = await policy.call_async('shop', attempt, lambda: limiter.permit('shop'))
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == 'hedge'
+    assert policy.hedge_wins == 1
+    host = limiter.stats()['hosts']['shop']
+    assert (host['in_flight'], host['errors']) == (0, 0)
+
+
+def test_cancelled_attempt_raises_attempt_cancelled():
+    from scraper.retry import Cancellation
+    cancellation = Cancellation()
+    cancellation.cancel()
+    with pytest.raises(AttemptCancelled):
+        with cancellation:
+            pass
+
+
+def test_queued_hedge_gives_back_its_permit():
+    limiter = RateLimiter(rate=0)
+    # One pool thread: the hedge is still queued when the first attempt wins
+    policy = RetryPolicy(hedge_after=0.02, hedge_workers=1)
+
+    def attempt(cancellation):
+        time.sleep(0.1)
+        return 'page'
+
+    assert policy.call('shop', attempt, lambda: limiter.permit('shop')) == 'page'
+    # Let the pool thread finish whatever it picked up
+    policy._hedge_executor().submit(lambda: None).result()
+    host = limiter.stats()['hosts']['shop']
+    assert policy.hedges == 1
+    assert (host['requests'], host['in_flight'], host['errors']) == (2, 0, 0)
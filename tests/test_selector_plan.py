@@ -0,0 +1,33 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from scraper.selector_plan import FieldRule, SelectorPlan
+
+
+def _text(elem):
+    text = elem.get_text().strip()
+    return {'price': text}, bool(text)
+
+
+PLAN = SelectorPlan([
+    FieldRule('price', ('#primary', '.secondary', 'span.tertiary'), _text),
+])
+
+
+@pytest.mark.parametrize('html, price, index', [
+    ('<span id="primary">10</span><span class="secondary">20</span>', '10', 0),
+    ('<span class="secondary">20</span><span class="tertiary">30</span>', '20', 1),
+    # An empty match does not complete the field, so the next selector is tried
+    ('<span id="primary"> </span><span class="tertiary">30</span>', '30', 2),
+])
+def test_selector_fallback_order(html, price, index):
+    hits = {}
+    values = PLAN.evaluate(BeautifulSoup(html, 'html.parser'), hits=hits)
+    assert values['price'] == price
+    assert hits == {'price': index}
+
+
+def test_missing_field_is_absent():
+    hits = {}
+    assert PLAN.evaluate(BeautifulSoup('<p>nothing</p>', 'html.parser'), hits=hits) == {}
+    assert hits == {}
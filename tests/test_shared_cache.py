@@ -0,0 +1,43 @@
+import asyncio
+
+from scraper.shared_cache import SharedResultCache
+
+
+def test_one_scrape_across_processes(tmp_path):
+    # Two instances on one file stand in for two worker processes
+    path = str(tmp_path / 'shared.db')
+    first, second = SharedResultCache(path, poll_interval=0.01), SharedResultCache(path, poll_interval=0.01)
+    calls = []
+
+    async def scrape():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return {'price': 1299.0}
+
+    async def main():
+        return await asyncio.gather(first.do(('amazon', 'u'), scrape), second.do(('amazon', 'u'), scrape))
+
+    (value1, shared1), (value2, shared2) = asyncio.run(main())
+    assert calls == [1]
+    assert value1 == value2 == {'price': 1299.0}
+    assert sorted([shared1, shared2]) == [False, True]
+    assert first.waits + second.waits == 1
+
+
+def test_failed_scrape_releases_lease(tmp_path):
+    cache = SharedResultCache(str(tmp_path / 'shared.db'))
+
+    async def fail():
+        raise RuntimeError('down')
+
+    async def ok():
+        return {'price': 1.0}
+
+    async def main():
+        try:
+            await cache.do('k', fail)
+        except RuntimeError:
+            pass
+        return await cache.do('k', ok)
+
+    assert asyncio.run(main()) == ({'price': 1.0}, False)
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+from scraper.amazon_scraper import AmazonScraper
+from scraper.page import Page
+from scraper.streaming import RegionWatcher
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def stream(watcher, content, size):
+    for start in range(0, len(content), size):
+        if watcher.feed(content[start:start + size]):
+            break
+    return watcher
+
+
+def test_done_only_once_region_is_closed():
+    watcher = RegionWatcher([('productTitle',)])
+    assert not watcher.feed(b'<html><body><div><span id="productTitle">Apple iPhone')
+    assert not watcher.feed(b' 15</sp')
+    assert watcher.feed(b'an><div id="rest">')
+    assert watcher.content.endswith(b'<div id="rest">')
+
+
+def test_every_group_needs_one_closed_element():
+    watcher = RegionWatcher([('title', 'productTitle'), ('corePrice_feature_div',)])
+    assert not watcher.feed(b'<div id="title"><span id="productTitle">x</span></div>')
+    assert watcher.feed(b'<div id="corePrice_feature_div"><span>1,299</span></div>')
+
+
+def test_missing_region_reads_whole_body():
+    content = read_fixture('amazon_detailbullets.html')
+    watcher = stream(RegionWatcher([('no-such-id',)]), content, 16 * 1024)
+    assert not watcher.done
+    assert watcher.content == content
+
+
+@pytest.fixture(scope='module')
+def amazon():
+    return AmazonScraper(region_parsing=False)
+
+
+@pytest.mark.parametrize('fixture, price', [('amazon_techspec.html', 68999.0), ('amazon_detailbullets.html', 349.0)])
+@pytest.mark.parametrize('profile', ['lite', 'price'])
+@pytest.mark.parametrize('size', [97, 512, 4096, 16 * 1024])
+def test_profile_stops_early_without_losing_fields(amazon, fixture, price, profile, size):
+    content = read_fixture(fixture)
+    watcher = stream(RegionWatcher(amazon.profile_regions(profile)), content, size)
+    assert watcher.done
+    assert watcher.size < len(content) // 2
+    fields = amazon.PROFILES[profile]
+    streamed = amazon.extract(Page('u', watcher.content, truncated=True), fields)
+    # Whatever the chunking, the fields are read from the profile's regions
+    assert streamed == AmazonScraper(region_parsing=True).extract(Page('u', content), fields)
+    assert streamed['price'] == price
+
+
+def test_stop_point_is_just_past_the_region(amazon):
+    content = read_fixture('amazon_detailbullets.html')
+    size = 97
+    watcher = stream(RegionWatcher(amazon.profile_regions('price')), content, size)
+    last_close = max(
+        content.find(b'</', content.find(f'id="{region}"'.encode())) for region in amazon.REGIONS['price']
+        if f'id="{region}"'.encode() in content
+    )
+    assert watcher.size >= last_close
@@ -0,0 +1,38 @@
+import pytest
+
+from scraper.textnorm import normalize, parse_price, parse_rating
+
+
+@pytest.mark.parametrize('text, price', [
+    ('₹1,299.00', 1299.0),
+    ('₹1,29,999.00', 129999.0),
+    ('12,34,567', 1234567.0),
+    ('$29.99', 29.99),
+    ('1,299.', 1299.0),
+    ('M.R.P.: ₹79,900', 79900.0),
+    ('₹ 499 - ₹ 999', 499.0),
+    ('  ₹‎1,499\n', 1499.0),
+])
+def test_parse_price(text, price):
+    assert parse_price(text) == price
+
+
+@pytest.mark.parametrize('text', [None, '', 'Currently unavailable.', '₹'])
+def test_parse_price_without_number(text):
+    assert parse_price(text) is None
+
+
+@pytest.mark.parametrize('text, rating', [
+    ('4.5 out of 5 stars', 4.5),
+    ('4', 4.0),
+    ('42', 4.2),
+    (None, None),
+    ('No ratings', None),
+])
+def test_parse_rating(text, rating):
+    assert parse_rating(text) == rating
+
+
+def test_normalize_strips_markers_and_whitespace():
+    assert normalize('‏Brand‎ \n :\t Apple ') == 'Brand : Apple'
+    assert normalize(None) == ''
@@ -0,0 +1,45 @@
+import pytest
+
+from scraper.amazon_scraper import AmazonScraper
+from scraper.urls import normalize_url
+
+
+@pytest.fixture(scope='module')
+def amazon():
+    return AmazonScraper()
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.amazon.in/dp/B0CHX1W1XY',
+    'https://www.amazon.in/dp/B0CHX1W1XY/',
+    'https://www.amazon.in/dp/B0CHX1W1XY/ref=sr_1_1?keywords=iphone&qid=1700000000',
+    'https://www.amazon.in/Apple-iPhone-15-128-GB/dp/B0CHX1W1XY/ref=sr_1_3',
+    'https://www.amazon.in/gp/product/B0CHX1W1XY?pf_rd_r=ABC&th=1',
+    'https://m.amazon.in/gp/aw/d/B0CHX1W1XY',
+    'https://smile.amazon.in/dp/b0chx1w1xy',
+    'https://amazon.in/product-reviews/B0CHX1W1XY/ref=cm_cr_dp',
+    'http://www.amazon.in/exec/obidos/ASIN/B0CHX1W1XY#reviews',
+    'https://www.amazon.in/gp/offer-listing?asin=B0CHX1W1XY',
+])
+def test_canonical_url_variants(amazon, url):
+    assert amazon.canonical_url(url) == 'https://www.amazon.in/dp/B0CHX1W1XY'
+
+
+def test_canonical_url_keeps_tld(amazon):
+    assert amazon.canonical_url('https://www.amazon.co.uk/Some-Slug/dp/B000000001/ref=x') == \
+        'https://www.amazon.co.uk/dp/B000000001'
+
+
+def test_canonical_url_keeps_non_amazon_host(amazon):
+    assert amazon.canonical_url('http://127.0.0.1:8001/Slug/dp/B0CHX1W1XY/ref=sr_1_1?tag=x') == \
+        'http://127.0.0.1:8001/dp/B0CHX1W1XY'
+
+
+def test_canonical_url_without_asin_is_normalized(amazon):
+    url = 'https://WWW.Amazon.in:443/s?k=iphone&i=electronics#top'
+    assert amazon.canonical_url(url) == normalize_url(url) == 'https://www.amazon.in/s?i=electronics&k=iphone'
+
+
+def test_canonical_url_ignores_invalid_query_asin(amazon):
+    url = 'https://www.amazon.in/gp/offer-listing?asin=short'
+    assert amazon.canonical_url(url) == normalize_url(url)
@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import pytest
+
+from scraper.watch import PriceHistory, WatchScheduler
+
+URL = 'https://www.amazon.in/dp/B000000001'
+
+
+@pytest.fixture
+def history(tmp_path):
+    return PriceHistory(str(tmp_path / 'watch.db'))
+
+
+def test_add_watch_updates_interval(history):
+    watch = history.add_watch('amazon', URL, 3600)
+    again = history.add_watch('amazon', URL, 60)
+    assert again.id == watch.id
+    assert again.interval == 60
+    assert history.watches() == [again]
+
+
+def test_history_range_and_limit(history):
+    watch = history.add_watch('amazon', URL, 3600)
+    for ts, price in [(100, 10.0), (200, 20.0), (300, 30.0)]:
+        assert history.record(watch.id, ts, price, 'In Stock')
+    assert [row['price'] for row in history.history(watch.id)] == [10.0, 20.0, 30.0]
+    assert [row['ts'] for row in history.history(watch.id, start=150, end=300)] == [200, 300]
+    assert [row['ts'] for row in history.history(watch.id, limit=2)] == [200, 300]
+    assert history.latest(watch.id) == {'ts': 300, 'price': 30.0, 'availability': 'In Stock', 'error': None}
+
+
+def test_watches_with_latest(history):
+    checked = history.add_watch('amazon', URL, 3600)
+    unchecked = history.add_watch('amazon', URL + '2', 3600)
+    history.record(checked.id, 100, 10.0)
+    history.record(checked.id, 200, None, error='timeout')
+    assert history.watches_with_latest() == [
+        (checked, {'ts': 200, 'price': None, 'availability': None, 'error': 'timeout'}),
+        (unchecked, None),
+    ]
+
+
+def test_removed_watch_drops_history_and_records_nothing(history):
+    watch = history.add_watch('amazon', URL, 3600)
+    history.record(watch.id, 100, 10.0)
+    assert history.remove_watch(watch.id)
+    assert not history.remove_watch(watch.id)
+    assert not history.record(watch.id, 200, 20.0)
+    assert history.history(watch.id) == []
+    assert history.stats() == {'watches': 0, 'checks': 0}
+
+
+def run_scheduler(history, scrape, body, **options):
+    async def main():
+        scheduler = WatchScheduler(history, scrape, jitter=0, **options)
+        await scheduler.start()
+        try:
+            await body(scheduler)
+        finally:
+            await scheduler.stop()
+        return scheduler
+    return asyncio.run(main())
+
+
+def test_watches_run_on_their_interval(history):
+    watch = history.add_watch('amazon', URL, 0.1)
+    calls = []
+
+    async def scrape(platform, url):
+        calls.append(url)
+        return {'price': 10.0 * len(calls), 'availability': 'In Stock'}
+
+    scheduler = run_scheduler(history, scrape, lambda scheduler: asyncio.sleep(0.35))
+    assert 3 <= len(calls) <= 5
+    assert scheduler.runs == len(calls)
+    assert len(history.history(watch.id)) >= 1
+
+
+def test_failed_check_is_recorded(history):
+    watch = history.add_watch('amazon', URL, 3600)
+
+    async def scrape(platform, url):
+        raise RuntimeError('blocked')
+
+    scheduler = run_scheduler(history, scrape, lambda scheduler: asyncio.sleep(0.05))
+    assert scheduler.failures == 1
+    assert history.latest(watch.id)['error'] == 'blocked'
+
+
+def test_updating_a_running_watch_does_not_run_it_twice(history):
+    history.add_watch('amazon', URL, 3600)
+    started = []
+
+    async def scrape(platform, url):
+        started.append(url)
+        await asyncio.sleep(0.1)
+        return {'price': 10.0}
+
+    async def body(scheduler):
+        await asyncio.sleep(0.02)
+        assert len(started) == 1
+        # Same id, new interval, while the first check is still running
+        scheduler.add(history.add_watch('amazon', URL, 0.2))
+        await asyncio.sleep(0.15)
+        assert len(started) == 1
+        # The running check rescheduled the updated watch at its interval
+        await asyncio.sleep(0.2)
+        assert len(started) == 2
+
+    run_scheduler(history, scrape, body)
+
+
+def test_removed_watch_stops_running(history):
+    watch = history.add_watch('amazon', URL, 0.05)
+    calls = []
+
+    async def scrape(platform, url):
+        calls.append(url)
+        return {'price': 10.0}
+
+    async def body(scheduler):
+        await asyncio.sleep(0.02)
+        scheduler.remove(watch.id)
+        await asyncio.sleep(0.15)
+
+    scheduler = run_scheduler(history, scrape, body)
+    assert len(calls) == 1
+    assert scheduler.stats()['watches'] == 0
+
+
+def test_start_waits_for_interval_since_last_check(history):
+    watch = history.add_watch('amazon', URL, 3600)
+    history.record(watch.id, time.time(), 10.0)
+    calls = []
+
+    async def scrape(platform, url):
+        calls.append(url)
+        return {}
+
+    scheduler = run_scheduler(history, scrape, lambda scheduler: asyncio.sleep(0.05))
+    assert calls == []
+    assert scheduler.stats()['next_due_in'] > 3500